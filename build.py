@@ -1,25 +1,27 @@
 #!/usr/bin/env python3
 
+import collections
+import concurrent.futures
 import decimal
 import glob
+import hashlib
 import inspect
-import io
 import itertools
+import json
 import os
 import pathlib
-import pip
 import platform
+import re
 import shlex
 import shutil
 import stat
 import subprocess
 import sys
-import textwrap
+import tempfile
+import threading
 import time
 import zipfile
 
-import requests
-
 
 class Results:
     def __init__(self, console_scripts):
@@ -56,9 +58,21 @@ def consume(iter):
 
 fspath = getattr(os, 'fspath', str)
 
+output_lock = threading.Lock()
+
+
+def report_output(text):
+    """Print from a build step without interleaving with other steps."""
+    with output_lock:
+        print(text)
+        sys.stdout.flush()
+
 
 def download(*args, **kwargs):
-    print('Downloading: {} {}'.format(args, kwargs))
+    # Imported here so that loading cached results from setup.py stays fast
+    import requests
+
+    report_output('Downloading: {} {}'.format(args, kwargs))
 
     hold_off = 30
 
@@ -68,10 +82,10 @@ def download(*args, **kwargs):
             result.raise_for_status()
         except requests.HTTPError:
             if remaining_tries > 0:
-                print('waiting {} seconds'.format(hold_off))
+                report_output('waiting {} seconds'.format(hold_off))
                 time.sleep(hold_off)
                 hold_off *= 2
-                print('Retrying: {} {}'.format(args, kwargs))
+                report_output('Retrying: {} {}'.format(args, kwargs))
 
                 continue
 
@@ -80,6 +94,101 @@ def download(*args, **kwargs):
         return result
 
 
+def download_to(url, path):
+    """
+    Download ``url`` to ``path`` in chunks rather than holding it in memory.
+    An existing complete download is reused.
+    """
+    if os.path.exists(path):
+        report_output('Using existing download: {}'.format(path))
+        return path
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = path + '.part'
+
+    response = download(url, stream=True)
+    try:
+        with open(partial, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=1024 * 1024):
+                f.write(chunk)
+    finally:
+        response.close()
+
+    os.replace(partial, path)
+
+    return path
+
+
+def archive_members(z, exclude=(), root=None):
+    """
+    Yield ``(info, relative_target)`` for the archive members to extract.
+    Members under the top level ``exclude`` directories are skipped and the
+    archive's top level directory is renamed to ``root`` if given.
+    """
+    exclude = {name.strip('/') for name in exclude}
+
+    for info in z.infolist():
+        parts = [part for part in info.filename.split('/') if part != '']
+        if len(parts) == 0:
+            continue
+
+        if any(part == '..' for part in parts) or os.path.isabs(info.filename):
+            raise Exception('Unsafe archive member: {}'.format(info.filename))
+
+        if len(parts) > 1 and parts[1] in exclude:
+            continue
+
+        if root is not None:
+            parts[0] = root
+
+        yield info, os.path.join(*parts)
+
+
+def extract_archive(path, destination, exclude=(), root=None, jobs=None):
+    """
+    Extract the archive at ``path`` into ``destination`` with the members
+    spread across ``jobs`` threads, each reading through its own handle.
+    """
+    if jobs is None:
+        jobs = default_jobs()
+
+    with zipfile.ZipFile(path) as z:
+        members = list(archive_members(z, exclude=exclude, root=root))
+
+    files = []
+    for info, target in members:
+        target = os.path.join(destination, target)
+        if info.filename.endswith('/'):
+            os.makedirs(target, exist_ok=True)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            files.append((info, target))
+
+    # Balance the compressed bytes handed to each worker
+    groups = [[] for _ in range(max(1, min(jobs, len(files))))]
+    sizes = [0] * len(groups)
+    for info, target in sorted(files, key=lambda m: m[0].compress_size, reverse=True):
+        smallest = sizes.index(min(sizes))
+        groups[smallest].append((info, target))
+        sizes[smallest] += info.compress_size
+
+    def extract_group(group):
+        with zipfile.ZipFile(path) as z:
+            for info, target in group:
+                with z.open(info) as source, open(target, 'wb') as f:
+                    shutil.copyfileobj(source, f, 1024 * 1024)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(groups)) as executor:
+        for future in [executor.submit(extract_group, group) for group in groups]:
+            future.result()
+
+    report_output('Extracted {} files from {} to {}'.format(
+        len(files),
+        path,
+        destination,
+    ))
+
+
 def get_environment_from_batch_command(env_cmd, initial=None):
     """
     Take a command (either a single command or list of arguments)
@@ -99,7 +208,7 @@ def get_environment_from_batch_command(env_cmd, initial=None):
     # construct a cmd.exe command to do accomplish this
     cmd = 'cmd.exe /s /c "{env_cmd} && echo "{tag}" && set"'.format(**vars())
     # launch the process
-    proc = subprocess.run(cmd, stdout=subprocess.PIPE, env=initial, check=True)
+    proc = run_measured(cmd, stdout=subprocess.PIPE, env=initial)
     # parse the output sent to stdout
     lines = proc.stdout.decode().splitlines()
     # consume whatever output occurs until the tag is reached
@@ -115,24 +224,111 @@ def get_environment_from_batch_command(env_cmd, initial=None):
     return result
 
 
+def get_environment_from_posix_script(script, args=(), initial=None):
+    """
+    Source a POSIX shell script with bash and return the resulting
+    environment.  The script's own output is sent to stderr.
+    """
+    proc = run_measured(
+        [
+            'bash',
+            '-c',
+            'source "$0" "$@" 1>&2 && env -0',
+            script,
+            *args
+        ],
+        stdout=subprocess.PIPE,
+        env=initial,
+    )
+
+    return dict(
+        entry.split('=', 1)
+        for entry in proc.stdout.decode().split('\0')
+        if '=' in entry
+    )
+
+
+def capture_environment(script, args=(), initial=None, cache_directory=None):
+    """
+    Return the environment created by running ``script`` with ``args``.
+    Batch files are run through ``cmd.exe`` and anything else is sourced
+    by bash.  With ``cache_directory`` the result is reused until the
+    script path, arguments, script modification time or initial
+    environment change.
+    """
+    args = list(args)
+    if os.path.splitext(script)[1].lower() in ('.bat', '.cmd'):
+        kind = 'batch'
+    else:
+        kind = 'posix'
+
+    cache_path = None
+    if cache_directory is not None:
+        key = hashlib.sha256(json.dumps(
+            {
+                'kind': kind,
+                'script': os.path.abspath(script),
+                'args': args,
+                'mtime': os.stat(script).st_mtime_ns,
+                'initial': sorted((initial or {}).items()),
+            },
+            sort_keys=True,
+        ).encode('utf-8')).hexdigest()
+        cache_path = os.path.join(cache_directory, key + '.json')
+
+        try:
+            with open(cache_path) as f:
+                environment = json.load(f)
+        except (OSError, ValueError):
+            pass
+        else:
+            print('Using cached environment from {}'.format(cache_path))
+            return environment
+
+    if kind == 'batch':
+        environment = get_environment_from_batch_command(
+            [script, *args],
+            initial=initial,
+        )
+    else:
+        environment = get_environment_from_posix_script(
+            script=script,
+            args=args,
+            initial=initial,
+        )
+
+    if cache_path is not None:
+        os.makedirs(cache_directory, exist_ok=True)
+        # mkstemp() creates the file readable only by the current user
+        descriptor, temporary = tempfile.mkstemp(dir=cache_directory)
+        with os.fdopen(descriptor, 'w') as f:
+            json.dump(environment, f)
+        os.replace(temporary, cache_path)
+
+    return environment
+
+
 # TODO: CAMPid 079079043724533410718467080456813604134316946765431341384014
 def report_and_check_call(command, *args, cwd=None, shell=False, **kwargs):
-    print('\nCalling:')
-    print('    Caller: {}'.format(callers_line_info()))
-    print('    CWD: {}'.format(repr(cwd)))
-    print('    As passed: {}'.format(repr(command)))
-    print('    Full: {}'.format(
-        ' '.join(shlex.quote(fspath(x)) for x in command),
-    ))
+    lines = [
+        '\nCalling:',
+        '    Caller: {}'.format(callers_line_info()),
+        '    CWD: {}'.format(repr(cwd)),
+        '    As passed: {}'.format(repr(command)),
+        '    Full: {}'.format(
+            ' '.join(shlex.quote(fspath(x)) for x in command),
+        ),
+    ]
 
     if shell:
-        print('    {}'.format(repr(command)))
+        lines.append('    {}'.format(repr(command)))
     else:
         for arg in command:
-            print('    {}'.format(repr(arg)))
+            lines.append('    {}'.format(repr(arg)))
 
-    sys.stdout.flush()
-    return subprocess.run(command, *args, cwd=cwd, check=True, **kwargs)
+    report_output('\n'.join(lines))
+
+    return run_measured(command, *args, cwd=cwd, **kwargs)
 
 
 # TODO: CAMPid 974597249731467124675t40136706803641679349342342
@@ -145,22 +341,959 @@ def callers_line_info():
         return None
 
     there = caller.f_back
-    info = inspect.getframeinfo(there)
 
+    # Read the frame directly, inspect.getframeinfo() loads source lines
     return 'File "{}", line {}, in {}'.format(
-        info.filename,
-        info.lineno,
-        info.function,
+        there.f_code.co_filename,
+        there.f_lineno,
+        there.f_code.co_name,
+    )
+
+
+class BuildMetrics:
+    """
+    Wall time, CPU time and peak memory for build steps and the child
+    processes they run.  Child processes are attributed to the step running
+    in the same thread.
+
+    Steps share the build process so only its peak over the whole build is
+    known, recorded as ``process_peak_rss`` when each step ends.  The peak
+    memory of a step is that of its child processes.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.steps = []
+        self.processes = []
+        self.started = time.time()
+
+    def current_step(self):
+        if getattr(step_context, 'metrics', None) is not self:
+            return None
+
+        return step_context.step
+
+    def run_step(self, step):
+        step_context.metrics = self
+        step_context.step = step.name
+        start = time.perf_counter()
+        start_cpu = thread_time()
+        try:
+            return step()
+        finally:
+            step_context.metrics = None
+            step_context.step = None
+            record = collections.OrderedDict((
+                ('name', step.name),
+                ('wall', time.perf_counter() - start),
+                ('cpu', thread_time() - start_cpu),
+                ('process_peak_rss', own_peak_rss()),
+            ))
+            with self.lock:
+                self.steps.append(record)
+
+    def record_process(self, command, wall, cpu, peak_rss):
+        record = collections.OrderedDict((
+            ('step', self.current_step()),
+            ('command', [fspath(arg) for arg in command]),
+            ('wall', wall),
+            ('cpu', cpu),
+            ('peak_rss', peak_rss),
+        ))
+        with self.lock:
+            self.processes.append(record)
+
+    def as_dict(self):
+        with self.lock:
+            return collections.OrderedDict((
+                ('started', self.started),
+                ('wall', time.time() - self.started),
+                ('steps', list(self.steps)),
+                ('processes', list(self.processes)),
+            ))
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.as_dict(), f, indent=4)
+            f.write('\n')
+
+    def summary(self):
+        def format_rss(value):
+            if value is None:
+                return '-'
+            return '{:.1f}'.format(value / 2**20)
+
+        with self.lock:
+            step_processes = collections.defaultdict(list)
+            for process in self.processes:
+                step_processes[process['step']].append(process)
+
+            rows = [
+                (
+                    step['name'],
+                    '{:.1f}'.format(step['wall']),
+                    '{:.1f}'.format(step['cpu'] + sum(
+                        process['cpu'] or 0
+                        for process in step_processes[step['name']]
+                    )),
+                    format_rss(max(
+                        (
+                            process['peak_rss']
+                            for process in step_processes[step['name']]
+                            if process['peak_rss'] is not None
+                        ),
+                        default=None,
+                    )),
+                )
+                for step in sorted(
+                    self.steps,
+                    key=lambda step: step['wall'],
+                    reverse=True,
+                )
+            ]
+
+        header = ('Step', 'Wall [s]', 'CPU [s]', 'Child peak RSS [MiB]')
+        widths = [
+            max(len(row[column]) for row in (header, *rows))
+            for column in range(len(header))
+        ]
+
+        lines = [
+            '  '.join(
+                cell.ljust(width) if column == 0 else cell.rjust(width)
+                for column, (cell, width) in enumerate(zip(row, widths))
+            )
+            for row in (header, *rows)
+        ]
+        lines.insert(1, '  '.join('-' * width for width in widths))
+        lines.append('Build process peak RSS [MiB]: {}'.format(
+            format_rss(own_peak_rss()),
+        ))
+
+        return '\n'.join(lines)
+
+
+step_context = threading.local()
+
+thread_time = getattr(time, 'thread_time', time.process_time)
+
+
+def exit_code_from_status(status):
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+
+    return os.WEXITSTATUS(status)
+
+
+def rusage_peak_rss(usage):
+    # ru_maxrss is in kilobytes on Linux but bytes on macOS
+    if sys.platform == 'darwin':
+        return usage.ru_maxrss
+
+    return usage.ru_maxrss * 1024
+
+
+def windows_process_usage(handle):
+    import ctypes
+    import ctypes.wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [
+            ('cb', ctypes.wintypes.DWORD),
+            ('PageFaultCount', ctypes.wintypes.DWORD),
+            ('PeakWorkingSetSize', ctypes.c_size_t),
+            ('WorkingSetSize', ctypes.c_size_t),
+            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+            ('PagefileUsage', ctypes.c_size_t),
+            ('PeakPagefileUsage', ctypes.c_size_t),
+        ]
+
+    kernel32 = ctypes.windll.kernel32
+    kernel32.GetProcessTimes.argtypes = [
+        ctypes.wintypes.HANDLE,
+        *[ctypes.POINTER(ctypes.wintypes.FILETIME)] * 4
+    ]
+    psapi = ctypes.windll.psapi
+    psapi.GetProcessMemoryInfo.argtypes = [
+        ctypes.wintypes.HANDLE,
+        ctypes.POINTER(ProcessMemoryCounters),
+        ctypes.wintypes.DWORD,
+    ]
+
+    times = [ctypes.wintypes.FILETIME() for _ in range(4)]
+    cpu = None
+    if kernel32.GetProcessTimes(handle, *(ctypes.byref(t) for t in times)):
+        # kernel and user times in 100 ns units
+        cpu = sum(
+            (t.dwHighDateTime << 32 | t.dwLowDateTime) / 1e7
+            for t in times[2:]
+        )
+
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    peak_rss = None
+    if psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+        peak_rss = counters.PeakWorkingSetSize
+
+    return cpu, peak_rss
+
+
+def own_peak_rss():
+    if sys.platform == 'win32':
+        import ctypes
+        import ctypes.wintypes
+
+        kernel32 = ctypes.windll.kernel32
+        kernel32.GetCurrentProcess.restype = ctypes.wintypes.HANDLE
+        _, peak_rss = windows_process_usage(kernel32.GetCurrentProcess())
+
+        return peak_rss
+
+    import resource
+
+    return rusage_peak_rss(resource.getrusage(resource.RUSAGE_SELF))
+
+
+def wait_with_usage(process):
+    """
+    Wait for the process and return its CPU time in seconds and peak
+    resident memory in bytes, either may be None where unavailable.
+    """
+    if sys.platform == 'win32':
+        process.wait()
+        return windows_process_usage(int(process._handle))
+
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = exit_code_from_status(status)
+
+    return usage.ru_utime + usage.ru_stime, rusage_peak_rss(usage)
+
+
+def run_measured(command, *args, check=True, metrics=None, **kwargs):
+    """
+    A :func:`subprocess.run` work-alike that records the child's wall time,
+    CPU time and peak memory.  Only ``stdout`` may be captured.
+    """
+    if metrics is None:
+        metrics = getattr(step_context, 'metrics', None) or build_metrics
+
+    start = time.perf_counter()
+    with subprocess.Popen(command, *args, **kwargs) as process:
+        stdout = None
+        if process.stdout is not None:
+            stdout = process.stdout.read()
+        cpu, peak_rss = wait_with_usage(process)
+
+    metrics.record_process(
+        command=command if isinstance(command, (list, tuple)) else [command],
+        wall=time.perf_counter() - start,
+        cpu=cpu,
+        peak_rss=peak_rss,
     )
 
+    if check and process.returncode != 0:
+        raise subprocess.CalledProcessError(
+            process.returncode,
+            command,
+            output=stdout,
+        )
+
+    return subprocess.CompletedProcess(
+        args=command,
+        returncode=process.returncode,
+        stdout=stdout,
+    )
+
+
+build_metrics = BuildMetrics()
+
+
+class StagedFile:
+    def __init__(self, source, target, mode=None):
+        self.source = source
+        self.target = target
+        self.mode = mode
+
+
+def tree_manifest(source, target, ignore=None):
+    """
+    List a :class:`StagedFile` for each file under ``source``, honoring an
+    ``ignore`` callable as accepted by :func:`shutil.copytree`.
+    """
+    manifest = []
+
+    for root, directories, files in os.walk(source):
+        if ignore is not None:
+            ignored = ignore(root, directories + files)
+            directories[:] = [d for d in directories if d not in ignored]
+            files = [f for f in files if f not in ignored]
+
+        relative = os.path.relpath(root, source)
+        for name in files:
+            manifest.append(StagedFile(
+                source=os.path.join(root, name),
+                target=os.path.normpath(os.path.join(target, relative, name)),
+            ))
+
+    return manifest
+
+
+class StagingReport:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.methods = collections.Counter()
+        self.bytes_moved = 0
+        # Cloned files share their blocks, only metadata is written
+        self.bytes_cloned = 0
+
+    def add(self, method, size):
+        with self.lock:
+            self.methods[method] += 1
+            if method == 'copied':
+                self.bytes_moved += size
+            elif method == 'cloned':
+                self.bytes_cloned += size
+
+    def __str__(self):
+        return 'Staged {} files ({}), {} bytes moved, {} bytes cloned'.format(
+            sum(self.methods.values()),
+            ', '.join(
+                '{} {}'.format(count, method)
+                for method, count in sorted(self.methods.items())
+            ) or 'nothing to do',
+            self.bytes_moved,
+            self.bytes_cloned,
+        )
+
+
+def same_contents(source, target):
+    try:
+        if os.path.samefile(source, target):
+            return True
+        if os.path.getsize(source) != os.path.getsize(target):
+            return False
+
+        return file_digest(source) == file_digest(target)
+    except OSError:
+        return False
+
+
+# linux/fs.h FICLONE
+ficlone = 0x40049409
+
+
+def clone_file(source, target):
+    """
+    Copy-on-write clone ``source`` to ``target`` where the filesystem
+    supports it, falling back to ``copy_file_range`` and then a plain copy.
+    Returns the method used.
+    """
+    with open(source, 'rb') as s, open(target, 'wb') as t:
+        if sys.platform.startswith('linux'):
+            import fcntl
+
+            try:
+                fcntl.ioctl(t.fileno(), ficlone, s.fileno())
+                return 'cloned'
+            except OSError:
+                pass
+
+        copy_file_range = getattr(os, 'copy_file_range', None)
+        if copy_file_range is not None:
+            try:
+                while copy_file_range(s.fileno(), t.fileno(), 2**30) > 0:
+                    pass
+                return 'copied'
+            except OSError:
+                s.seek(0)
+                t.seek(0)
+                t.truncate()
+
+        shutil.copyfileobj(s, t, 1024 * 1024)
+
+    return 'copied'
+
+
+def stage_file(staged, link):
+    size = os.path.getsize(staged.source)
+
+    if os.path.exists(staged.target) and same_contents(staged.source, staged.target):
+        method = 'skipped'
+    else:
+        os.makedirs(os.path.dirname(staged.target), exist_ok=True)
+        method = None
+
+        if link and staged.mode is None:
+            temporary = staged.target + '.staging'
+            try:
+                os.link(staged.source, temporary)
+                os.replace(temporary, staged.target)
+                method = 'linked'
+            except OSError:
+                pass
+
+        if method is None:
+            if os.path.lexists(staged.target):
+                # Never write through an existing link to some other file
+                os.chmod(staged.target, stat.S_IREAD | stat.S_IWRITE)
+                os.remove(staged.target)
+            method = clone_file(staged.source, staged.target)
+            shutil.copymode(staged.source, staged.target)
+
+    if staged.mode is not None:
+        os.chmod(staged.target, staged.mode)
 
-def preferred_newlines(f):
-    if isinstance(f.newlines, str):
-        return f.newlines
-    return '\n'
+    return method, size
+
+
+def stage(manifest, link=False, jobs=None):
+    """
+    Copy the files in ``manifest`` concurrently.  Targets whose size and
+    digest already match are left alone.  With ``link`` files without an
+    explicit mode are hardlinked when possible.
+    """
+    if jobs is None:
+        jobs = default_jobs()
+
+    report = StagingReport()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(stage_file, staged=staged, link=link)
+            for staged in manifest
+        ]
+        for future in futures:
+            report.add(*future.result())
+
+    report_output(str(report))
+
+    return report
+
+
+class DeploymentConflict(Exception):
+    pass
+
+
+class DeployedFile:
+    def __init__(self, source, target):
+        self.source = source
+        self.target = target
+        self.required_by = []
+
+
+class DeploymentPlan:
+    def __init__(self):
+        self.applications = []
+        self.files = collections.OrderedDict()
+        self.listed = 0
+
+    def add(self, application, source, target):
+        self.listed += 1
+        target = os.path.normpath(target)
+        key = os.path.normcase(target)
+
+        deployed = self.files.get(key)
+        if deployed is None:
+            deployed = DeployedFile(source=source, target=target)
+            self.files[key] = deployed
+        elif os.path.normcase(deployed.source) != os.path.normcase(source):
+            raise DeploymentConflict(
+                '{} wants {} from {} but {} already provides it from {}'.format(
+                    application,
+                    target,
+                    source,
+                    ', '.join(deployed.required_by),
+                    deployed.source,
+                ),
+            )
+
+        if application not in deployed.required_by:
+            deployed.required_by.append(application)
+
+    def manifest(self):
+        return {
+            'applications': list(self.applications),
+            'files': [
+                {
+                    'target': deployed.target,
+                    'source': deployed.source,
+                    'required_by': deployed.required_by,
+                }
+                for deployed in sorted(
+                    self.files.values(),
+                    key=lambda deployed: deployed.target,
+                )
+            ],
+        }
+
+
+windeployqt_mapping_pattern = re.compile(r'^\s*"([^"]+)"\s+"([^"]+)"\s*$')
+
+
+def parse_windeployqt_mapping(output, destination):
+    """
+    Parse the output of ``windeployqt --dry-run --list mapping`` into
+    ``(source, target)`` pairs with targets relative to ``destination``.
+    """
+    for line in output.splitlines():
+        match = windeployqt_mapping_pattern.match(line)
+        if match is None:
+            continue
+
+        source, target = match.groups()
+        if os.path.isabs(target):
+            target = os.path.relpath(target, destination)
+
+        yield source, target
+
+
+def plan_deployment(listings, destination):
+    """
+    Combine the per-application dry run listings into a single plan where
+    each file is deployed once.  ``listings`` maps application names to
+    ``(application_path, mapping_output)`` pairs.
+    """
+    plan = DeploymentPlan()
+
+    for name, (application_path, output) in listings.items():
+        plan.applications.append(name)
+        plan.add(
+            application=name,
+            source=application_path,
+            target=os.path.basename(application_path),
+        )
+
+        for source, target in parse_windeployqt_mapping(
+                output=output,
+                destination=destination,
+        ):
+            plan.add(application=name, source=source, target=target)
+
+    return plan
+
+
+def deploy(plan, destination, manifest_path, link=False):
+    report_output(
+        '\nDeploying {} files for {} applications ({} listed)'.format(
+            len(plan.files),
+            len(plan.applications),
+            plan.listed,
+        ),
+    )
+
+    report = stage(
+        manifest=[
+            StagedFile(
+                source=deployed.source,
+                target=os.path.join(destination, deployed.target),
+            )
+            for deployed in plan.files.values()
+        ],
+        link=link,
+    )
+
+    with open(manifest_path, 'w') as f:
+        json.dump(plan.manifest(), f, indent=4, sort_keys=True)
+        f.write('\n')
+
+    return report
+
+
+class StepGraphError(Exception):
+    pass
+
+
+class Step:
+    """
+    A unit of build work.  Either ``function`` is called with no arguments
+    or ``command`` is run via :func:`report_and_check_call` in ``cwd`` with
+    ``env``.  ``inputs`` and ``outputs`` are arbitrary labels, a step runs
+    only after every step producing one of its inputs has completed.
+    """
+    def __init__(self, name, function=None, command=None, cwd=None, env=None,
+                 inputs=(), outputs=()):
+        if (function is None) == (command is None):
+            raise StepGraphError(
+                'Step {} needs exactly one of function or command'.format(name),
+            )
+
+        self.name = name
+        self.function = function
+        self.command = command
+        self.cwd = cwd
+        self.env = env
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+
+    def __call__(self):
+        if self.function is not None:
+            return self.function()
+
+        return report_and_check_call(
+            command=self.command,
+            cwd=self.cwd,
+            env=self.env,
+        )
+
+
+def step_dependencies(steps):
+    producers = {}
+    for step in steps:
+        for output in step.outputs:
+            if output in producers:
+                raise StepGraphError(
+                    '{} is produced by both {} and {}'.format(
+                        output,
+                        producers[output].name,
+                        step.name,
+                    ),
+                )
+            producers[output] = step
+
+    dependencies = collections.OrderedDict()
+    for step in steps:
+        dependencies[step] = {
+            producers[input]
+            for input in step.inputs
+            if input in producers and producers[input] is not step
+        }
 
+    remaining = {step: set(after) for step, after in dependencies.items()}
+    while len(remaining) > 0:
+        ready = [step for step, after in remaining.items() if len(after) == 0]
+        if len(ready) == 0:
+            raise StepGraphError('Dependency cycle among: {}'.format(
+                ', '.join(step.name for step in remaining),
+            ))
+
+        for step in ready:
+            del remaining[step]
+        for after in remaining.values():
+            after.difference_update(ready)
+
+    return dependencies
+
+
+def default_jobs():
+    jobs = os.environ.get('PYQT5_TOOLS_BUILD_JOBS')
+    if jobs is not None:
+        try:
+            jobs = int(jobs)
+        except ValueError:
+            jobs = None
+
+        if jobs is None or jobs < 1:
+            raise ValueError(
+                'PYQT5_TOOLS_BUILD_JOBS must be a whole number of at least 1,'
+                ' got {!r}'.format(os.environ['PYQT5_TOOLS_BUILD_JOBS']),
+            )
+
+        return jobs
+
+    return os.cpu_count() or 1
+
+
+def run_steps(steps, jobs=None, metrics=None):
+    """
+    Run the steps with up to ``jobs`` of them at once, respecting the
+    dependencies implied by their inputs and outputs.  After a failure no
+    further steps are started and the first exception is raised once the
+    running steps finish.
+    """
+    if jobs is None:
+        jobs = default_jobs()
+
+    if metrics is None:
+        metrics = build_metrics
+
+    dependencies = step_dependencies(steps)
+    pending = collections.OrderedDict(
+        (step, set(after)) for step, after in dependencies.items()
+    )
+    running = {}
+    failures = []
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        while len(pending) > 0 or len(running) > 0:
+            if len(failures) == 0:
+                ready = [
+                    step
+                    for step, after in pending.items()
+                    if len(after) == 0
+                ]
+                for step in ready[:jobs - len(running)]:
+                    del pending[step]
+                    report_output('\nStarting step: {}'.format(step.name))
+                    running[executor.submit(metrics.run_step, step)] = step
+
+            if len(running) == 0:
+                break
+
+            done, _ = concurrent.futures.wait(
+                running,
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+
+            for future in done:
+                step = running.pop(future)
+                error = future.exception()
+                if error is not None:
+                    report_output('\nFailed step: {}'.format(step.name))
+                    failures.append(error)
+                    continue
+
+                for after in pending.values():
+                    after.discard(step)
+
+    if len(failures) > 0:
+        raise failures[0]
+
+
+# Bump when a change to the build alters the cached artifacts.
+artifact_cache_version = 1
+
+
+def file_digest(path):
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            hasher.update(chunk)
+
+    return hasher.hexdigest()
+
+
+def default_cache_root(build):
+    return os.environ.get(
+        'PYQT5_TOOLS_BUILD_CACHE',
+        os.path.join(build, 'build-cache'),
+    )
+
+
+class ArtifactCache:
+    """
+    Directory trees stored under a digest of the inputs that produced them.
+    Entries are written to a temporary directory and renamed into place so
+    an interrupted store never looks like a hit.
+    """
+    def __init__(self, root):
+        self.root = root
+
+    def key(self, **inputs):
+        inputs['cache_version'] = artifact_cache_version
+        serialized = json.dumps(inputs, sort_keys=True).encode('utf-8')
+
+        return hashlib.sha256(serialized).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.root, key)
+
+    def contains(self, key):
+        return os.path.isdir(self.path(key))
+
+    def restore(self, key, destination):
+        entry = self.path(key)
+        report_output('Restoring cached artifacts {} to {}'.format(
+            entry,
+            destination,
+        ))
+
+        for root, directories, files in os.walk(entry):
+            target = os.path.join(destination, os.path.relpath(root, entry))
+            os.makedirs(target, exist_ok=True)
+            for name in files:
+                shutil.copy2(os.path.join(root, name), target)
+
+    def store(self, key, sources):
+        """
+        Store the files and directories in ``sources``, a mapping of names
+        within the entry to paths.
+        """
+        entry = self.path(key)
+        if os.path.isdir(entry):
+            return
+
+        os.makedirs(self.root, exist_ok=True)
+        temporary = tempfile.mkdtemp(dir=self.root, prefix=key + '-')
+        try:
+            for name, source in sources.items():
+                target = os.path.join(temporary, name)
+                if os.path.isdir(source):
+                    shutil.copytree(source, target)
+                else:
+                    shutil.copy2(source, target)
+
+            os.rename(temporary, entry)
+        except OSError:
+            shutil.rmtree(temporary, ignore_errors=True)
+            if not os.path.isdir(entry):
+                raise
+
+        report_output('Stored artifacts in cache {}'.format(entry))
+
+
+def qt_version(qt_compiler_path):
+    """
+    The version of the Qt installation as recorded in its ``qconfig.pri``,
+    None when that can't be read.
+    """
+    try:
+        with open(os.path.join(qt_compiler_path, 'mkspecs', 'qconfig.pri')) as f:
+            for line in f:
+                name, _, value = line.partition('=')
+                if name.strip() == 'QT_VERSION':
+                    return value.strip()
+    except OSError:
+        pass
+
+    return None
+
+
+def write_tool_registry(path, names):
+    """
+    Record the bundled Qt tools for :data:`pyqt5_tools.entrypoints.tools`
+    to dispatch to, paths are relative to the package.
+    """
+    with open(path, 'w') as f:
+        json.dump(
+            {
+                'tools': {
+                    name: 'Qt/bin/{}.exe'.format(name)
+                    for name in names
+                },
+            },
+            f,
+            indent=4,
+            sort_keys=True,
+        )
+        f.write('\n')
+
+
+def wheel_tags():
+    """
+    The ``(python_tag, plat_name)`` of wheels holding the built binaries, for
+    ``bdist_wheel`` to use in place of ``py3`` and ``any``.
+    """
+    bits = int(platform.architecture()[0][0:2])
+    plat_names = {
+        32: 'win32',
+        64: 'win_amd64'
+    }
+    try:
+        plat_name = plat_names[bits]
+    except KeyError:
+        raise Exception('Bit depth {} not recognized {}'.format(
+            bits,
+            plat_names.keys(),
+        ))
+
+    python_tag = 'cp{major}{minor}'.format(
+        major=sys.version_info[0],
+        minor=sys.version_info[1],
+    )
+
+    return python_tag, plat_name
+
+
+def results_key(build):
+    """
+    Digest of everything that determines the build's results, cheap enough
+    to compute on every ``setup.py`` invocation.
+    """
+    bits = int(platform.architecture()[0][0:2])
+
+    return hashlib.sha256(json.dumps(
+        {
+            'python': list(sys.version_info[:2]),
+            'bits': bits,
+            'environment': {
+                name: os.environ.get(name)
+                for name in (
+                    'PYQT5_VERSION',
+                    'QT_BASE_PATH',
+                    'APPVEYOR_BUILD_ID',
+                    'APPVEYOR_JOB_ID',
+                )
+            },
+            'sources': {
+                name: file_digest(os.path.join(build, name))
+                for name in (
+                    'build.py',
+                    'pluginloader.patch',
+                    'pluginloader.5.11.patch',
+                )
+            },
+        },
+        sort_keys=True,
+    ).encode('utf-8')).hexdigest()
+
+
+def results_path(build):
+    return os.path.join(default_cache_root(build), 'results.json')
+
+
+def load_cached_results(build):
+    """
+    Return the :class:`Results` of a previous build with the same inputs
+    whose staged package is still present, otherwise None.
+    """
+    if not os.path.isdir(os.path.join(build, 'src', 'pyqt5_tools', 'Qt', 'bin')):
+        return None
+
+    try:
+        with open(results_path(build)) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if cached.get('key') != results_key(build):
+        return None
+
+    return Results(console_scripts=cached['console_scripts'])
+
+
+def save_results(build, results, key):
+    path = results_path(build)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with open(path, 'w') as f:
+        json.dump(
+            {
+                'key': key,
+                'console_scripts': results.console_scripts,
+            },
+            f,
+            indent=4,
+        )
+        f.write('\n')
+
+
+def default_build():
+    return os.environ.get('APPVEYOR_BUILD_FOLDER', os.getcwd())
+
+
+def build_if_needed(build=None):
+    if build is None:
+        build = default_build()
+
+    results = load_cached_results(build)
+    if results is not None:
+        print('Inputs unchanged, reusing the previous build')
+        return results
+
+    key = results_key(build)
+    # Built in the same tree the cached results are checked against
+    results = main(build=build)
+    save_results(build=build, results=results, key=key)
+
+    return results
+
+
+def main(build=None):
+    if build is None:
+        build = default_build()
 
-def main():
     bits = int(platform.architecture()[0][0:2])
     python_major_minor = '{}{}'.format(
         sys.version_info.major,
@@ -206,12 +1339,14 @@ def main():
         vcvarsall = os.path.join(vcvarsall, 'Auxiliary', 'Build')
     vcvarsall = os.path.join(vcvarsall, 'vcvarsall.bat')
 
-    os.environ = get_environment_from_batch_command(
-        [
-            vcvarsall,
-            {32: 'x86', 64: 'x64'}[bits]
-        ],
-        initial=os.environ
+    os.environ = capture_environment(
+        script=vcvarsall,
+        args=[{32: 'x86', 64: 'x64'}[bits]],
+        initial=dict(os.environ),
+        cache_directory=os.environ.get(
+            'PYQT5_TOOLS_ENVIRONMENT_CACHE',
+            os.path.join(build, 'environment-cache'),
+        ),
     )
     os.environ['VCINSTALLDIR'] = vs_path
     print('  ---- os.environ:')
@@ -228,116 +1363,121 @@ def main():
     qt_bin_path = os.path.join(qt_compiler_path, 'bin')
     os.environ['PATH'] = os.pathsep.join((os.environ['PATH'], qt_bin_path))
 
-    with open('setup.cfg', 'w') as cfg:
-        plat_names = {
-            32: 'win32',
-            64: 'win_amd64'
-        }
-        try:
-            plat_name = plat_names[bits]
-        except KeyError:
-            raise Exception('Bit depth {bits} not recognized {}'.format(plat_names.keys()))
-
-        python_tag = 'cp{major}{minor}'.format(
-            major=sys.version_info[0],
-            minor=sys.version_info[1],
-        )
-
-        cfg.write(
-'''[bdist_wheel]
-python-tag = {python_tag}
-plat-name = {plat_name}'''.format(**locals()))
-
-    build = os.environ.get('APPVEYOR_BUILD_FOLDER', os.getcwd())
+    python_tag, plat_name = wheel_tags()
 
     destination = os.path.join(build, 'src', 'pyqt5_tools')
     os.makedirs(destination, exist_ok=True)
     examples_destination = os.path.join(destination, 'examples')
 
-    build_id = os.environ.get('APPVEYOR_BUILD_ID', 'local')
-    with open(os.path.join(destination, 'build_id'), 'w') as f:
-        f.write(build_id + '\n')
+    def write_build_id():
+        build_id = os.environ.get('APPVEYOR_BUILD_ID', 'local')
+        with open(os.path.join(destination, 'build_id'), 'w') as f:
+            f.write(build_id + '\n')
 
-    job_id = os.environ.get('APPVEYOR_JOB_ID', 'local')
-    with open(os.path.join(destination, 'job_id'), 'w') as f:
-        f.write(job_id + '\n')
+    def write_job_id():
+        job_id = os.environ.get('APPVEYOR_JOB_ID', 'local')
+        with open(os.path.join(destination, 'job_id'), 'w') as f:
+            f.write(job_id + '\n')
 
     windeployqt_path = os.path.join(qt_bin_path, 'windeployqt.exe')
 
     application_paths = glob.glob(os.path.join(qt_bin_path, '*.exe'))
 
-    application_names = []
-
     destination_qt = os.path.join(destination, 'Qt')
     destination_qt_bin = os.path.join(destination_qt, 'bin')
     os.makedirs(destination_qt_bin, exist_ok=True)
 
-    for application in application_paths:
-        application_path = os.path.join(qt_bin_path, application)
-
-        print('\n\nChecking: {}'.format(os.path.basename(application)))
-        try:
-            output = subprocess.check_output(
-                [
-                    windeployqt_path,
-                    application_path,
-                    '--dry-run',
-                    '--list', 'source',
-                ],
-                cwd=destination,
-            )
-        except subprocess.CalledProcessError:
-            continue
+    # Hardlinking Qt's files into the package saves copying them but ties
+    # the staged files to the Qt installation, so it is opt-in.
+    stage_links = os.environ.get('PYQT5_TOOLS_STAGE_LINKS', '') == '1'
+
+    console_scripts = []
+
+    def deploy_tools():
+        listings = collections.OrderedDict()
+
+        for application in application_paths:
+            application_path = os.path.join(qt_bin_path, application)
+
+            try:
+                output = run_measured(
+                    [
+                        windeployqt_path,
+                        application_path,
+                        '--dry-run',
+                        '--force',
+                        '--dir', destination_qt_bin,
+                        '--list', 'mapping',
+                    ],
+                    cwd=destination,
+                    stdout=subprocess.PIPE,
+                ).stdout
+            except subprocess.CalledProcessError:
+                report_output('\n\nChecking: {}\n    failed'.format(
+                    os.path.basename(application),
+                ))
+                continue
 
-        if b'WebEngine' in output:
-            print('    skipped')
-            continue
+            if b'WebEngine' in output:
+                report_output('\n\nChecking: {}\n    skipped'.format(
+                    os.path.basename(application),
+                ))
+                continue
 
-        shutil.copy(application_path, destination_qt_bin)
+            listings[pathlib.Path(application).stem] = (
+                application_path,
+                output.decode(),
+            )
 
-        report_and_check_call(
-            command=[
-                windeployqt_path,
-                os.path.basename(application),
-            ],
-            cwd=destination_qt_bin,
+        deployment_plan = plan_deployment(
+            listings=listings,
+            destination=destination_qt_bin,
+        )
+        deploy(
+            plan=deployment_plan,
+            destination=destination_qt_bin,
+            manifest_path=os.path.join(destination_qt, 'deployment.json'),
+            link=stage_links,
         )
 
-        application_names.append(pathlib.Path(application).stem)
-
-    entry_points_py = pathlib.Path(destination)/'entrypoints.py'
-    with open(str(entry_points_py)) as f:
-        f.read()
-        newlines = preferred_newlines(f)
-    with open(str(entry_points_py), 'a', newline=newlines) as f:
-        for name in application_names:
-            f.write(textwrap.dedent('''\
-            def {name}():
-                load_dotenv()
-                return subprocess.call([str(here/'Qt'/'bin'/'{name}.exe'), *sys.argv[1:]])
-
+        application_names = [
+            name
+            for name in deployment_plan.applications
+            if name.isidentifier()
+        ]
 
-            '''.format(name=name)))
+        write_tool_registry(
+            path=os.path.join(destination, 'tools.json'),
+            names=application_names,
+        )
 
-    console_scripts = [
-        '{name} = pyqt5_tools.entrypoints:{name}'.format(name=name)
-        for name in application_names
-    ]
+        console_scripts.extend(
+            '{name} = pyqt5_tools.entrypoints:tools.{name}'.format(name=name)
+            for name in application_names
+        )
 
     destination_plugins = os.path.join(destination_qt_bin, 'plugins')
 
-    platform_path = os.path.join(destination_plugins, 'platforms')
-    os.makedirs(platform_path, exist_ok=True)
-    for platform_plugin in ('minimal',):
-        shutil.copy(
-            os.path.join(
-                os.environ['QT_BASE_PATH'],
-                compiler_dir,
-                'plugins',
-                'platforms',
-                'q{}.dll'.format(platform_plugin),
-            ),
-            platform_path,
+    def copy_platform_plugins():
+        platform_path = os.path.join(destination_plugins, 'platforms')
+        stage(
+            manifest=[
+                StagedFile(
+                    source=os.path.join(
+                        os.environ['QT_BASE_PATH'],
+                        compiler_dir,
+                        'plugins',
+                        'platforms',
+                        file_name,
+                    ),
+                    target=os.path.join(platform_path, file_name),
+                )
+                for file_name in (
+                    'q{}.dll'.format(platform_plugin)
+                    for platform_plugin in ('minimal', 'offscreen')
+                )
+            ],
+            link=stage_links,
         )
 
     sysroot = os.path.join(build, 'sysroot')
@@ -382,13 +1522,13 @@ plat-name = {plat_name}'''.format(**locals()))
             )
         )
 
-    r = download(sip_url)
-
-    z = zipfile.ZipFile(io.BytesIO(r.content))
-    z.extractall(path=src)
     sip = os.path.join(src, sip_name)
     native_sip = sip + '-native'
-    shutil.copytree(os.path.join(src, sip_name), native_sip)
+
+    downloads = os.path.join(build, 'downloads')
+    sip_archive = os.path.join(downloads, sip_name + '.zip')
+    source_exclude = ('doc', 'examples')
+
     os.environ['CL'] = '/I"{}\\include\\python{}"'.format(
         sysroot,
         '.'.join(python_major_minor)
@@ -400,60 +1540,10 @@ plat-name = {plat_name}'''.format(**locals()))
 
     pyqt5_version_tuple = tuple(int(x) for x in pyqt5_version.split('.'))
 
-    report_and_check_call(
-        command=[
-            sys.executable,
-            'configure.py',
-        ],
-        cwd=native_sip,
-    )
-    report_and_check_call(
-        command=[
-            nmake,
-        ],
-        cwd=native_sip,
-        env=os.environ,
-    )
-    report_and_check_call(
-        command=[
-            nmake,
-            'install',
-        ],
-        cwd=native_sip,
-        env=os.environ,
-    )
-
     sip_configure_extras = []
     if pyqt5_version_tuple >= (5, 11):
         sip_configure_extras.append('--sip-module=PyQt5.sip')
 
-    report_and_check_call(
-        command=[
-            sys.executable,
-            'configure.py',
-            '--no-tools',
-            *sip_configure_extras,
-        ],
-        cwd=sip,
-    )
-
-    report_and_check_call(
-        command=[
-            nmake,
-        ],
-        cwd=sip,
-        env=os.environ,
-    )
-
-    report_and_check_call(
-        command=[
-            nmake,
-            'install',
-        ],
-        cwd=sip,
-        env=os.environ,
-    )
-
     if tuple(int(x) for x in pyqt5_version.split('.')) >= (5, 6):
         pyqt5_name = 'PyQt5_gpl-{}'.format(pyqt5_version)
     else:
@@ -464,24 +1554,39 @@ plat-name = {plat_name}'''.format(**locals()))
         '/projects/pyqt/files/PyQt5/PyQt-{}/{}.zip'
     ).format(pyqt5_version, pyqt5_name)
 
-    r = download(pyqt5_url)
-    z = zipfile.ZipFile(io.BytesIO(r.content))
-    z.extractall(path=src)
-
     pyqt5 = os.path.join(src, pyqt5_name)
+    pyqt5_archive = os.path.join(downloads, pyqt5_name + '.zip')
+
+    pyqt5_patch_steps = []
+    pluginloader_patch_name = None
 
     # TODO: make a patch for the lower versions as well
     if pyqt5_version_tuple >= (5, 7):
         if pyqt5_version_tuple >= (5, 11):
-            pluginloader_patch = '..\\..\\pluginloader.5.11.patch'
+            pluginloader_patch_name = 'pluginloader.5.11.patch'
         else:
-            pluginloader_patch = '..\\..\\pluginloader.patch'
-
-        report_and_check_call(
-            command=['patch', '-p', '1', '-i', pluginloader_patch],
-            shell=True, # TODO: don't do this
-            cwd=pyqt5,
-        )
+            pluginloader_patch_name = 'pluginloader.patch'
+        pluginloader_patch = '..\\..\\' + pluginloader_patch_name
+
+        pyqt5_patch_steps.append(Step(
+            name='patch PyQt5 plugin loader',
+            function=lambda: report_and_check_call(
+                command=['patch', '-p', '1', '-i', pluginloader_patch],
+                shell=True, # TODO: don't do this
+                cwd=pyqt5,
+            ),
+            inputs=['pyqt5 source'],
+            outputs=['pyqt5 patched'],
+        ))
+        # The hook is embedded as marshalled bytecode so it must be generated
+        # by the same Python the plugin will be loading.
+        pyqt5_patch_steps.append(Step(
+            name='generate exception hook module',
+            command=[sys.executable, 'generate_module_literal.py'],
+            cwd=os.path.join(pyqt5, 'designer'),
+            inputs=['pyqt5 patched'],
+            outputs=['pyqt5 exception hook'],
+        ))
 
     pyqt5_install = pathlib.Path(os.path.expandvars(sysroot))/'pyqt5-install'
 
@@ -491,9 +1596,11 @@ plat-name = {plat_name}'''.format(**locals()))
     qml_plugin_path = pyqt5_install/'qml'
     qml_plugin_path.mkdir(parents=True, exist_ok=True)
 
-    designer_pro = os.path.join(pyqt5, 'designer', 'designer.pro-in')
-    with open(designer_pro, 'a') as f:
-        f.write('\nDEFINES     += PYTHON_LIB=\'"\\\\\\"@PYSHLIB@\\\\\\""\'\n')
+    def define_python_lib():
+        designer_pro = os.path.join(pyqt5, 'designer', 'designer.pro-in')
+        with open(designer_pro, 'a') as f:
+            f.write('\nDEFINES     += PYTHON_LIB=\'"\\\\\\"@PYSHLIB@\\\\\\""\'\n')
+
     command = [
         sys.executable,
         'configure.py',
@@ -509,39 +1616,32 @@ plat-name = {plat_name}'''.format(**locals()))
         '--sip={}'.format(pathlib.Path(sys.executable).with_name('sip.exe')),
     ]
 
-    report_and_check_call(
-        command=command,
-        cwd=pyqt5,
-        env=os.environ,
-    )
-
-    sys.stderr.write('another stderr test from {}\n'.format(__file__))
-
-    report_and_check_call(
-        command=[
-            nmake,
-        ],
-        cwd=pyqt5,
-        env=os.environ,
-    )
-    report_and_check_call(
-        command=[
-            nmake,
-            'install',
-        ],
-        cwd=pyqt5,
-        env=os.environ,
-    )
-    designer_plugin_path, = designer_plugin_path.glob('*')
-    designer_plugin_destination = os.path.join(destination_plugins, 'designer')
-    os.makedirs(fspath(designer_plugin_destination), exist_ok=True)
-    shutil.copy(fspath(designer_plugin_path), designer_plugin_destination)
-
-    qml_plugin_path, = qml_plugin_path.glob('*')
-    qml_plugin_destination = os.path.join(destination_plugins)
-    os.makedirs(fspath(qml_plugin_destination), exist_ok=True)
-    shutil.copy(fspath(qml_plugin_path), qml_plugin_destination)
-    shutil.copy(fspath(qml_plugin_path), examples_destination)
+    def copy_pyqt5_plugins():
+        built_designer_plugin, = designer_plugin_path.glob('*')
+        designer_plugin_destination = os.path.join(destination_plugins, 'designer')
+
+        built_qml_plugin, = qml_plugin_path.glob('*')
+        qml_plugin_destination = os.path.join(destination_plugins)
+
+        stage(
+            manifest=[
+                StagedFile(
+                    source=fspath(built_designer_plugin),
+                    target=os.path.join(
+                        designer_plugin_destination,
+                        built_designer_plugin.name,
+                    ),
+                ),
+                *(
+                    StagedFile(
+                        source=fspath(built_qml_plugin),
+                        target=os.path.join(target, built_qml_plugin.name),
+                    )
+                    for target in (qml_plugin_destination, examples_destination)
+                )
+            ],
+            link=stage_links,
+        )
 
     destination_qml = os.path.join(destination_qt, 'qml')
 
@@ -570,44 +1670,266 @@ plat-name = {plat_name}'''.format(**locals()))
 
         return names
 
-    shutil.copytree(
-        qml_path,
-        destination_qml,
-        ignore=ignore,
-    )
+    def copy_qml():
+        stage(
+            manifest=tree_manifest(
+                source=qml_path,
+                target=destination_qml,
+                ignore=ignore,
+            ),
+            link=stage_links,
+        )
 
-    shutil.copy(os.path.join(pyqt5, 'LICENSE'),
-                os.path.join(destination, 'LICENSE.pyqt5'))
+    def copy_pyqt5_license():
+        stage(
+            manifest=[
+                StagedFile(
+                    source=os.path.join(pyqt5, 'LICENSE'),
+                    target=os.path.join(destination, 'LICENSE.pyqt5'),
+                ),
+            ],
+        )
 
-    # Since windeployqt doesn't actually work with --compiler-runtime,
-    # copy it ourselves
-    plat = {32: 'x86', 64: 'x64'}[bits]
-    redist_path = os.path.join(vs_path, 'VC', 'redist')\
+    def copy_redist():
+        # Since windeployqt doesn't actually work with --compiler-runtime,
+        # copy it ourselves
+        plat = {32: 'x86', 64: 'x64'}[bits]
+        redist_path = os.path.join(vs_path, 'VC', 'redist')\
+
+        if decimal.Decimal(msvc_version) >= 14.1:
+            redist_path = os.path.join(redist_path, 'MSVC')
+            picked = max(os.listdir(redist_path), key=lambda x: x.split('.'))
+            redist_path = os.path.join(redist_path, picked)
+            report_output('Using the MSVC redistributable in {}'.format(
+                redist_path,
+            ))
+
+        msvc_version_for_files = {'14.14': '14.1'}.get(msvc_version, msvc_version)
+        msvc_version_for_files = msvc_version_for_files.replace('.', '')
+
+        redist_path = os.path.join(
+            redist_path,
+            plat,
+            'Microsoft.VC{}.CRT'.format(msvc_version_for_files),
+        )
 
-    if decimal.Decimal(msvc_version) >= 14.1:
-        redist_path = os.path.join(redist_path, 'MSVC')
-        hmm = os.listdir(redist_path)
-        print('redist_path:', redist_path)
-        print('hmm:', hmm)
-        picked = max(hmm, key=lambda x: x.split('.'))
-        print('picked:', picked)
-        redist_path = os.path.join(redist_path, picked)
-
-    msvc_version_for_files = {'14.14': '14.1'}.get(msvc_version, msvc_version)
-    msvc_version_for_files = msvc_version_for_files.replace('.', '')
-
-    redist_path = os.path.join(
-        redist_path,
-        plat,
-        'Microsoft.VC{}.CRT'.format(msvc_version_for_files),
+        redist_files = os.listdir(redist_path)
+
+        stage(
+            manifest=[
+                StagedFile(
+                    source=os.path.join(redist_path, file),
+                    target=os.path.join(destination, file),
+                    mode=stat.S_IWRITE,
+                )
+                for file in redist_files
+            ],
+        )
+
+    steps = [
+        Step(name='write build id', function=write_build_id),
+        Step(name='write job id', function=write_job_id),
+        Step(name='deploy Qt tools', function=deploy_tools),
+        Step(name='copy platform plugins', function=copy_platform_plugins),
+        Step(name='copy Qt QML', function=copy_qml),
+        Step(name='copy MSVC redistributable', function=copy_redist),
+        Step(
+            name='copy PyQt5 plugins',
+            function=copy_pyqt5_plugins,
+            inputs=['pyqt5 plugins'],
+        ),
+    ]
+
+    compile_steps = [
+        Step(
+            name='download sip',
+            function=lambda: download_to(url=sip_url, path=sip_archive),
+            outputs=['sip archive'],
+        ),
+        Step(
+            name='extract sip',
+            function=lambda: extract_archive(
+                path=sip_archive,
+                destination=src,
+                exclude=source_exclude,
+            ),
+            inputs=['sip archive'],
+            outputs=['sip source'],
+        ),
+        Step(
+            name='extract native sip',
+            function=lambda: extract_archive(
+                path=sip_archive,
+                destination=src,
+                exclude=source_exclude,
+                root=os.path.basename(native_sip),
+            ),
+            inputs=['sip archive'],
+            outputs=['native sip source'],
+        ),
+        Step(
+            name='configure native sip',
+            command=[sys.executable, 'configure.py'],
+            cwd=native_sip,
+            inputs=['native sip source'],
+            outputs=['native sip configured'],
+        ),
+        Step(
+            name='build native sip',
+            command=[nmake],
+            cwd=native_sip,
+            env=os.environ,
+            inputs=['native sip configured'],
+            outputs=['native sip built'],
+        ),
+        Step(
+            name='install native sip',
+            command=[nmake, 'install'],
+            cwd=native_sip,
+            env=os.environ,
+            inputs=['native sip built'],
+            outputs=['native sip installed'],
+        ),
+        Step(
+            name='configure sip',
+            command=[
+                sys.executable,
+                'configure.py',
+                '--no-tools',
+                *sip_configure_extras
+            ],
+            cwd=sip,
+            inputs=['sip source', 'native sip installed'],
+            outputs=['sip configured'],
+        ),
+        Step(
+            name='build sip',
+            command=[nmake],
+            cwd=sip,
+            env=os.environ,
+            inputs=['sip configured'],
+            outputs=['sip built'],
+        ),
+        Step(
+            name='install sip',
+            command=[nmake, 'install'],
+            cwd=sip,
+            env=os.environ,
+            inputs=['sip built'],
+            outputs=['sip installed'],
+        ),
+        Step(
+            name='download PyQt5',
+            function=lambda: download_to(url=pyqt5_url, path=pyqt5_archive),
+            outputs=['pyqt5 archive'],
+        ),
+        Step(
+            name='extract PyQt5',
+            function=lambda: extract_archive(
+                path=pyqt5_archive,
+                destination=src,
+                exclude=source_exclude,
+            ),
+            inputs=['pyqt5 archive'],
+            outputs=['pyqt5 source'],
+        ),
+        *pyqt5_patch_steps,
+        Step(
+            name='define PyQt5 designer PYTHON_LIB',
+            function=define_python_lib,
+            inputs=['pyqt5 source', 'pyqt5 patched', 'pyqt5 exception hook'],
+            outputs=['pyqt5 prepared'],
+        ),
+        Step(
+            name='copy PyQt5 license',
+            function=copy_pyqt5_license,
+            inputs=['pyqt5 source'],
+            outputs=['pyqt5 license'],
+        ),
+        Step(
+            name='configure PyQt5',
+            command=command,
+            cwd=pyqt5,
+            env=os.environ,
+            inputs=['pyqt5 prepared', 'sip installed'],
+            outputs=['pyqt5 configured'],
+        ),
+        Step(
+            name='build PyQt5',
+            command=[nmake],
+            cwd=pyqt5,
+            env=os.environ,
+            inputs=['pyqt5 configured'],
+            outputs=['pyqt5 built'],
+        ),
+        Step(
+            name='install PyQt5',
+            command=[nmake, 'install'],
+            cwd=pyqt5,
+            env=os.environ,
+            inputs=['pyqt5 built'],
+            outputs=['pyqt5 plugins'],
+        ),
+    ]
+
+    sys.stderr.write('another stderr test from {}\n'.format(__file__))
+
+
+    artifact_cache = ArtifactCache(root=default_cache_root(build))
+    artifact_key = artifact_cache.key(
+        pyqt5_version=pyqt5_version,
+        sip_version=sip_version,
+        python_tag=python_tag,
+        plat_name=plat_name,
+        msvc_version=msvc_version,
+        # The plugins are built against and link to this Qt
+        qt_path=os.path.normcase(os.path.abspath(qt_compiler_path)),
+        qt_version=qt_version(qt_compiler_path),
+        pluginloader_patch=(
+            None
+            if pluginloader_patch_name is None
+            else file_digest(os.path.join(build, pluginloader_patch_name))
+        ),
     )
 
-    redist_files = os.listdir(redist_path)
+    def restore_artifacts():
+        artifact_cache.restore(key=artifact_key, destination=fspath(pyqt5_install))
+        shutil.move(
+            os.path.join(fspath(pyqt5_install), 'LICENSE.pyqt5'),
+            os.path.join(destination, 'LICENSE.pyqt5'),
+        )
 
-    for file in redist_files:
-        dest = os.path.join(destination, file)
-        shutil.copyfile(os.path.join(redist_path, file), dest)
-        os.chmod(dest, stat.S_IWRITE)
+    def store_artifacts():
+        artifact_cache.store(
+            key=artifact_key,
+            sources={
+                'designer': fspath(designer_plugin_path),
+                'qml': fspath(qml_plugin_path),
+                'LICENSE.pyqt5': os.path.join(destination, 'LICENSE.pyqt5'),
+            },
+        )
+
+    if artifact_cache.contains(artifact_key):
+        print('Artifact cache hit, skipping the sip and PyQt5 builds')
+        compile_steps = [
+            Step(
+                name='restore cached PyQt5 plugins',
+                function=restore_artifacts,
+                outputs=['pyqt5 plugins', 'pyqt5 license'],
+            ),
+        ]
+    else:
+        compile_steps.append(Step(
+            name='store PyQt5 plugins in cache',
+            function=store_artifacts,
+            inputs=['pyqt5 plugins', 'pyqt5 license'],
+        ))
+
+    try:
+        run_steps([*steps, *compile_steps])
+    finally:
+        build_metrics.write(os.path.join(build, 'build-metrics.json'))
+        print('\n' + build_metrics.summary())
 
     return Results(console_scripts=console_scripts)
 
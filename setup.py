@@ -1,15 +1,60 @@
+import json
 import os
+import pathlib
 import sys
 
 import build
 import setuptools
-import vcversioner
 
-version = vcversioner.find_version(
-        version_module_paths=['_version.py'],
-        vcs_args=['git', '--git-dir', '%(root)s/.git', 'describe',
-                     '--tags', '--long', '--abbrev=999'],
-    )
+here = pathlib.Path(__file__).parent
+
+
+def git_state():
+    """
+    Cheap summary of the git state that ``git describe`` depends on.
+    """
+    git = here/'.git'
+    try:
+        head = (git/'HEAD').read_text().strip()
+        state = [head]
+        if head.startswith('ref: '):
+            ref = git/head[len('ref: '):]
+            state.append(ref.read_text().strip() if ref.exists() else None)
+        for path in (git/'packed-refs', git/'refs'/'tags'):
+            state.append(path.stat().st_mtime_ns if path.exists() else None)
+    except OSError:
+        return None
+
+    return state
+
+
+def find_version():
+    state = git_state()
+    cache = pathlib.Path(build.default_cache_root(str(here)))/'version.json'
+
+    if state is not None:
+        try:
+            cached = json.loads(cache.read_text())
+        except (OSError, ValueError):
+            pass
+        else:
+            if cached['git'] == state:
+                return cached['version']
+
+    import vcversioner
+
+    version = vcversioner.find_version(
+            version_module_paths=['_version.py'],
+            vcs_args=['git', '--git-dir', '%(root)s/.git', 'describe',
+                         '--tags', '--long', '--abbrev=999'],
+        ).version
+
+    if state is not None:
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        cache.write_text(json.dumps({'git': state, 'version': version}))
+
+    return version
+
 
 def pad_version(v):
     split = v.split('.')
@@ -17,12 +62,55 @@ def pad_version(v):
 
 version = '.'.join((
     pad_version(os.environ['PYQT5_VERSION']),
-    version.version,
+    find_version(),
 ))
 
 sys.stderr.write('another stderr test from {}\n'.format(__file__))
 
-results = build.main()
+console_scripts = [
+    'pyqt5toolsinstalluic = pyqt5_tools.entrypoints:pyqt5toolsinstalluic',
+    'pyqt5designer = pyqt5_tools.entrypoints:pyqt5designer',
+    'pyqt5qmlscene = pyqt5_tools.entrypoints:pyqt5qmlscene',
+    'pyqt5qmltestrunner = pyqt5_tools.entrypoints:pyqt5qmltestrunner',
+    'pyqt5-tools = pyqt5_tools.entrypoints:pyqt5tools',
+]
+
+# Metadata only commands use the previous build's scripts, if any, rather
+# than building.
+cached_results = build.load_cached_results(str(here))
+if cached_results is not None:
+    console_scripts.extend(cached_results.console_scripts)
+
+cmdclass = {}
+
+try:
+    import wheel.bdist_wheel
+except ImportError:
+    pass
+else:
+    class bdist_wheel(wheel.bdist_wheel.bdist_wheel):
+        def finalize_options(self):
+            # Tagged here since the options are final before run() builds
+            python_tag, plat_name = build.wheel_tags()
+            if self.plat_name is None:
+                self.plat_name = plat_name
+            if self.python_tag == 'py{}'.format(sys.version_info[0]):
+                self.python_tag = python_tag
+
+            super().finalize_options()
+
+        def run(self):
+            results = build.build_if_needed(str(here))
+            scripts = self.distribution.entry_points['console_scripts']
+            scripts.extend(
+                script
+                for script in results.console_scripts
+                if script not in scripts
+            )
+
+            super().run()
+
+    cmdclass['bdist_wheel'] = bdist_wheel
 
 with open('README.rst') as f:
     readme = f.read()
@@ -59,15 +147,13 @@ setuptools.setup(
         'python-dotenv',
         'pyqt5=={}'.format(os.environ['PYQT5_VERSION']),
     ],
+    extras_require={
+        'snapshots': ['numpy'],
+    },
     entry_points={
-        'console_scripts': [
-            'pyqt5toolsinstalluic = pyqt5_tools.entrypoints:pyqt5toolsinstalluic',
-            'pyqt5designer = pyqt5_tools.entrypoints:pyqt5designer',
-            'pyqt5qmlscene = pyqt5_tools.entrypoints:pyqt5qmlscene',
-            'pyqt5qmltestrunner = pyqt5_tools.entrypoints:pyqt5qmltestrunner',
-            results.console_scripts,
-        ],
+        'console_scripts': console_scripts,
     },
+    cmdclass=cmdclass,
 #    data_files=buildinfo.data_files()
 #    scripts=[
 #        {scripts}
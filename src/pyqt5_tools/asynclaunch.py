@@ -0,0 +1,254 @@
+"""
+Start the bundled Qt tools from asyncio code, for running many at once.
+
+    launch = await pyqt5_tools.asynclaunch.designer(
+        widget_paths=[widgets],
+        stdout=print,
+    )
+    returncode = await launch.wait(timeout=60)
+
+Environments are built as by the ``pyqt5*`` commands, without printing them,
+and remembered so repeated launches with the same settings reuse them.  On
+Windows before Python 3.8 the event loop must be a ``ProactorEventLoop`` to
+run subprocesses.
+"""
+import asyncio
+import functools
+import os
+import subprocess
+import sys
+
+import pyqt5_tools.entrypoints
+
+
+fspath = getattr(os, 'fspath', str)
+
+# The variables designer_env() and qml_env() build on, the rest of the
+# environment is passed through unchanged
+env_inputs = (
+    'PATH',
+    'PYQTDESIGNERPATH',
+    'PYTHONPATH',
+    'QML2_IMPORT_PATH',
+    'QT_QUICK_BACKEND',
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_dotenv(directory):
+    pyqt5_tools.entrypoints.load_dotenv()
+
+
+def load_dotenv():
+    """Load the ``.env`` file for the working directory, once."""
+    _load_dotenv(os.getcwd())
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_env(kind, inputs, sys_path, paths, plugin_profile,
+                qt_debug_plugins, headless_platform):
+    """The variables to set, built from only the ``env_inputs``."""
+    # sys.path is only part of the key since the environment includes it
+    env = {name: value for name, value in inputs if value is not None}
+
+    if kind == 'designer':
+        return pyqt5_tools.entrypoints.designer_env(
+            env,
+            widget_paths=paths,
+            plugin_profile=plugin_profile,
+            qt_debug_plugins=qt_debug_plugins,
+            headless_platform=headless_platform,
+        )
+
+    return pyqt5_tools.entrypoints.qml_env(
+        env,
+        qml2_import_paths=paths,
+        qt_debug_plugins=qt_debug_plugins,
+        headless_platform=headless_platform,
+    )
+
+
+def environment(kind, env=None, paths=(), plugin_profile=None,
+                qt_debug_plugins=False, headless_platform=None):
+    """
+    The environment for ``'designer'`` or ``'qml'`` tools, based on ``env``
+    or by default ``os.environ``.  Each call returns a new dict.
+    """
+    if kind not in ('designer', 'qml'):
+        raise ValueError('Unknown kind of tool: {!r}'.format(kind))
+
+    if env is None:
+        env = os.environ
+
+    result = dict(env)
+    result.update(_cached_env(
+        kind,
+        tuple((name, env.get(name)) for name in env_inputs),
+        tuple(sys.path),
+        tuple(fspath(path) for path in paths),
+        plugin_profile,
+        qt_debug_plugins,
+        headless_platform,
+    ))
+
+    return result
+
+
+class Launch:
+    """
+    A started tool, the :class:`asyncio.subprocess.Process` being
+    ``process``.
+    """
+    def __init__(self, process, command, readers):
+        self.process = process
+        self.command = command
+        self.readers = readers
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    @property
+    def returncode(self):
+        return self.process.returncode
+
+    async def wait(self, timeout=None):
+        """
+        Wait for the tool to exit and its output to be passed on.  The tool
+        is terminated when the timeout passes, raising
+        :class:`asyncio.TimeoutError`, or when the waiting is cancelled.
+        """
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(self.process.wait(), *self.readers),
+                timeout=timeout,
+            )
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            await self.terminate()
+            raise
+
+        return self.process.returncode
+
+    async def terminate(self, grace=5):
+        """Ask the tool to exit, killing it if it hasn't within ``grace``."""
+        if self.process.returncode is None:
+            try:
+                self.process.terminate()
+                await asyncio.wait_for(self.process.wait(), timeout=grace)
+            except ProcessLookupError:
+                pass
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+
+        for reader in self.readers:
+            reader.cancel()
+
+        return self.process.returncode
+
+
+async def _pass_on_lines(stream, callback):
+    while True:
+        line = await stream.readline()
+        if len(line) == 0:
+            return
+
+        callback(line.decode(errors='replace').rstrip('\r\n'))
+
+
+async def start(command, env, stdout=None, stderr=None, cwd=None):
+    """
+    Start the command, passing each line it outputs to the ``stdout`` and
+    ``stderr`` callables.  Output goes to this process's when not given.
+    """
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        env=env,
+        cwd=cwd,
+        stdout=None if stdout is None else subprocess.PIPE,
+        stderr=None if stderr is None else subprocess.PIPE
+    )
+
+    readers = [
+        asyncio.ensure_future(_pass_on_lines(stream, callback))
+        for stream, callback in (
+            (process.stdout, stdout),
+            (process.stderr, stderr),
+        )
+        if callback is not None
+    ]
+
+    return Launch(process=process, command=list(command), readers=readers)
+
+
+async def designer(args=(), widget_paths=(), plugin_profile=None,
+                   qt_debug_plugins=False, headless_platform=None, env=None,
+                   dotenv=True, **kwargs):
+    """Start Designer, the remaining arguments going to :func:`start`."""
+    if dotenv:
+        load_dotenv()
+
+    return await start(
+        [fspath(pyqt5_tools.entrypoints.bin/'designer.exe'), *args],
+        env=environment(
+            'designer',
+            env=env,
+            paths=widget_paths,
+            plugin_profile=plugin_profile,
+            qt_debug_plugins=qt_debug_plugins,
+            headless_platform=headless_platform,
+        ),
+        **kwargs
+    )
+
+
+async def _qml_tool(name, args, qml2_import_paths, qt_debug_plugins,
+                    headless_platform, env, dotenv, kwargs):
+    if dotenv:
+        load_dotenv()
+
+    return await start(
+        [fspath(pyqt5_tools.entrypoints.bin/name), *args],
+        env=environment(
+            'qml',
+            env=env,
+            paths=qml2_import_paths,
+            qt_debug_plugins=qt_debug_plugins,
+            headless_platform=headless_platform,
+        ),
+        **kwargs
+    )
+
+
+async def qmlscene(args=(), qml2_import_paths=(), qt_debug_plugins=False,
+                   headless_platform=None, env=None, dotenv=True, **kwargs):
+    """Start QML scene, the remaining arguments going to :func:`start`."""
+    return await _qml_tool(
+        'qmlscene.exe',
+        args=args,
+        qml2_import_paths=qml2_import_paths,
+        qt_debug_plugins=qt_debug_plugins,
+        headless_platform=headless_platform,
+        env=env,
+        dotenv=dotenv,
+        kwargs=kwargs,
+    )
+
+
+async def qmltestrunner(args=(), qml2_import_paths=(),
+                        qt_debug_plugins=False, headless_platform=None,
+                        env=None, dotenv=True, **kwargs):
+    """
+    Start the QML test runner, the remaining arguments going to
+    :func:`start`.
+    """
+    return await _qml_tool(
+        'qmltestrunner.exe',
+        args=args,
+        qml2_import_paths=qml2_import_paths,
+        qt_debug_plugins=qt_debug_plugins,
+        headless_platform=headless_platform,
+        env=env,
+        dotenv=dotenv,
+        kwargs=kwargs,
+    )
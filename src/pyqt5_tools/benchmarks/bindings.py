@@ -0,0 +1,164 @@
+"""
+Measure how quickly property updates made from Python reach QML bindings on
+:class:`pyqt5_tools.examples.exampleqmlitem.ExampleQmlItem`.
+
+    python -m pyqt5_tools.benchmarks.bindings --output bindings.json
+
+Runs on the offscreen platform unless ``QT_QPA_PLATFORM`` is already set.
+"""
+import json
+import os
+import platform
+import sys
+import time
+
+import click
+
+
+qml = b'''\
+import QtQuick 2.0
+import examples 1.0
+
+Item {
+    property int evaluations: 0
+    property string mirror: item.other_value
+    onMirrorChanged: evaluations += 1
+
+    ExampleQmlItem {
+        id: item
+        objectName: "item"
+    }
+}
+'''
+
+
+def create_root(engine):
+    from PyQt5 import QtCore, QtQml
+
+    component = QtQml.QQmlComponent(engine)
+    component.setData(qml, QtCore.QUrl())
+    root = component.create()
+    if root is None:
+        raise click.ClickException('\n'.join(
+            error.toString() for error in component.errors()
+        ))
+
+    return root
+
+
+def direct(item, updates, batch):
+    for i in range(updates):
+        item.other_value = str(i)
+
+
+def unchanged(item, updates, batch):
+    for i in range(updates):
+        item.other_value = 'same'
+
+
+def batched(item, updates, batch):
+    from PyQt5 import QtCore
+
+    for start in range(0, updates, batch):
+        for i in range(start, min(start + batch, updates)):
+            item.queue_values(other_value=str(i), test_value=str(i))
+        QtCore.QCoreApplication.processEvents()
+
+
+modes = {
+    'direct': direct,
+    'unchanged': unchanged,
+    'batched': batched,
+}
+
+
+def run_mode(engine, mode, updates, batch):
+    from PyQt5 import QtCore
+
+    import pyqt5_tools.examples.exampleqmlitem
+
+    root = create_root(engine)
+    item = root.findChild(
+        pyqt5_tools.examples.exampleqmlitem.ExampleQmlItem,
+        'item',
+    )
+    QtCore.QCoreApplication.processEvents()
+    start_evaluations = root.property('evaluations')
+
+    start = time.perf_counter()
+    modes[mode](item, updates, batch)
+    QtCore.QCoreApplication.processEvents()
+    seconds = time.perf_counter() - start
+
+    evaluations = root.property('evaluations') - start_evaluations
+    root.deleteLater()
+
+    return {
+        'mode': mode,
+        'updates': updates,
+        'batch': batch if mode == 'batched' else None,
+        'seconds': seconds,
+        'updates_per_second': updates / seconds,
+        'binding_evaluations': evaluations,
+    }
+
+
+@click.command()
+@click.option(
+    '--output',
+    type=click.Path(dir_okay=False, writable=True),
+    help='Write the results here as JSON, otherwise to stdout',
+)
+@click.option('--updates', default=100000, show_default=True)
+@click.option(
+    '--batch',
+    default=1000,
+    show_default=True,
+    help='Updates queued per event loop pass in batched mode',
+)
+def main(output, updates, batch):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    from PyQt5 import QtGui, QtQml, QtCore
+
+    import pyqt5_tools.examples.exampleqmlitem
+
+    application = QtGui.QGuiApplication(sys.argv[:1])
+    QtQml.qmlRegisterType(
+        pyqt5_tools.examples.exampleqmlitem.ExampleQmlItem,
+        'examples',
+        1,
+        0,
+        'ExampleQmlItem',
+    )
+    engine = QtQml.QQmlEngine()
+
+    results = []
+    for mode in modes:
+        result = run_mode(engine, mode=mode, updates=updates, batch=batch)
+        click.echo(
+            '{mode:<10} {updates_per_second:12.0f} updates/s'
+            '  {binding_evaluations:8} binding evaluations'.format(**result),
+            err=True,
+        )
+        results.append(result)
+
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'qt': QtCore.QT_VERSION_STR,
+        'results': results,
+    }
+
+    if output is None:
+        click.echo(json.dumps(report, indent=4))
+    else:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=4)
+
+    del engine
+    del application
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Create a form's worth of the example and test button widgets as the running
+application does, from the widget class, and as Designer does, through each
+plugin's ``createWidget()`` with :mod:`pyqt5_tools.designmode` active.
+
+    python -m pyqt5_tools.benchmarks.designerforms --output designerforms.json
+
+Runs on the offscreen platform unless ``QT_QPA_PLATFORM`` is already set.
+"""
+import functools
+import importlib
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import click
+from PyQt5 import QtCore, QtWidgets
+
+import pyqt5_tools.designmode
+import pyqt5_tools.examplebuttonplugin
+import pyqt5_tools.tests.testbuttonplugin
+
+
+plugin_classes = (
+    pyqt5_tools.examplebuttonplugin.ExampleButtonPlugin,
+    pyqt5_tools.tests.testbuttonplugin.TestButtonPlugin,
+)
+
+
+def widget_class(plugin):
+    module = importlib.import_module(plugin.includeFile())
+
+    return getattr(module, plugin.name())
+
+
+def create(factory, widgets):
+    # The widgets of a form, all in one parent
+    parent = QtWidgets.QWidget()
+    for _ in range(widgets):
+        factory(parent)
+
+    return parent
+
+
+def timed(create_widgets):
+    start = time.perf_counter()
+    widget = create_widgets()
+    seconds = time.perf_counter() - start
+
+    widget.deleteLater()
+    QtCore.QCoreApplication.processEvents()
+
+    return seconds
+
+
+def traced_peak(create_widgets):
+    # Separate from the timed runs since tracing slows everything down
+    tracemalloc.start()
+    widget = create_widgets()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    widget.deleteLater()
+    QtCore.QCoreApplication.processEvents()
+
+    return peak
+
+
+@click.command()
+@click.option(
+    '--output',
+    type=click.Path(dir_okay=False, writable=True),
+    help='Write the results here as JSON, otherwise to stdout',
+)
+@click.option('--widgets', default=500, show_default=True)
+@click.option('--repeats', default=3, show_default=True)
+def main(output, widgets, repeats):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    os.environ.pop(pyqt5_tools.designmode.design_mode_env_var, None)
+
+    application = QtWidgets.QApplication(sys.argv[:1])
+
+    results = []
+    for plugin_class in plugin_classes:
+        plugin = plugin_class()
+        plugin.initialize(None)
+
+        factories = (
+            ('application', widget_class(plugin)),
+            ('designer', plugin.createWidget),
+        )
+        for mode, factory in factories:
+            create_widgets = functools.partial(
+                create,
+                factory=factory,
+                widgets=widgets,
+            )
+            result = {
+                'widget': plugin.name(),
+                'mode': mode,
+                'widgets': widgets,
+                'seconds': min(timed(create_widgets) for _ in range(repeats)),
+                'peak_traced_memory': traced_peak(create_widgets),
+            }
+            click.echo(
+                '{widget:<14} {mode:<12} {seconds:8.3f} s'
+                '  {peak_mib:8.1f} MiB peak traced'.format(
+                    peak_mib=result['peak_traced_memory'] / 2**20,
+                    **result
+                ),
+                err=True,
+            )
+            results.append(result)
+
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'qt': QtCore.QT_VERSION_STR,
+        'results': results,
+    }
+
+    if output is None:
+        click.echo(json.dumps(report, indent=4))
+    else:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=4)
+
+    del application
+
+
+if __name__ == '__main__':
+    main()
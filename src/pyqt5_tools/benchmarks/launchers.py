@@ -0,0 +1,283 @@
+"""
+Benchmark the ``pyqt5*`` launchers themselves, with the Qt programs replaced
+by stand-ins that exit immediately.
+
+    python -m pyqt5_tools.benchmarks.launchers --output launchers.json
+
+Each entry point is run against a fresh copy of the package, cold being the
+first run before any bytecode is cached and warm being the repeats after.
+POSIX only since peak RSS comes from ``os.wait4()``.
+"""
+import itertools
+import json
+import os
+import pathlib
+import platform
+import shutil
+import stat
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import click
+
+import pyqt5_tools
+
+
+fspath = getattr(os, 'fspath', str)
+
+tool_names = ('designer', 'qmlscene', 'qmltestrunner')
+
+entry_points = {
+    'pyqt5designer': 'pyqt5designer',
+    'pyqt5qmlscene': 'pyqt5qmlscene',
+    'pyqt5qmltestrunner': 'pyqt5qmltestrunner',
+}
+entry_points.update(
+    (name, 'tools.{}'.format(name))
+    for name in tool_names
+)
+
+stand_in = '#!/bin/sh\nexit 0\n'
+
+# Mirrors a setuptools console script without the pkg_resources overhead
+script = '''\
+import sys
+import pyqt5_tools.entrypoints
+sys.argv[0] = {name!r}
+sys.exit(pyqt5_tools.entrypoints.{attribute}())
+'''
+
+
+def make_package(root):
+    """
+    Copy the package, without any bundled Qt, and add stand-in tools so
+    the launchers can be run without Qt.
+    """
+    source = pathlib.Path(pyqt5_tools.__file__).parent
+    package = root/'pyqt5_tools'
+    shutil.copytree(
+        fspath(source),
+        fspath(package),
+        ignore=shutil.ignore_patterns('Qt', 'tools.json', '__pycache__'),
+    )
+
+    qt_bin = package/'Qt'/'bin'
+    qt_bin.mkdir(parents=True)
+    for name in tool_names:
+        path = qt_bin/'{}.exe'.format(name)
+        path.write_text(stand_in)
+        path.chmod(path.stat().st_mode | stat.S_IXUSR)
+
+    with (package/'tools.json').open('w') as f:
+        json.dump(
+            {
+                'tools': {
+                    name: 'Qt/bin/{}.exe'.format(name)
+                    for name in tool_names
+                },
+            },
+            f,
+        )
+
+    return package
+
+
+def make_dotenv_directory(root, depth):
+    """A directory ``depth`` levels below one holding a ``.env``."""
+    top = root/'dotenv'
+    top.mkdir()
+    (top/'.env').write_text('PYQT5TOOLS_BENCHMARK=1\n')
+
+    cwd = top.joinpath(*('level{}'.format(i) for i in range(depth)))
+    cwd.mkdir(parents=True, exist_ok=True)
+
+    return cwd
+
+
+def make_environment(root, sys_path_length, env_size):
+    paths = []
+    for i in range(sys_path_length):
+        path = root/'paths'/'path{}'.format(i)
+        path.mkdir(parents=True)
+        paths.append(fspath(path))
+
+    env = {
+        name: os.environ[name]
+        for name in ('PATH', 'HOME', 'LANG', 'TMPDIR')
+        if name in os.environ
+    }
+    inherited = os.environ.get('PYTHONPATH')
+    if inherited is not None:
+        paths.append(inherited)
+    env['PYTHONPATH'] = os.pathsep.join((fspath(root), *paths))
+    env.update(
+        ('PYQT5TOOLS_BENCHMARK_{}'.format(i), 'x' * 100)
+        for i in range(env_size)
+    )
+
+    return env
+
+
+def measure(command, cwd, env):
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull:
+        process = subprocess.Popen(
+            command,
+            cwd=fspath(cwd),
+            env=env,
+            stdout=devnull,
+        )
+        _, status, usage = os.wait4(process.pid, 0)
+    wall = time.perf_counter() - start
+
+    # ru_maxrss is in KiB except on macOS
+    peak_rss = usage.ru_maxrss
+    if sys.platform != 'darwin':
+        peak_rss *= 1024
+
+    return {
+        'wall': wall,
+        'peak_rss': peak_rss,
+        'returncode': os.WEXITSTATUS(status),
+    }
+
+
+def run_case(name, sys_path_length, dotenv_depth, env_size, repeats):
+    with tempfile.TemporaryDirectory() as directory:
+        root = pathlib.Path(directory)
+        make_package(root)
+        cwd = make_dotenv_directory(root, depth=dotenv_depth)
+        env = make_environment(
+            root,
+            sys_path_length=sys_path_length,
+            env_size=env_size,
+        )
+
+        command = [
+            sys.executable,
+            '-c',
+            script.format(name=name, attribute=entry_points[name]),
+        ]
+
+        cold = measure(command, cwd=cwd, env=env)
+        warm = [measure(command, cwd=cwd, env=env) for _ in range(repeats)]
+
+    failed = [
+        run['returncode']
+        for run in (cold, *warm)
+        if run['returncode'] != 0
+    ]
+    if len(failed) > 0:
+        raise click.ClickException(
+            '{} exited with {}'.format(name, failed[0]),
+        )
+
+    walls = [run['wall'] for run in warm]
+
+    return {
+        'entry_point': name,
+        'sys_path_length': sys_path_length,
+        'dotenv_depth': dotenv_depth,
+        'env_size': env_size,
+        'cold': {
+            'wall': cold['wall'],
+            'peak_rss': cold['peak_rss'],
+        },
+        'warm': {
+            'wall': walls,
+            'median_wall': statistics.median(walls),
+            'peak_rss': max(run['peak_rss'] for run in warm),
+        },
+    }
+
+
+def integers(value):
+    return [int(v) for v in value.split(',')]
+
+
+@click.command()
+@click.option(
+    '--output',
+    type=click.Path(dir_okay=False, writable=True),
+    help='Write the results here as JSON, otherwise to stdout',
+)
+@click.option(
+    '--entry-point',
+    'names',
+    type=click.Choice(sorted(entry_points)),
+    multiple=True,
+    help='Limit to these entry points, all by default',
+)
+@click.option(
+    '--sys-path-lengths',
+    default='0,100',
+    show_default=True,
+    help='Extra sys.path entries, comma separated',
+)
+@click.option(
+    '--dotenv-depths',
+    default='0,10',
+    show_default=True,
+    help='Directories between the working directory and the .env',
+)
+@click.option(
+    '--env-sizes',
+    default='0,1000',
+    show_default=True,
+    help='Extra environment variables',
+)
+@click.option('--repeats', default=5, show_default=True)
+def main(output, names, sys_path_lengths, dotenv_depths, env_sizes, repeats):
+    if not hasattr(os, 'wait4'):
+        raise click.ClickException('Launcher benchmarks need os.wait4()')
+
+    if len(names) == 0:
+        names = sorted(entry_points)
+
+    cases = itertools.product(
+        names,
+        integers(sys_path_lengths),
+        integers(dotenv_depths),
+        integers(env_sizes),
+    )
+
+    results = []
+    for name, sys_path_length, dotenv_depth, env_size in cases:
+        result = run_case(
+            name=name,
+            sys_path_length=sys_path_length,
+            dotenv_depth=dotenv_depth,
+            env_size=env_size,
+            repeats=repeats,
+        )
+        click.echo(
+            '{entry_point:<20} path={sys_path_length:<5} dotenv={dotenv_depth:<3}'
+            ' env={env_size:<6} cold={cold_ms:7.1f} ms  warm={warm_ms:7.1f} ms'
+            '  rss={rss:6.1f} MiB'.format(
+                cold_ms=result['cold']['wall'] * 1000,
+                warm_ms=result['warm']['median_wall'] * 1000,
+                rss=result['warm']['peak_rss'] / 2**20,
+                **result
+            ),
+            err=True,
+        )
+        results.append(result)
+
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+    if output is None:
+        click.echo(json.dumps(report, indent=4))
+    else:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
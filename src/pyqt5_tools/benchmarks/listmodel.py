@@ -0,0 +1,207 @@
+"""
+Compare :class:`pyqt5_tools.examples.examplelistmodel.ExampleListModel`
+with a list model inserting one row at a time, measuring memory per row and
+the time to populate a ``ListView``.
+
+    python -m pyqt5_tools.benchmarks.listmodel --output listmodel.json
+
+Runs on the offscreen platform unless ``QT_QPA_PLATFORM`` is already set.
+"""
+import array
+import json
+import os
+import pathlib
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import click
+
+
+fspath = getattr(os, 'fspath', str)
+
+qml = '''\
+import QtQuick 2.0
+
+ListView {
+    width: 300
+    height: 600
+    model: listModel
+    delegate: Text {
+        text: value + " " + count
+    }
+}
+'''
+
+
+def naive_model_type():
+    from PyQt5 import QtCore
+
+    class NaiveListModel(QtCore.QAbstractListModel):
+        roles = {
+            QtCore.Qt.UserRole: 'value',
+            QtCore.Qt.UserRole + 1: 'count',
+        }
+
+        def __init__(self, parent=None):
+            super().__init__(parent)
+
+            self.rows = []
+
+        def roleNames(self):
+            return {
+                role: QtCore.QByteArray(name.encode('ascii'))
+                for role, name in self.roles.items()
+            }
+
+        def rowCount(self, parent=QtCore.QModelIndex()):
+            return 0 if parent.isValid() else len(self.rows)
+
+        def data(self, index, role=QtCore.Qt.DisplayRole):
+            name = self.roles.get(role)
+            if name is None or not index.isValid():
+                return None
+
+            return self.rows[index.row()][name]
+
+        def append_row(self, value, count):
+            row = len(self.rows)
+            self.beginInsertRows(QtCore.QModelIndex(), row, row)
+            self.rows.append({'value': value, 'count': count})
+            self.endInsertRows()
+
+    return NaiveListModel
+
+
+def fill_naive(model, values, counts):
+    for value, count in zip(values, counts):
+        model.append_row(value, count)
+
+
+def fill_columnar(model, values, counts):
+    model.append(value=values, count=counts)
+
+
+def scroll_to_end(view, model):
+    from PyQt5 import QtCore
+
+    root = view.rootObject()
+    fetches = 0
+    while model.canFetchMore(QtCore.QModelIndex()):
+        QtCore.QMetaObject.invokeMethod(root, 'positionViewAtEnd')
+        QtCore.QCoreApplication.processEvents()
+        fetches += 1
+
+    return fetches
+
+
+def run_model(name, model, fill, qml_path, rows):
+    from PyQt5 import QtCore, QtQuick
+
+    values = array.array('d', (i * 0.5 for i in range(rows)))
+    counts = array.array('i', range(rows))
+
+    view = QtQuick.QQuickView()
+    view.rootContext().setContextProperty('listModel', model)
+    view.setSource(QtCore.QUrl.fromLocalFile(qml_path))
+    view.show()
+    QtCore.QCoreApplication.processEvents()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    fill(model, values, counts)
+    filled = time.perf_counter()
+    QtCore.QCoreApplication.processEvents()
+    view.grabWindow()
+    first_frame = time.perf_counter()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start_scroll = time.perf_counter()
+    fetches = scroll_to_end(view, model)
+    scrolled = time.perf_counter()
+
+    result = {
+        'model': name,
+        'rows': rows,
+        'fill_seconds': filled - start,
+        'first_frame_seconds': first_frame - start,
+        'scroll_to_end_seconds': scrolled - start_scroll,
+        'fetches': fetches,
+        'bytes_per_row': memory / rows,
+    }
+
+    view.close()
+    view.deleteLater()
+
+    return result
+
+
+@click.command()
+@click.option(
+    '--output',
+    type=click.Path(dir_okay=False, writable=True),
+    help='Write the results here as JSON, otherwise to stdout',
+)
+@click.option('--rows', default=100000, show_default=True)
+def main(output, rows):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    os.environ.setdefault('QT_QUICK_BACKEND', 'software')
+
+    from PyQt5 import QtCore, QtGui
+
+    import pyqt5_tools.examples.examplelistmodel
+
+    application = QtGui.QGuiApplication(sys.argv[:1])
+
+    models = (
+        ('naive', naive_model_type(), fill_naive),
+        (
+            'columnar',
+            pyqt5_tools.examples.examplelistmodel.ExampleListModel,
+            fill_columnar,
+        ),
+    )
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        qml_path = pathlib.Path(directory)/'listview.qml'
+        qml_path.write_text(qml)
+
+        for name, model_type, fill in models:
+            result = run_model(
+                name=name,
+                model=model_type(),
+                fill=fill,
+                qml_path=fspath(qml_path),
+                rows=rows,
+            )
+            click.echo(
+                '{model:<10} fill={fill_seconds:8.3f} s'
+                '  first frame={first_frame_seconds:8.3f} s'
+                '  scroll to end={scroll_to_end_seconds:8.3f} s'
+                '  {bytes_per_row:6.1f} bytes/row'.format(**result),
+                err=True,
+            )
+            results.append(result)
+
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'qt': QtCore.QT_VERSION_STR,
+        'results': results,
+    }
+
+    if output is None:
+        click.echo(json.dumps(report, indent=4))
+    else:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=4)
+
+    del application
+
+
+if __name__ == '__main__':
+    main()
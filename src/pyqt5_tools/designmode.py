@@ -0,0 +1,58 @@
+"""
+Lets widgets tell when they are being created by Designer, for the widget
+box, forms and previews, so they can skip expensive setup such as timers,
+threads or loading data.
+
+Widgets check :func:`active` and plugins create them through
+:func:`create_widget`.  ``pyqt5designer`` also sets ``PYQT5TOOLS_DESIGN_MODE``
+for the whole Designer process.
+"""
+import contextlib
+import os
+import threading
+
+
+design_mode_env_var = 'PYQT5TOOLS_DESIGN_MODE'
+
+state = threading.local()
+
+shared_values = {}
+shared_lock = threading.Lock()
+
+
+def active():
+    """Whether widgets are currently being created for Designer."""
+    return (
+        getattr(state, 'depth', 0) > 0
+        or os.environ.get(design_mode_env_var) == '1'
+    )
+
+
+@contextlib.contextmanager
+def designing():
+    state.depth = getattr(state, 'depth', 0) + 1
+    try:
+        yield
+    finally:
+        state.depth -= 1
+
+
+def create_widget(factory, parent):
+    """For use in ``createWidget()``, builds the widget in design mode."""
+    with designing():
+        return factory(parent)
+
+
+def shared(key, factory):
+    """
+    A value created once and reused by every instance, for read only
+    resources like icons or lookup tables that would otherwise be rebuilt
+    for each of the many widgets Designer creates.
+    """
+    with shared_lock:
+        try:
+            return shared_values[key]
+        except KeyError:
+            value = factory()
+            shared_values[key] = value
+            return value
@@ -1,27 +1,36 @@
+import functools
+import importlib.util
+import json
 import os
 import pathlib
 import shutil
 import subprocess
 import sys
+import time
 
 import click
 import dotenv
 
-import pyqt5_tools.badplugin
-import pyqt5_tools.examplebuttonplugin
-import pyqt5_tools.examples
+import pyqt5_tools.designmode
+import pyqt5_tools.pluginbundle
+import pyqt5_tools.pluginprofiler
+import pyqt5_tools.qmlimports
+import pyqt5_tools.qmlsnapshots
+import pyqt5_tools.qmltestresults
+import pyqt5_tools.readiness
+import pyqt5_tools.resourcemonitor
 
 fspath = getattr(os, 'fspath', str)
 
 
 here = pathlib.Path(__file__).parent
 bin = here/'Qt'/'bin'
-example_path = str(
-    pathlib.Path(pyqt5_tools.examplebuttonplugin.__file__).parent,
-)
-bad_path = str(
-    pathlib.Path(pyqt5_tools.badplugin.__file__).parent,
-)
+platforms_path = bin/'plugins'/'platforms'
+# Computed rather than imported so launching doesn't import PyQt5
+example_path = str(here)
+bad_path = str(here/'badplugin')
+profiler_path = str(here/'pluginprofiler')
+examples_path = here/'examples'
 
 def pyqt5toolsinstalluic():
     destination = bin/'bin'
@@ -31,6 +40,20 @@ def pyqt5toolsinstalluic():
     shutil.copy(str(there/'pyuic5.exe'), str(destination/'uic.exe'))
 
 
+def cache_path(*parts):
+    """A path in the per user cache directory for pyqt5-tools."""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA', os.path.expanduser('~'))
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser(os.path.join('~', 'Library', 'Caches'))
+    else:
+        base = os.environ.get('XDG_CACHE_HOME', '')
+        if len(base) == 0:
+            base = os.path.expanduser(os.path.join('~', '.cache'))
+
+    return pathlib.Path(base, 'pyqt5-tools', *parts)
+
+
 def load_dotenv():
     env_path = dotenv.find_dotenv(usecwd=True)
     if len(env_path) > 0:
@@ -77,6 +100,171 @@ qt_debug_plugins_option = click.option(
     help='Set QT_DEBUG_PLUGINS=1',
 )
 
+headless_option = click.option(
+    '--headless',
+    help='Run without a display using a bundled platform plugin',
+    is_flag=True,
+)
+
+headless_platform_option = click.option(
+    '--headless-platform',
+    help='The platform plugin used by --headless',
+    type=click.Choice(['offscreen', 'minimal']),
+    default='offscreen',
+    show_default=True,
+)
+
+
+def mutate_env_for_headless(env, platform):
+    env['QT_QPA_PLATFORM'] = platform
+    env['QT_QPA_PLATFORM_PLUGIN_PATH'] = fspath(platforms_path)
+    # Qt Quick otherwise wants OpenGL which the headless platforms lack
+    env.setdefault('QT_QUICK_BACKEND', 'software')
+
+
+exit_when_ready_option = click.option(
+    '--exit-when-ready',
+    help=(
+        'Exit as soon as a widget or item calls'
+        ' pyqt5_tools.readiness.signal_ready()'
+    ),
+    is_flag=True,
+)
+
+
+resource_report_option = click.option(
+    '--resource-report',
+    help=(
+        'Sample memory, CPU time and threads of the program from /proc and'
+        ' write them here as JSON when it exits'
+    ),
+    type=click.Path(dir_okay=False, writable=True, resolve_path=True),
+)
+
+resource_interval_option = click.option(
+    '--resource-interval',
+    help='Seconds between --resource-report samples',
+    type=click.FloatRange(0.01, None),
+    default=0.5,
+    show_default=True,
+)
+
+
+def run(command, env, exit_when_ready=False, popen=subprocess.Popen,
+        follow_results=None):
+    if follow_results is not None:
+        return follow_results(command, env=env, popen=popen)
+
+    if exit_when_ready:
+        return pyqt5_tools.readiness.run_until_ready(
+            command,
+            env=env,
+            popen=popen,
+        )
+
+    with popen(command, env=env) as process:
+        try:
+            return process.wait()
+        except BaseException:
+            process.kill()
+            raise
+
+
+def launch(command, env, exit_when_ready=False, resource_report=None,
+           resource_interval=0.5, follow_results=None):
+    if resource_report is None:
+        returncode = run(
+            command,
+            env=env,
+            exit_when_ready=exit_when_ready,
+            follow_results=follow_results,
+        )
+    else:
+        monitor = pyqt5_tools.resourcemonitor.Monitor(
+            interval=resource_interval,
+        )
+        returncode = None
+        try:
+            returncode = run(
+                command,
+                env=env,
+                exit_when_ready=exit_when_ready,
+                popen=monitor.popen,
+                follow_results=follow_results,
+            )
+        finally:
+            monitor.stop(returncode=returncode)
+            report = monitor.write(resource_report)
+
+        print('Peak RSS {:.1f} MiB, CPU {:.2f} s, {} threads'.format(
+            (report['peak']['rss'] or 0) / 2**20,
+            report['peak']['cpu_seconds'] or 0,
+            report['peak']['threads'],
+        ))
+
+    # click ignores the return value so failing to get ready, or failing
+    # tests, would otherwise still exit successfully
+    if returncode != 0:
+        sys.exit(returncode)
+
+    return returncode
+
+
+def check_resource_report(resource_report):
+    if resource_report is None:
+        return
+
+    if not pyqt5_tools.resourcemonitor.available():
+        raise click.UsageError('--resource-report needs /proc, as on Linux')
+
+
+def bundle_widget_paths(widget_paths):
+    start = time.monotonic()
+    bundle = pyqt5_tools.pluginbundle.build(
+        widget_paths=widget_paths,
+        cache_directory=cache_path('plugin-bundles'),
+    )
+
+    if bundle.built:
+        print('Plugin bundle built in {:.2f} s: {}'.format(
+            time.monotonic() - start,
+            bundle.archive,
+        ))
+    else:
+        print('Plugin bundle up to date: {}'.format(bundle.archive))
+
+    return bundle
+
+
+def designer_env(env, widget_paths=(), plugin_profile=None,
+                 qt_debug_plugins=False, headless_platform=None):
+    """A copy of ``env`` set up for running Designer with the widgets."""
+    env = dict(env)
+    widget_paths = list(widget_paths)
+
+    if plugin_profile is not None:
+        # Designer imports plugins in path order so the profiler goes first
+        widget_paths.insert(0, profiler_path)
+        env[pyqt5_tools.pluginprofiler.report_path_env_var] = plugin_profile
+    env.update(add_to_env_var_path_list(
+        env=env,
+        name='PYQTDESIGNERPATH',
+        before=widget_paths,
+        after=[''],
+    ))
+
+    mutate_env_for_paths(env)
+
+    env[pyqt5_tools.designmode.design_mode_env_var] = '1'
+
+    if qt_debug_plugins:
+        env['QT_DEBUG_PLUGINS'] = '1'
+
+    if headless_platform is not None:
+        mutate_env_for_headless(env, platform=headless_platform)
+
+    return env
+
 
 @click.command(
     context_settings={
@@ -110,15 +298,45 @@ qt_debug_plugins_option = click.option(
     help='Raise an exception to check the exception dialog functionality.',
     is_flag=True,
 )
+@click.option(
+    '--profile-plugins',
+    'plugin_profile',
+    help=(
+        'Write import time and memory use of each widget plugin to this file'
+        ' when Designer exits'
+    ),
+    type=click.Path(dir_okay=False, writable=True, resolve_path=True),
+)
+@click.option(
+    '--bundle-plugins',
+    help=(
+        'Compile the widget paths into a cached zip archive, rebuilt when'
+        ' their sources change, and have Designer import from it'
+    ),
+    is_flag=True,
+)
 @qt_debug_plugins_option
+@headless_option
+@headless_platform_option
+@exit_when_ready_option
+@resource_report_option
+@resource_interval_option
 def pyqt5designer(
         ctx,
         widget_paths,
         designer_help,
         example_widget_path,
         test_exception_dialog,
-        qt_debug_plugins
+        plugin_profile,
+        bundle_plugins,
+        qt_debug_plugins,
+        headless,
+        headless_platform,
+        exit_when_ready,
+        resource_report,
+        resource_interval,
 ):
+    check_resource_report(resource_report)
     load_dotenv()
 
     extras = []
@@ -133,18 +351,26 @@ def pyqt5designer(
     if test_exception_dialog:
         widget_paths.append(bad_path)
 
-    env = dict(os.environ)
-    env.update(add_to_env_var_path_list(
-        env=env,
-        name='PYQTDESIGNERPATH',
-        before=widget_paths,
-        after=[''],
-    ))
-
-    mutate_env_for_paths(env)
+    bundle = None
+    if bundle_plugins:
+        bundle = bundle_widget_paths(widget_paths)
+        widget_paths = [bundle.stubs]
+
+    env = designer_env(
+        os.environ,
+        widget_paths=widget_paths,
+        plugin_profile=plugin_profile,
+        qt_debug_plugins=qt_debug_plugins,
+        headless_platform=headless_platform if headless else None,
+    )
 
-    if qt_debug_plugins:
-        env['QT_DEBUG_PLUGINS'] = '1'
+    if bundle is not None:
+        env.update(add_to_env_var_path_list(
+            env=env,
+            name='PYTHONPATH',
+            before=[bundle.archive],
+            after=[],
+        ))
 
     print_environment_variables(
         env,
@@ -152,6 +378,8 @@ def pyqt5designer(
         'PYTHONPATH',
         'PATH',
         'QT_DEBUG_PLUGINS',
+        'QT_QPA_PLATFORM',
+        pyqt5_tools.pluginprofiler.report_path_env_var,
     )
 
     command = [
@@ -160,7 +388,13 @@ def pyqt5designer(
         *ctx.args,
     ]
 
-    return subprocess.call(command, env=env)
+    return launch(
+        command,
+        env=env,
+        exit_when_ready=exit_when_ready,
+        resource_report=resource_report,
+        resource_interval=resource_interval,
+    )
 
 
 qml2_import_path_option = click.option(
@@ -182,6 +416,100 @@ def mutate_qml_path(env, paths):
     ))
 
 
+def qml_env(env, qml2_import_paths=(), qt_debug_plugins=False,
+            headless_platform=None):
+    """A copy of ``env`` set up for running the QML tools."""
+    env = dict(env)
+
+    mutate_qml_path(env, paths=qml2_import_paths)
+    mutate_env_for_paths(env)
+
+    if qt_debug_plugins:
+        env['QT_DEBUG_PLUGINS'] = '1'
+
+    if headless_platform is not None:
+        mutate_env_for_headless(env, platform=headless_platform)
+
+    return env
+
+
+qml_import_map_option = click.option(
+    '--qml-import-map',
+    help=(
+        'Resolve the imports of the QML files up front and pass only the'
+        ' needed QML2_IMPORT_PATH entries'
+    ),
+    is_flag=True,
+)
+
+
+def mutate_qml_path_for_imports(env, entries):
+    import_map = pyqt5_tools.qmlimports.load(
+        entries=[fspath(entry) for entry in entries],
+        paths=env['QML2_IMPORT_PATH'].split(os.pathsep),
+        cache_file=fspath(cache_path('qmlimports.json')),
+    )
+
+    env['QML2_IMPORT_PATH'] = os.pathsep.join(import_map.paths)
+
+    print('QML import probes: {} with all paths, {} with the import map'.format(
+        import_map.probes_before,
+        import_map.probes_after,
+    ))
+    if len(import_map.unresolved) > 0:
+        print('Not found in QML2_IMPORT_PATH: {}'.format(
+            ', '.join(import_map.unresolved),
+        ))
+
+
+def snapshot_qml(qml_paths, env, snapshot_dir, baseline_dir, tolerance, size,
+                 jobs):
+    if importlib.util.find_spec('numpy') is None:
+        raise click.ClickException(
+            'Snapshots need NumPy, pip install pyqt5-tools[snapshots]',
+        )
+
+    if baseline_dir is None:
+        raise click.UsageError('--snapshot-dir needs --baseline-dir')
+
+    if len(qml_paths) == 0:
+        raise click.UsageError('No QML files given to snapshot')
+
+    snapshots = pyqt5_tools.qmlsnapshots.plan(
+        qml_paths=qml_paths,
+        output_directory=snapshot_dir,
+        baseline_directory=baseline_dir,
+    )
+    width, height = size
+
+    counts = dict.fromkeys(pyqt5_tools.qmlsnapshots.statuses, 0)
+    for result in pyqt5_tools.qmlsnapshots.check_all(
+            snapshots=snapshots,
+            env=env,
+            tolerance=tolerance,
+            jobs=jobs,
+            width=width,
+            height=height,
+    ):
+        counts[result.status] += 1
+        if result.status != 'unchanged':
+            print('{}: {}: {}'.format(
+                result.status,
+                result.snapshot.qml,
+                result.message,
+            ))
+
+    print(', '.join(
+        '{} {}'.format(counts[status], status)
+        for status in pyqt5_tools.qmlsnapshots.statuses
+    ))
+
+    if counts['unchanged'] != len(snapshots):
+        sys.exit(1)
+
+    return 0
+
+
 @click.command(
     context_settings={
         'ignore_unknown_options': True,
@@ -201,32 +529,96 @@ def mutate_qml_path(env, paths):
     help='Run the pyqt5-tools QML example',
     is_flag=True,
 )
+@qml_import_map_option
+@headless_option
+@headless_platform_option
+@exit_when_ready_option
+@resource_report_option
+@resource_interval_option
+@click.option(
+    '--snapshot-dir',
+    help=(
+        'Render each QML file offscreen to a PNG here instead of running'
+        ' QML scene, comparing against --baseline-dir'
+    ),
+    type=click.Path(file_okay=False, writable=True, resolve_path=True),
+)
+@click.option(
+    '--baseline-dir',
+    help='Baseline images laid out as in --snapshot-dir',
+    type=click.Path(file_okay=False, resolve_path=True),
+)
+@click.option(
+    '--snapshot-tolerance',
+    help='Largest per channel difference still counted as unchanged',
+    type=click.IntRange(0, 255),
+    default=0,
+    show_default=True,
+)
+@click.option(
+    '--snapshot-size',
+    help='Render at this width and height rather than the root item\'s',
+    type=(int, int),
+    default=(None, None),
+)
+@click.option(
+    '--snapshot-jobs',
+    help='Worker processes rendering snapshots, defaults to the CPU count',
+    type=click.IntRange(1, None),
+)
 def pyqt5qmlscene(
         ctx,
         qml2_import_paths,
         qmlscene_help,
         qt_debug_plugins,
         run_qml_example,
+        qml_import_map,
+        headless,
+        headless_platform,
+        exit_when_ready,
+        resource_report,
+        resource_interval,
+        snapshot_dir,
+        baseline_dir,
+        snapshot_tolerance,
+        snapshot_size,
+        snapshot_jobs,
 ):
+    check_resource_report(resource_report)
     load_dotenv()
     extras = []
 
     if qmlscene_help:
         extras.append('--help')
 
-    env = dict(os.environ)
-
     if run_qml_example:
         qml2_import_paths = qml2_import_paths + (fspath(here),)
-        extras.append(fspath(
-            pathlib.Path(pyqt5_tools.examples.__file__).parent/'qmlapp.qml'
-        ))
-
-    mutate_qml_path(env, paths=qml2_import_paths)
-    mutate_env_for_paths(env)
-
-    if qt_debug_plugins:
-        env['QT_DEBUG_PLUGINS'] = '1'
+        extras.append(fspath(examples_path/'qmlapp.qml'))
+
+    if snapshot_dir is not None:
+        # Rendered in worker processes by PyQt5 rather than qmlscene
+        env = pyqt5_tools.qmlsnapshots.render_env(
+            os.environ,
+            qml2_import_paths=qml2_import_paths,
+            qt_debug_plugins=qt_debug_plugins,
+        )
+    else:
+        env = qml_env(
+            os.environ,
+            qml2_import_paths=qml2_import_paths,
+            qt_debug_plugins=qt_debug_plugins,
+            headless_platform=headless_platform if headless else None,
+        )
+
+    if qml_import_map:
+        mutate_qml_path_for_imports(
+            env,
+            entries=[
+                arg
+                for arg in (*extras, *ctx.args)
+                if arg.endswith('.qml') and os.path.isfile(arg)
+            ],
+        )
 
     print_environment_variables(
         env,
@@ -234,15 +626,37 @@ def pyqt5qmlscene(
         'PYTHONPATH',
         'PATH',
         'QT_DEBUG_PLUGINS',
+        'QT_QPA_PLATFORM',
     )
 
+    if snapshot_dir is not None:
+        return snapshot_qml(
+            qml_paths=[
+                arg
+                for arg in (*extras, *ctx.args)
+                if arg.endswith('.qml')
+            ],
+            env=env,
+            snapshot_dir=snapshot_dir,
+            baseline_dir=baseline_dir,
+            tolerance=snapshot_tolerance,
+            size=snapshot_size,
+            jobs=snapshot_jobs,
+        )
+
     command = [
         str(bin / 'qmlscene.exe'),
         *extras,
         *ctx.args,
     ]
 
-    return subprocess.call(command, env=env)
+    return launch(
+        command,
+        env=env,
+        exit_when_ready=exit_when_ready,
+        resource_report=resource_report,
+        resource_interval=resource_interval,
+    )
 
 
 @click.command(
@@ -264,35 +678,81 @@ def pyqt5qmlscene(
     help='Test the pyqt5-tools QML example',
     is_flag=True,
 )
+@qml_import_map_option
+@headless_option
+@headless_platform_option
+@exit_when_ready_option
+@resource_report_option
+@resource_interval_option
+@click.option(
+    '--live-results',
+    help=(
+        'Show each test result and duration as it is output, and the slow'
+        ' tests at the end'
+    ),
+    is_flag=True,
+)
+@click.option(
+    '--maxfail',
+    help='Stop the run after this many failed tests, implies --live-results',
+    type=click.IntRange(1, None),
+)
+@click.option(
+    '--slow-threshold',
+    help='Seconds from which --live-results reports a test as slow',
+    type=float,
+    default=1.0,
+    show_default=True,
+)
 def pyqt5qmltestrunner(
         ctx,
         qml2_import_paths,
         qmltestrunner_help,
         qt_debug_plugins,
         test_qml_example,
+        qml_import_map,
+        headless,
+        headless_platform,
+        exit_when_ready,
+        resource_report,
+        resource_interval,
+        live_results,
+        maxfail,
+        slow_threshold,
 ):
+    check_resource_report(resource_report)
     load_dotenv()
     extras = []
 
     if qmltestrunner_help:
         extras.append('--help')
 
-    env = dict(os.environ)
-
     if test_qml_example:
         qml2_import_paths = qml2_import_paths + (fspath(here),)
         extras.extend([
             '-input',
-            fspath(
-                pathlib.Path(pyqt5_tools.examples.__file__).parent/'qmltest.qml'
-            ),
+            fspath(examples_path/'qmltest.qml'),
         ])
 
-    mutate_qml_path(env, paths=qml2_import_paths)
-    mutate_env_for_paths(env)
+    env = qml_env(
+        os.environ,
+        qml2_import_paths=qml2_import_paths,
+        qt_debug_plugins=qt_debug_plugins,
+        headless_platform=headless_platform if headless else None,
+    )
 
-    if qt_debug_plugins:
-        env['QT_DEBUG_PLUGINS'] = '1'
+    if qml_import_map:
+        # The test runner looks in the current directory without -input
+        args = [*extras, *ctx.args]
+        entries = [
+            value
+            for option, value in zip(args, args[1:])
+            if option == '-input'
+        ]
+        if len(entries) == 0:
+            entries.append(os.getcwd())
+
+        mutate_qml_path_for_imports(env, entries=entries)
 
     print_environment_variables(
         env,
@@ -300,6 +760,7 @@ def pyqt5qmltestrunner(
         'PYTHONPATH',
         'PATH',
         'QT_DEBUG_PLUGINS',
+        'QT_QPA_PLATFORM',
     )
 
     command = [
@@ -308,9 +769,107 @@ def pyqt5qmltestrunner(
         *ctx.args,
     ]
 
-    return subprocess.call(command, env=env)
+    follow_results = None
+    if live_results or maxfail is not None:
+        follow_results = test_results_follower(
+            args=command[1:],
+            exit_when_ready=exit_when_ready,
+            maxfail=maxfail,
+            slow_threshold=slow_threshold,
+        )
+
+    return launch(
+        command,
+        env=env,
+        exit_when_ready=exit_when_ready,
+        resource_report=resource_report,
+        resource_interval=resource_interval,
+        follow_results=follow_results,
+    )
+
+
+def test_results_follower(args, exit_when_ready, maxfail, slow_threshold):
+    if exit_when_ready:
+        raise click.UsageError(
+            '--exit-when-ready can\'t be used with --live-results or'
+            ' --maxfail',
+        )
+
+    format_ = pyqt5_tools.qmltestresults.output_format(args)
+    if format_ is None:
+        raise click.UsageError(
+            'Results can only be followed in the txt or xunitxml format',
+        )
+
+    def follow_results(command, env, popen):
+        returncode, results = pyqt5_tools.qmltestresults.run(
+            command,
+            env=env,
+            format_=format_,
+            maxfail=maxfail,
+            slow_threshold=slow_threshold,
+            popen=popen,
+        )
+
+        return returncode
+
+    return follow_results
+
+
+@functools.lru_cache(maxsize=None)
+def load_tools():
+    """
+    The bundled Qt tools, as recorded in ``tools.json`` when building.
+    """
+    try:
+        with (here/'tools.json').open() as f:
+            return json.load(f)['tools']
+    except FileNotFoundError:
+        return {}
+
+
+def call_tool(name, args):
+    load_dotenv()
+
+    env = dict(os.environ)
+    mutate_env_for_paths(env)
+
+    command = [str(here/load_tools()[name]), *args]
+
+    return launch(command, env=env)
+
+
+class ToolDispatcher:
+    """
+    Console script entry points for the bundled tools are attributes of
+    this object, ``designer = pyqt5_tools.entrypoints:tools.designer``.
+    """
+    def __getattr__(self, name):
+        if name not in load_tools():
+            raise AttributeError(name)
+
+        return functools.partial(self.main, name)
+
+    def __dir__(self):
+        return sorted(load_tools())
+
+    def main(self, name, args=None):
+        if args is None:
+            args = sys.argv[1:]
+
+        return call_tool(name, args)
+
+
+tools = ToolDispatcher()
+
+
+@click.group()
+def pyqt5tools():
+    pass
 
 
-# def designer():
-#     load_dotenv()
-#     return subprocess.call([str(here/'Qt'/'bin'/'designer.exe'), *sys.argv[1:]])
+@pyqt5tools.command(name='list')
+def list_tools():
+    """List the bundled Qt tools."""
+    for name, path in sorted(load_tools().items()):
+        print('{}: {}'.format(name, here/path))
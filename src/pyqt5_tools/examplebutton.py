@@ -1,4 +1,8 @@
-from PyQt5 import QtWidgets
+import time
+
+from PyQt5 import QtCore, QtWidgets
+
+import pyqt5_tools.designmode
 
 
 class ExampleButton(QtWidgets.QPushButton):
@@ -6,3 +10,18 @@ class ExampleButton(QtWidgets.QPushButton):
         super().__init__(parent)
 
         self.setText('pyqt5-tools Example Button')
+
+        self.started = time.monotonic()
+        self.timer = None
+
+        # Designer creates many instances that never run so leave out
+        # anything only needed when the application is running
+        if not pyqt5_tools.designmode.active():
+            self.timer = QtCore.QTimer(self)
+            self.timer.timeout.connect(self.update_tool_tip)
+            self.timer.start(1000)
+
+    def update_tool_tip(self):
+        self.setToolTip('Running for {:.0f} s'.format(
+            time.monotonic() - self.started,
+        ))
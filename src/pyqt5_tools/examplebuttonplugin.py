@@ -1,5 +1,6 @@
 from PyQt5 import QtGui, QtDesigner
 
+import pyqt5_tools.designmode
 import pyqt5_tools.examplebutton
 
 
@@ -21,7 +22,10 @@ class ExampleButtonPlugin(QtDesigner.QPyDesignerCustomWidgetPlugin):
         return self.initialized
 
     def createWidget(self, parent):
-        return pyqt5_tools.examplebutton.ExampleButton(parent)
+        return pyqt5_tools.designmode.create_widget(
+            pyqt5_tools.examplebutton.ExampleButton,
+            parent,
+        )
 
     def name(self):
         return pyqt5_tools.examplebutton.ExampleButton.__name__
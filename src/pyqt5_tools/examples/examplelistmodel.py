@@ -0,0 +1,166 @@
+import array
+
+from PyQt5 import QtCore
+
+
+def extend_column(column, values):
+    # Buffers of the same type, such as another array or a NumPy array, are
+    # copied in one go rather than element by element.
+    try:
+        view = memoryview(values)
+    except TypeError:
+        column.extend(values)
+        return
+
+    if view.format == column.typecode and view.ndim == 1:
+        column.frombytes(view.tobytes())
+    else:
+        column.extend(view.tolist())
+
+
+class ExampleListModel(QtCore.QAbstractListModel):
+    """
+    A list model holding each role as a compact column, filled in bulk from
+    Python and handed to views a batch of rows at a time.
+    """
+    columns = (
+        ('value', 'd'),
+        ('count', 'i'),
+    )
+    batch_size = 1000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self.roles = {
+            QtCore.Qt.UserRole + i: name
+            for i, (name, typecode) in enumerate(self.columns)
+        }
+        self.roles[QtCore.Qt.DisplayRole] = self.columns[0][0]
+
+        self.data_columns = self.empty_columns()
+        self.fetched = 0
+
+    def empty_columns(self):
+        return {
+            name: array.array(typecode)
+            for name, typecode in self.columns
+        }
+
+    def stored_rows(self):
+        return len(self.data_columns[self.columns[0][0]])
+
+    def check_columns(self, columns):
+        if set(columns) != set(self.data_columns):
+            raise ValueError('Expected the columns {}, got {}'.format(
+                ', '.join(sorted(self.data_columns)),
+                ', '.join(sorted(columns)),
+            ))
+
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) != 1:
+            raise ValueError('Columns differ in length')
+
+        return lengths.pop()
+
+    def converted_columns(self, columns):
+        """
+        New arrays holding the columns' values, so a value failing to convert
+        leaves the model unchanged.
+        """
+        self.check_columns(columns)
+
+        data_columns = self.empty_columns()
+        for name, values in columns.items():
+            extend_column(data_columns[name], values)
+
+        return data_columns
+
+    def roleNames(self):
+        names = {
+            role: QtCore.QByteArray(name.encode('ascii'))
+            for role, name in self.roles.items()
+        }
+        names[QtCore.Qt.DisplayRole] = QtCore.QByteArray(b'display')
+
+        return names
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+
+        return self.fetched
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        name = self.roles.get(role)
+        if name is None or not index.isValid() or index.row() >= self.fetched:
+            return None
+
+        return self.data_columns[name][index.row()]
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self.fetched < self.stored_rows()
+
+    def fetchMore(self, parent):
+        if parent.isValid():
+            return
+
+        count = min(self.batch_size, self.stored_rows() - self.fetched)
+        if count <= 0:
+            return
+
+        self.beginInsertRows(
+            QtCore.QModelIndex(),
+            self.fetched,
+            self.fetched + count - 1,
+        )
+        self.fetched += count
+        self.endInsertRows()
+
+    def fetch_initial(self):
+        # Views only ask for more once scrolled to the end, make sure there
+        # is something to show
+        if self.fetched < self.batch_size:
+            self.fetchMore(QtCore.QModelIndex())
+
+    def append(self, **columns):
+        """Add rows, each keyword being a whole column of new values."""
+        for name, values in self.converted_columns(columns).items():
+            self.data_columns[name].extend(values)
+
+        self.fetch_initial()
+
+    def replace(self, start, **columns):
+        """Overwrite existing rows from ``start`` on."""
+        replacements = self.converted_columns(columns)
+        stop = start + len(replacements[self.columns[0][0]])
+        if start < 0 or stop > self.stored_rows():
+            raise IndexError('Rows {} to {} are not all stored'.format(
+                start,
+                stop - 1,
+            ))
+
+        for name, values in replacements.items():
+            self.data_columns[name][start:stop] = values
+
+        visible_stop = min(stop, self.fetched)
+        if start < visible_stop:
+            self.dataChanged.emit(
+                self.index(start),
+                self.index(visible_stop - 1),
+                list(self.roles),
+            )
+
+    def reset(self, **columns):
+        """Replace all rows, with none when no columns are given."""
+        if len(columns) > 0:
+            data_columns = self.converted_columns(columns)
+        else:
+            data_columns = self.empty_columns()
+
+        self.beginResetModel()
+        self.data_columns = data_columns
+        self.fetched = 0
+        self.endResetModel()
+
+        self.fetch_initial()
@@ -4,16 +4,59 @@ import pathlib
 from PyQt5 import QtCore
 from PyQt5 import QtQuick
 
+import pyqt5_tools.readiness
+
 test_path_env_var = 'PYQT5TOOLS_TEST_PATH'
 test_file_contents = b'jagular'
 write_for_test = test_path_env_var in os.environ
 
 
 class ExampleQmlItem(QtQuick.QQuickPaintedItem):
+    # Without notify signals QML bindings to these properties can't update
+    test_value_changed = QtCore.pyqtSignal('QString')
+    other_value_changed = QtCore.pyqtSignal('QString')
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-    @QtCore.pyqtProperty('QString')
+        self.values = {
+            'test_value': 'pass the test',
+            'other_value': '',
+        }
+
+        # Values queued from Python are applied together on the next pass
+        # through the event loop, notifying each changed property once.
+        self.pending = {}
+        self.flush_timer = QtCore.QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(0)
+        self.flush_timer.timeout.connect(self.flush)
+
+    def set_value(self, name, value):
+        """Set a property, only notifying when the value actually changed."""
+        if self.values[name] == value:
+            return False
+
+        self.values[name] = value
+        getattr(self, name + '_changed').emit(value)
+
+        return True
+
+    def queue_values(self, **values):
+        """Update several properties at once on the next event loop pass."""
+        self.pending.update(values)
+
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def flush(self):
+        pending = self.pending
+        self.pending = {}
+
+        for name, value in pending.items():
+            self.set_value(name, value)
+
+    @QtCore.pyqtProperty('QString', notify=test_value_changed)
     def test_value(self):
         global write_for_test
 
@@ -24,15 +67,21 @@ class ExampleQmlItem(QtQuick.QQuickPaintedItem):
             with path.open('xb') as f:
                 f.write(test_file_contents)
 
-        return 'pass the test'
+            pyqt5_tools.readiness.signal_ready()
+
+        return self.values['test_value']
+
+    @test_value.setter
+    def test_value(self, value):
+        self.set_value('test_value', value)
 
-    @QtCore.pyqtProperty('QString')
+    @QtCore.pyqtProperty('QString', notify=other_value_changed)
     def other_value(self):
-        pass
+        return self.values['other_value']
 
     @other_value.setter
     def other_value(self, value):
-        pass
+        self.set_value('other_value', value)
 
     def paint(self, painter):
         painter.drawText(
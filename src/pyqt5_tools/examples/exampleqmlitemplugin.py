@@ -1,5 +1,6 @@
 from PyQt5 import QtQml
 
+import pyqt5_tools.examples.examplelistmodel
 import pyqt5_tools.examples.exampleqmlitem
 
 
@@ -12,3 +13,10 @@ class ExampleQmlItemPlugin(QtQml.QQmlExtensionPlugin):
             0,
             'ExampleQmlItem',
         )
+        QtQml.qmlRegisterType(
+            pyqt5_tools.examples.examplelistmodel.ExampleListModel,
+            'examples',
+            1,
+            0,
+            'ExampleListModel',
+        )
@@ -0,0 +1,199 @@
+"""
+Bundle Designer widget plugin directories into one zip of compiled modules.
+
+Designer looks for ``*plugin.py`` files in each ``PYQTDESIGNERPATH``
+directory, so each plugin gets a stub there importing the compiled module
+from the archive.  The archive goes first on ``PYTHONPATH`` so the plugins'
+own imports of their neighbouring modules and packages are found in it as
+well, without searching directories or compiling sources.
+
+Code keeps its original file names so tracebacks still show the source.
+Plugins reading files next to themselves through ``__file__`` will not find
+them in the archive.
+"""
+import collections
+import hashlib
+import importlib.util
+import marshal
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import zipfile
+
+
+fspath = getattr(os, 'fspath', str)
+
+bundled_prefix = '_bundled_'
+archive_name = 'plugins.zip'
+stubs_name = 'stubs'
+
+Bundle = collections.namedtuple('Bundle', ('archive', 'stubs', 'built'))
+
+
+def is_plugin(name):
+    return name.endswith('plugin.py')
+
+
+def sources(widget_paths):
+    """
+    The modules to bundle as ``(path, module path)`` pairs, the module path
+    using ``/``.  Each directory contributes its top level modules and its
+    packages, earlier directories winning as on ``sys.path``.
+    """
+    found = collections.OrderedDict()
+
+    for widget_path in widget_paths:
+        widget_path = fspath(widget_path)
+        for name in sorted(os.listdir(widget_path)):
+            path = os.path.join(widget_path, name)
+
+            if name == '__init__.py':
+                # The directory being a package doesn't make it importable
+                continue
+            elif name.endswith('.py') and os.path.isfile(path):
+                found.setdefault(name, path)
+            elif os.path.isfile(os.path.join(path, '__init__.py')):
+                for directory, directories, files in os.walk(path):
+                    directories[:] = sorted(
+                        child
+                        for child in directories
+                        if os.path.isfile(
+                            os.path.join(directory, child, '__init__.py'),
+                        )
+                    )
+                    relative = os.path.relpath(directory, widget_path)
+                    for file in sorted(files):
+                        if file.endswith('.py'):
+                            found.setdefault(
+                                '/'.join((*relative.split(os.sep), file)),
+                                os.path.join(directory, file),
+                            )
+
+    return [(path, module_path) for module_path, path in found.items()]
+
+
+def fingerprint(widget_paths, modules):
+    """Changes when the sources, their layout or the Python version do."""
+    digest = hashlib.sha256()
+    digest.update(importlib.util.MAGIC_NUMBER)
+    digest.update(sys.version.encode('utf-8'))
+
+    for widget_path in widget_paths:
+        digest.update(fspath(widget_path).encode('utf-8') + b'\0')
+
+    for path, module_path in modules:
+        stat = os.stat(path)
+        digest.update('{}\0{}\0{}\0{}\0'.format(
+            module_path,
+            path,
+            stat.st_size,
+            stat.st_mtime_ns,
+        ).encode('utf-8'))
+
+    return digest.hexdigest()
+
+
+def pyc(code, source):
+    header = importlib.util.MAGIC_NUMBER
+    if sys.version_info >= (3, 7):
+        # Flags, zero for a timestamp based pyc
+        header += struct.pack('<I', 0)
+
+    # Without the source alongside in the archive the timestamp isn't checked
+    header += struct.pack('<II', 0, len(source) & 0xFFFFFFFF)
+
+    return header + marshal.dumps(code)
+
+
+def bundled_module_path(module_path):
+    if '/' not in module_path and is_plugin(module_path):
+        # The stub has the plugin's own name
+        return bundled_prefix + module_path
+
+    return module_path
+
+
+def write_archive(path, modules):
+    # Stored rather than compressed, the point is to import quickly
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for source_path, module_path in modules:
+            with open(source_path, 'rb') as f:
+                source = f.read()
+
+            module_path = bundled_module_path(module_path)
+            try:
+                code = compile(source, source_path, 'exec', dont_inherit=True)
+            except SyntaxError:
+                # Left for Designer to report when importing it
+                archive.writestr(module_path, source)
+            else:
+                archive.writestr(module_path + 'c', pyc(code, source))
+
+
+def write_stubs(directory, modules):
+    os.makedirs(directory)
+
+    for source_path, module_path in modules:
+        if '/' in module_path or not is_plugin(module_path):
+            continue
+
+        with open(os.path.join(directory, module_path), 'w') as f:
+            f.write(
+                '# Bundled by pyqt5designer --bundle-plugins from {}\n'
+                'from {} import *\n'.format(
+                    source_path,
+                    bundled_module_path(module_path)[:-len('.py')],
+                ),
+            )
+
+
+def build(widget_paths, cache_directory):
+    """
+    The bundle for the widget paths, reused from ``cache_directory`` unless
+    the sources changed.  Bundles for earlier versions of the same widget
+    paths are removed.
+    """
+    widget_paths = [fspath(path) for path in widget_paths]
+    modules = sources(widget_paths)
+
+    paths_key = hashlib.sha256(
+        '\0'.join(widget_paths).encode('utf-8'),
+    ).hexdigest()[:16]
+    parent = os.path.join(fspath(cache_directory), paths_key)
+    directory = os.path.join(parent, fingerprint(widget_paths, modules)[:16])
+
+    bundle = Bundle(
+        archive=os.path.join(directory, archive_name),
+        stubs=os.path.join(directory, stubs_name),
+        built=False,
+    )
+
+    if os.path.isdir(directory):
+        return bundle
+
+    os.makedirs(parent, exist_ok=True)
+    temporary = tempfile.mkdtemp(dir=parent, prefix='.building-')
+    try:
+        write_archive(os.path.join(temporary, archive_name), modules)
+        write_stubs(os.path.join(temporary, stubs_name), modules)
+    except BaseException:
+        shutil.rmtree(temporary, ignore_errors=True)
+        raise
+
+    try:
+        os.rename(temporary, directory)
+    except OSError:
+        shutil.rmtree(temporary, ignore_errors=True)
+        # Fine when built concurrently by another launch
+        if not os.path.isdir(directory):
+            raise
+
+    for name in os.listdir(parent):
+        path = os.path.join(parent, name)
+        if path != directory and not name.startswith('.building-'):
+            # A running Designer may still hold an old archive open
+            shutil.rmtree(path, ignore_errors=True)
+
+    return bundle._replace(built=True)
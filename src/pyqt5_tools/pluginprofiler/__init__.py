@@ -0,0 +1,278 @@
+import atexit
+import collections
+import os
+import pathlib
+import sys
+import time
+import tracemalloc
+
+
+report_path_env_var = 'PYQT5TOOLS_PLUGIN_PROFILE'
+
+here = pathlib.Path(__file__).parent
+
+Import = collections.namedtuple(
+    'Import',
+    ('name', 'depth', 'seconds', 'self_seconds', 'memory'),
+)
+Event = collections.namedtuple(
+    'Event',
+    ('plugin', 'event', 'seconds', 'memory', 'top'),
+)
+
+
+def designer_plugin_base():
+    from PyQt5 import QtDesigner
+
+    return QtDesigner.QPyDesignerCustomWidgetPlugin
+
+
+class TimingLoader:
+    """Wraps a module loader to time executing the module."""
+    def __init__(self, loader, profiler):
+        self.loader = loader
+        self.profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        self.profiler.exec_module(self.loader, module)
+
+
+class Profiler:
+    """
+    Times every module import and snapshots memory around each Designer
+    plugin's import, ``initialize()`` and first ``createWidget()``.
+    """
+    def __init__(self, paths, report_path, plugin_base=None, top=5):
+        self.paths = [os.path.normcase(os.path.abspath(path)) for path in paths]
+        self.report_path = report_path
+        self.plugin_base = plugin_base
+        self.top = top
+
+        self.imports = []
+        self.events = []
+        self.stack = []
+        self.wrapped = set()
+        self.started_tracing = False
+
+    # importlib.abc.MetaPathFinder
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        if hasattr(spec.loader, 'exec_module'):
+            spec.loader = TimingLoader(loader=spec.loader, profiler=self)
+
+        return spec
+
+    def install(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+
+        sys.meta_path.insert(0, self)
+        atexit.register(self.write)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+        atexit.unregister(self.write)
+
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    def is_plugin(self, module):
+        origin = getattr(module, '__file__', None)
+        if origin is None:
+            return False
+
+        directory, name = os.path.split(os.path.abspath(origin))
+        return (
+            name.endswith('plugin.py')
+            and os.path.normcase(directory) in self.paths
+        )
+
+    def exec_module(self, loader, module):
+        plugin = self.is_plugin(module)
+        snapshot = tracemalloc.take_snapshot() if plugin else None
+
+        self.stack.append(0)
+        memory = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            loader.exec_module(module)
+        finally:
+            seconds = time.perf_counter() - start
+            memory = tracemalloc.get_traced_memory()[0] - memory
+            nested = self.stack.pop()
+            if len(self.stack) > 0:
+                self.stack[-1] += seconds
+
+            self.imports.append(Import(
+                name=module.__name__,
+                depth=len(self.stack),
+                seconds=seconds,
+                self_seconds=seconds - nested,
+                memory=memory,
+            ))
+
+        if plugin:
+            self.record(module.__name__, 'import', seconds, memory, snapshot)
+            self.wrap_plugins(module)
+
+    def record(self, plugin, event, seconds, memory, snapshot):
+        statistics = tracemalloc.take_snapshot().compare_to(snapshot, 'lineno')
+        top = [
+            '{}:{} {:+.1f} KiB'.format(
+                statistic.traceback[0].filename,
+                statistic.traceback[0].lineno,
+                statistic.size_diff / 1024,
+            )
+            for statistic in statistics[:self.top]
+            if statistic.size_diff != 0
+        ]
+
+        self.events.append(Event(
+            plugin=plugin,
+            event=event,
+            seconds=seconds,
+            memory=memory,
+            top=top,
+        ))
+
+    def measure(self, plugin, event, f, *args, **kwargs):
+        snapshot = tracemalloc.take_snapshot()
+        memory = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            return f(*args, **kwargs)
+        finally:
+            self.record(
+                plugin=plugin,
+                event=event,
+                seconds=time.perf_counter() - start,
+                memory=tracemalloc.get_traced_memory()[0] - memory,
+                snapshot=snapshot,
+            )
+
+    def wrap_plugins(self, module):
+        base = self.plugin_base
+        if base is None:
+            base = designer_plugin_base()
+
+        for value in list(vars(module).values()):
+            if (
+                    isinstance(value, type)
+                    and issubclass(value, base)
+                    and value is not base
+                    and value not in self.wrapped
+            ):
+                self.wrap_plugin(value)
+
+    def wrap_plugin(self, cls):
+        self.wrapped.add(cls)
+        name = '{}.{}'.format(cls.__module__, cls.__qualname__)
+        profiler = self
+
+        initialize = cls.initialize
+        createWidget = cls.createWidget
+        created = []
+
+        def profiled_initialize(self, *args, **kwargs):
+            return profiler.measure(
+                name, 'initialize', initialize, self, *args, **kwargs
+            )
+
+        def profiled_createWidget(self, *args, **kwargs):
+            if len(created) > 0:
+                return createWidget(self, *args, **kwargs)
+
+            created.append(True)
+            return profiler.measure(
+                name, 'createWidget', createWidget, self, *args, **kwargs
+            )
+
+        cls.initialize = profiled_initialize
+        cls.createWidget = profiled_createWidget
+
+    def report(self):
+        lines = []
+
+        lines.append('Plugin events, slowest first')
+        lines.append('{:>10}  {:>12}  {:<14} {}'.format(
+            'Time [ms]', 'Memory [KiB]', 'Event', 'Plugin',
+        ))
+        for event in sorted(self.events, key=lambda e: e.seconds, reverse=True):
+            lines.append('{:10.1f}  {:12.1f}  {:<14} {}'.format(
+                event.seconds * 1000,
+                event.memory / 1024,
+                event.event,
+                event.plugin,
+            ))
+            lines.extend('{}{}'.format(' ' * 42, top) for top in event.top)
+
+        lines.append('')
+        lines.append('Module imports, by time spent in the module itself')
+        lines.append('{:>10}  {:>10}  {:>12}  {}'.format(
+            'Self [ms]', 'Total [ms]', 'Memory [KiB]', 'Module',
+        ))
+        imports = sorted(
+            self.imports,
+            key=lambda i: i.self_seconds,
+            reverse=True,
+        )
+        for i in imports:
+            lines.append('{:10.1f}  {:10.1f}  {:12.1f}  {}{}'.format(
+                i.self_seconds * 1000,
+                i.seconds * 1000,
+                i.memory / 1024,
+                '  ' * i.depth,
+                i.name,
+            ))
+
+        return '\n'.join(lines) + '\n'
+
+    def write(self):
+        with open(self.report_path, 'w') as f:
+            f.write(self.report())
+
+
+profiler = None
+
+
+def install_from_environment():
+    """
+    Called from the Designer plugin module, profiles the remaining
+    ``PYQTDESIGNERPATH`` directories.
+    """
+    global profiler
+
+    if profiler is not None:
+        return profiler
+
+    report_path = os.environ.get(report_path_env_var)
+    if report_path is None:
+        return None
+
+    paths = [
+        path
+        for path in os.environ.get('PYQTDESIGNERPATH', '').split(os.pathsep)
+        if len(path) > 0
+    ]
+    profiler = Profiler(paths=paths, report_path=report_path)
+    profiler.install()
+
+    return profiler
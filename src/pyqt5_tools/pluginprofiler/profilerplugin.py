@@ -0,0 +1,13 @@
+# Not a widget plugin, Designer imports this first when --profile-plugins
+# puts this directory at the front of PYQTDESIGNERPATH.
+
+from PyQt5 import QtCore
+
+import pyqt5_tools.pluginprofiler
+
+
+profiler = pyqt5_tools.pluginprofiler.install_from_environment()
+
+# Python may not be finalized when Designer exits so don't rely on atexit.
+if profiler is not None and QtCore.QCoreApplication.instance() is not None:
+    QtCore.QCoreApplication.instance().aboutToQuit.connect(profiler.write)
@@ -0,0 +1,275 @@
+"""
+Resolve the module imports of QML files against an import path list so the
+QML engine can be given only the paths it needs.
+
+Only the entry files, QML files beside them, QML files anywhere below entry
+directories and the files and dependencies listed in the resolved modules'
+``qmldir`` are scanned.  Imports made
+dynamically, from JavaScript or from modules' C++ plugins are not seen.
+"""
+import collections
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+
+cache_version = 2
+
+comment_pattern = re.compile(r'//[^\n]*|/\*.*?\*/', re.DOTALL)
+import_pattern = re.compile(
+    r'^\s*import\s+([A-Za-z_][\w.]*)(?:\s+(\d+)(?:\.(\d+))?)?',
+    re.MULTILINE,
+)
+
+Import = collections.namedtuple('Import', ('module', 'major', 'minor'))
+
+
+def parse_imports(text):
+    """Module imports in QML source, directory and script imports excluded."""
+    text = comment_pattern.sub('', text)
+
+    return [
+        Import(
+            module=module,
+            major=int(major) if len(major) > 0 else None,
+            minor=int(minor) if len(minor) > 0 else None,
+        )
+        for module, major, minor in import_pattern.findall(text)
+    ]
+
+
+def parse_qmldir(text):
+    """
+    The imports and QML files named by a ``qmldir``, the latter relative to
+    its directory.
+    """
+    imports = []
+    files = []
+
+    for line in text.splitlines():
+        words = line.split('#', 1)[0].split()
+        if len(words) == 0:
+            continue
+
+        if words[0] in ('depends', 'import') and len(words) >= 2:
+            major = minor = None
+            if len(words) >= 3:
+                version = words[2].split('.')
+                major = int(version[0]) if version[0].isdigit() else None
+                if len(version) > 1 and version[1].isdigit():
+                    minor = int(version[1])
+            imports.append(Import(module=words[1], major=major, minor=minor))
+        elif words[0] in ('singleton', 'internal') and len(words) >= 3:
+            files.append(words[-1])
+        elif len(words) == 3 and words[2].endswith('.qml'):
+            files.append(words[2])
+
+    return imports, files
+
+
+def candidates(module, major, minor):
+    """
+    Directories relative to an import path that are checked for a
+    ``qmldir``, grouped by how fully versioned they are.  Qt 5 tries each
+    group against every import path before moving on to the next.
+    """
+    parts = module.split('.')
+    versions = []
+    if major is not None:
+        if minor is not None:
+            versions.append('.{}.{}'.format(major, minor))
+        versions.append('.{}'.format(major))
+
+    groups = []
+    for version in versions:
+        groups.append([
+            os.path.join(*parts[:i], parts[i] + version, *parts[i + 1:])
+            for i in reversed(range(len(parts)))
+        ])
+    groups.append([os.path.join(*parts)])
+
+    return groups
+
+
+def resolve(import_, paths, isfile=os.path.isfile):
+    """
+    The index of the path providing the import, its directory and the
+    number of ``qmldir`` probes made.  The index is ``None`` if unresolved.
+    """
+    probes = 0
+
+    for group in candidates(*import_):
+        for index, path in enumerate(paths):
+            for relative in group:
+                probes += 1
+                directory = os.path.join(path, relative)
+                if isfile(os.path.join(directory, 'qmldir')):
+                    return index, directory, probes
+
+    return None, None, probes
+
+
+ImportMap = collections.namedtuple(
+    'ImportMap',
+    ('paths', 'modules', 'unresolved', 'probes_before', 'probes_after', 'files'),
+)
+
+
+def read(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def scan(entries, paths):
+    """
+    Resolve everything imported by the entry files and return the shortest
+    ordering-preserving subset of ``paths`` that resolves it all the same.
+    """
+    paths = [path for path in paths if len(path) > 0]
+
+    pending = collections.deque()
+    scanned = set()
+    files = []
+
+    def add_file(path):
+        path = os.path.abspath(path)
+        if path in scanned or not os.path.isfile(path):
+            return
+        scanned.add(path)
+        files.append(path)
+        pending.extend(parse_imports(read(path)))
+
+    def add_directory(directory):
+        # Listed so files added to it are noticed when cached
+        files.append(os.path.abspath(directory))
+        # QML files in the same directory are imported implicitly
+        for name in sorted(os.listdir(directory)):
+            if name.endswith('.qml'):
+                add_file(os.path.join(directory, name))
+
+    for entry in entries:
+        if os.path.isdir(entry):
+            # As qmltestrunner finds tests in subdirectories too
+            for directory, directories, names in os.walk(entry):
+                directories.sort()
+                add_directory(directory)
+        else:
+            add_directory(os.path.dirname(os.path.abspath(entry)))
+            add_file(entry)
+
+    modules = collections.OrderedDict()
+    unresolved = []
+    used = set()
+    probes_before = 0
+    seen = set()
+
+    while len(pending) > 0:
+        import_ = pending.popleft()
+        if import_ in seen:
+            continue
+        seen.add(import_)
+
+        index, directory, probes = resolve(import_, paths)
+        probes_before += probes
+
+        if index is None:
+            unresolved.append(import_.module)
+            continue
+
+        used.add(index)
+        modules[import_.module] = directory
+
+        qmldir = os.path.join(directory, 'qmldir')
+        files.append(os.path.abspath(qmldir))
+        imports, qml_files = parse_qmldir(read(qmldir))
+        pending.extend(imports)
+        for name in qml_files:
+            add_file(os.path.join(directory, name))
+
+    minimal = [path for index, path in enumerate(paths) if index in used]
+
+    probes_after = sum(
+        resolve(import_, minimal)[2]
+        for import_ in seen
+    )
+
+    return ImportMap(
+        paths=minimal,
+        modules=modules,
+        unresolved=unresolved,
+        probes_before=probes_before,
+        probes_after=probes_after,
+        files=files,
+    )
+
+
+def mtimes(paths):
+    result = {}
+    for path in paths:
+        try:
+            result[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            result[path] = None
+
+    return result
+
+
+def cache_key(entries, paths):
+    return hashlib.sha256(json.dumps(
+        {
+            'version': cache_version,
+            'entries': [os.path.abspath(entry) for entry in entries],
+            'paths': paths,
+        },
+        sort_keys=True,
+    ).encode('utf-8')).hexdigest()
+
+
+def load(entries, paths, cache_file):
+    """
+    As :func:`scan` but reusing the result cached in ``cache_file`` while
+    none of the scanned files and directories or the import paths have been
+    modified.
+    """
+    key = cache_key(entries, paths)
+
+    try:
+        with open(cache_file) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+
+    entry = cache.get(key)
+    if entry is not None:
+        watched = entry['mtimes']
+        if mtimes(watched) == watched:
+            return ImportMap(
+                modules=collections.OrderedDict(entry['map']['modules']),
+                **{
+                    name: value
+                    for name, value in entry['map'].items()
+                    if name != 'modules'
+                }
+            )
+
+    import_map = scan(entries, paths)
+
+    watched = [path for path in paths if len(path) > 0] + import_map.files
+    cache[key] = {
+        'map': dict(
+            import_map._asdict(),
+            modules=list(import_map.modules.items()),
+        ),
+        'mtimes': mtimes(watched),
+    }
+
+    directory = os.path.dirname(cache_file)
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(descriptor, 'w') as f:
+        json.dump(cache, f)
+    os.replace(temporary, cache_file)
+
+    return import_map
@@ -0,0 +1,292 @@
+"""
+Render QML files offscreen to PNG and compare them against baseline images.
+
+Rendering happens in a pool of worker processes, each with its own
+``QGuiApplication``, and comparing needs NumPy, ``pip install
+pyqt5-tools[snapshots]``.
+"""
+import collections
+import concurrent.futures
+import os
+
+
+fspath = getattr(os, 'fspath', str)
+
+Snapshot = collections.namedtuple(
+    'Snapshot',
+    ('qml', 'image', 'baseline', 'diff'),
+)
+
+Result = collections.namedtuple(
+    'Result',
+    ('snapshot', 'status', 'changed_pixels', 'message'),
+)
+
+statuses = ('unchanged', 'changed', 'new', 'error')
+
+_application = None
+
+
+def plan(qml_paths, output_directory, baseline_directory):
+    """
+    Lay the images out under each directory as the QML files are laid out
+    relative to each other.
+    """
+    qml_paths = [os.path.abspath(fspath(path)) for path in qml_paths]
+    if len(qml_paths) == 0:
+        return []
+
+    root = os.path.commonpath([os.path.dirname(path) for path in qml_paths])
+
+    snapshots = []
+    for path in qml_paths:
+        relative = os.path.splitext(os.path.relpath(path, root))[0]
+        snapshots.append(Snapshot(
+            qml=path,
+            image=os.path.join(fspath(output_directory), relative + '.png'),
+            baseline=os.path.join(
+                fspath(baseline_directory),
+                relative + '.png',
+            ),
+            diff=os.path.join(
+                fspath(output_directory),
+                relative + '.diff.png',
+            ),
+        ))
+
+    return snapshots
+
+
+def changed_mask(actual, baseline, tolerance):
+    """
+    The pixels where any channel differs by more than ``tolerance``, given
+    two ``height x width x channels`` arrays of the same shape.
+    """
+    import numpy
+
+    difference = numpy.abs(
+        actual.astype(numpy.int16) - baseline.astype(numpy.int16),
+    )
+
+    return difference.max(axis=2) > tolerance
+
+
+def diff_image(baseline, mask):
+    """
+    A faded grey copy of the RGBA baseline with the changed pixels in red.
+    """
+    import numpy
+
+    grey = baseline[..., :3].mean(axis=2) / 4 + 192
+    image = numpy.empty(baseline.shape[:2] + (4,), dtype=numpy.uint8)
+    image[..., :3] = grey[..., numpy.newaxis]
+    image[..., 3] = 255
+    image[mask] = (255, 0, 0, 255)
+
+    return image
+
+
+def image_to_array(image):
+    import numpy
+    from PyQt5 import QtGui
+
+    image = image.convertToFormat(QtGui.QImage.Format_RGBA8888)
+    pointer = image.constBits()
+    pointer.setsize(image.byteCount())
+    rows = numpy.frombuffer(pointer, dtype=numpy.uint8).reshape(
+        image.height(),
+        image.bytesPerLine(),
+    )
+
+    # Rows may be padded beyond the pixels
+    return rows[:, :image.width() * 4].reshape(
+        image.height(),
+        image.width(),
+        4,
+    ).copy()
+
+
+def array_to_image(array):
+    from PyQt5 import QtGui
+
+    height, width = array.shape[:2]
+    data = array.tobytes()
+    image = QtGui.QImage(
+        data,
+        width,
+        height,
+        width * 4,
+        QtGui.QImage.Format_RGBA8888,
+    )
+
+    # The QImage only borrows the bytes
+    return image.copy()
+
+
+def render_env(env, qml2_import_paths=(), qt_debug_plugins=False):
+    """
+    A copy of ``env`` for rendering offscreen with PyQt5's own Qt.  Unlike
+    when running ``qmlscene`` the bundled Qt's plugins and QML modules are
+    left out, being from a build PyQt5's Qt can't load.
+    """
+    env = dict(env)
+
+    env['QML2_IMPORT_PATH'] = os.pathsep.join(
+        path
+        for path in (*qml2_import_paths, env.get('QML2_IMPORT_PATH', ''))
+        if len(path) > 0
+    )
+    env['QT_QPA_PLATFORM'] = 'offscreen'
+    # Qt Quick otherwise wants OpenGL which the offscreen platform lacks
+    env.setdefault('QT_QUICK_BACKEND', 'software')
+
+    if qt_debug_plugins:
+        env['QT_DEBUG_PLUGINS'] = '1'
+
+    return env
+
+
+def ensure_application(env):
+    global _application
+
+    if _application is not None:
+        return
+
+    # Before PyQt5 is imported so Qt sees the paths and platform
+    os.environ.update(env)
+
+    from PyQt5 import QtGui
+
+    _application = QtGui.QGuiApplication(['pyqt5qmlscene'])
+
+
+def render(qml_path, image_path, width, height, timeout=10):
+    """Save the first frame of the QML file, returning any errors."""
+    from PyQt5 import QtCore, QtQuick
+
+    view = QtQuick.QQuickView()
+    if width is not None and height is not None:
+        view.setResizeMode(QtQuick.QQuickView.SizeRootObjectToView)
+        view.resize(width, height)
+    view.setSource(QtCore.QUrl.fromLocalFile(qml_path))
+
+    errors = [error.toString() for error in view.errors()]
+    if len(errors) == 0:
+        view.show()
+
+        # Grabbing the window comes back empty on the offscreen platform
+        # with the software backend, the item can still be grabbed.
+        grab = view.rootObject().grabToImage()
+        loop = QtCore.QEventLoop()
+        grab.ready.connect(loop.quit)
+        QtCore.QTimer.singleShot(int(timeout * 1000), loop.quit)
+        loop.exec_()
+
+        image = grab.image()
+        if image.isNull():
+            errors.append('Nothing rendered within {} seconds'.format(timeout))
+        else:
+            os.makedirs(os.path.dirname(image_path), exist_ok=True)
+            if not image.save(image_path):
+                errors.append('Unable to write {}'.format(image_path))
+
+    view.close()
+    view.deleteLater()
+    QtCore.QCoreApplication.processEvents()
+
+    return errors
+
+
+def check(snapshot, env, tolerance, width=None, height=None):
+    """Render a snapshot and compare it with its baseline, in a worker."""
+    ensure_application(env)
+
+    from PyQt5 import QtGui
+
+    try:
+        errors = render(
+            qml_path=snapshot.qml,
+            image_path=snapshot.image,
+            width=width,
+            height=height,
+        )
+    except Exception as e:
+        errors = [repr(e)]
+
+    # A diff left from an earlier run would be mistaken for this one's
+    if os.path.exists(snapshot.diff):
+        os.remove(snapshot.diff)
+
+    if len(errors) > 0:
+        return Result(
+            snapshot=snapshot,
+            status='error',
+            changed_pixels=None,
+            message='\n'.join(errors),
+        )
+
+    if not os.path.exists(snapshot.baseline):
+        return Result(
+            snapshot=snapshot,
+            status='new',
+            changed_pixels=None,
+            message='No baseline image',
+        )
+
+    actual = image_to_array(QtGui.QImage(snapshot.image))
+    baseline = image_to_array(QtGui.QImage(snapshot.baseline))
+
+    if actual.shape != baseline.shape:
+        return Result(
+            snapshot=snapshot,
+            status='changed',
+            changed_pixels=None,
+            message='Size changed from {}x{} to {}x{}'.format(
+                baseline.shape[1],
+                baseline.shape[0],
+                actual.shape[1],
+                actual.shape[0],
+            ),
+        )
+
+    mask = changed_mask(actual, baseline, tolerance=tolerance)
+    changed_pixels = int(mask.sum())
+
+    if changed_pixels == 0:
+        return Result(
+            snapshot=snapshot,
+            status='unchanged',
+            changed_pixels=0,
+            message=None,
+        )
+
+    array_to_image(diff_image(baseline, mask)).save(snapshot.diff)
+
+    return Result(
+        snapshot=snapshot,
+        status='changed',
+        changed_pixels=changed_pixels,
+        message='{} pixels changed, see {}'.format(
+            changed_pixels,
+            snapshot.diff,
+        ),
+    )
+
+
+def check_all(snapshots, env, tolerance, jobs=None, width=None, height=None):
+    """Check the snapshots across a pool of processes, in the given order."""
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(
+                check,
+                snapshot,
+                env=env,
+                tolerance=tolerance,
+                width=width,
+                height=height,
+            )
+            for snapshot in snapshots
+        ]
+
+        for future in futures:
+            yield future.result()
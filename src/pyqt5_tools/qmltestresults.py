@@ -0,0 +1,295 @@
+"""
+Follow ``qmltestrunner`` results as they are output, in the plain text or
+xunitxml format.
+
+The text format gives no durations so each test is timed from the previous
+result arriving.  Qt 5 writes xunitxml only once all tests have run, so the
+results come together at the end.
+"""
+import collections
+import re
+import subprocess
+import time
+import xml.etree.ElementTree
+
+import pyqt5_tools.readiness
+
+
+TestResult = collections.namedtuple(
+    'TestResult',
+    ('name', 'result', 'seconds', 'message'),
+)
+
+failing_results = {'fail', 'xpass', 'error'}
+
+text_results = {
+    'PASS': 'pass',
+    'FAIL!': 'fail',
+    'XFAIL': 'xfail',
+    'XPASS': 'xpass',
+    'SKIP': 'skip',
+    'BPASS': 'bpass',
+    'BFAIL': 'bfail',
+    'BXPASS': 'bxpass',
+    'BXFAIL': 'bxfail',
+    'BSKIP': 'bskip',
+}
+
+text_result_pattern = re.compile(
+    r'^(?P<result>{})\s*: (?P<name>\S+?\(.*?\))'
+    r'(?: (?P<message>.*))?$'.format(
+        '|'.join(re.escape(result) for result in text_results),
+    ),
+)
+
+
+class TextParser:
+    """
+    Each fed line gives the results it completes, in order with any other
+    lines, such as warnings, as strings.  A failure is complete once its
+    message has ended, at its location or the next line not part of it.
+    """
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.last = clock()
+        self.pending = None
+
+    def feed(self, text):
+        results = []
+
+        for line in text.splitlines():
+            if self.pending is not None and line[:1].isspace():
+                self.pending = self.pending._replace(
+                    message='\n'.join(
+                        part
+                        for part in (self.pending.message, line.strip())
+                        if part is not None
+                    ),
+                )
+                if line.strip().startswith('Loc: ['):
+                    # QTest ends a message with its location when it has one
+                    results.extend(self.close())
+                continue
+
+            results.extend(self.close())
+
+            match = text_result_pattern.match(line)
+            if match is None:
+                results.append(line)
+                continue
+
+            now = self.clock()
+            name = match.group('name')
+            if name.endswith('()'):
+                name = name[:-2]
+
+            result = TestResult(
+                name=name,
+                result=text_results[match.group('result')],
+                seconds=now - self.last,
+                message=match.group('message'),
+            )
+            self.last = now
+
+            if result.result in ('pass', 'bpass'):
+                results.append(result)
+            else:
+                self.pending = result
+
+        return results
+
+    def close(self):
+        if self.pending is None:
+            return []
+
+        result, self.pending = self.pending, None
+
+        return [result]
+
+
+class XunitParser:
+    """Gives the results of each ``testcase`` once it has ended."""
+    def __init__(self):
+        self.parser = xml.etree.ElementTree.XMLPullParser(events=('end',))
+
+    def feed(self, text):
+        self.parser.feed(text)
+
+        return self.read_events()
+
+    def close(self):
+        self.parser.close()
+
+        return self.read_events()
+
+    def read_events(self):
+        results = []
+
+        for event, element in self.parser.read_events():
+            if element.tag != 'testcase':
+                continue
+
+            results.append(self.testcase_result(element))
+            # Keep the document from growing with the suite
+            element.clear()
+
+        return results
+
+    @staticmethod
+    def testcase_result(element):
+        result = element.get('result')
+        message = None
+
+        for child in element:
+            if child.tag in ('failure', 'error', 'skipped'):
+                message = child.get('message')
+                if result is None:
+                    result = {
+                        'failure': 'fail',
+                        'error': 'error',
+                        'skipped': 'skip',
+                    }[child.tag]
+
+        name = element.get('name')
+        classname = element.get('classname')
+        if classname is not None:
+            name = '{}::{}'.format(classname, name)
+
+        seconds = element.get('time')
+
+        return TestResult(
+            name=name,
+            result='pass' if result is None else result,
+            seconds=None if seconds is None else float(seconds),
+            message=message,
+        )
+
+
+parsers = {
+    'txt': TextParser,
+    'xunitxml': XunitParser,
+}
+
+
+def output_format(args):
+    """
+    The format ``qmltestrunner`` writes to stdout with these arguments, None
+    when it is one that can't be followed.
+    """
+    format_ = 'txt'
+
+    for arg, value in zip(args, [*args[1:], None]):
+        if arg == '-o' and value is not None and ',' in value:
+            destination, value_format = value.rsplit(',', 1)
+            if destination == '-':
+                format_ = value_format
+        elif arg.startswith('-') and arg[1:] in (
+                'txt', 'csv', 'xml', 'lightxml', 'xunitxml', 'teamcity',
+                'tap', 'junitxml',
+        ):
+            format_ = arg[1:]
+
+    if format_ not in parsers:
+        return None
+
+    return format_
+
+
+def format_result(result):
+    duration = ''
+    if result.seconds is not None:
+        duration = ' ({:.3f} s)'.format(result.seconds)
+
+    lines = ['{:<6} {}{}'.format(result.result.upper(), result.name, duration)]
+
+    if result.message is not None and result.result != 'pass':
+        lines.extend(
+            '    ' + line
+            for line in result.message.splitlines()
+        )
+
+    return '\n'.join(lines)
+
+
+def slow_report(results, threshold):
+    slow = sorted(
+        (
+            result
+            for result in results
+            if result.seconds is not None and result.seconds >= threshold
+        ),
+        key=lambda result: result.seconds,
+        reverse=True,
+    )
+
+    if len(slow) == 0:
+        return 'No tests took {} s or more'.format(threshold)
+
+    return '\n'.join([
+        '{} tests took {} s or more:'.format(len(slow), threshold),
+        *(
+            '  {:8.3f} s  {}'.format(result.seconds, result.name)
+            for result in slow
+        ),
+    ])
+
+
+def parsed(parser, stream):
+    for line in iter(stream.readline, ''):
+        yield parser.feed(line)
+
+    yield parser.close()
+
+
+def run(command, env, format_='txt', maxfail=None, slow_threshold=1.0,
+        popen=subprocess.Popen, echo=print):
+    """
+    Run ``qmltestrunner`` showing each result as it arrives, terminating it
+    once ``maxfail`` tests have failed.  Returns the exit code and results.
+    """
+    parser = parsers[format_]()
+    results = []
+    failures = 0
+    stopped = False
+
+    process = popen(
+        command,
+        env=env,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    )
+
+    with process:
+        try:
+            for new_results in parsed(parser, process.stdout):
+                for result in new_results:
+                    if isinstance(result, str):
+                        echo(result)
+                        continue
+
+                    results.append(result)
+                    echo(format_result(result))
+
+                    if result.result in failing_results:
+                        failures += 1
+
+                    if maxfail is not None and failures >= maxfail:
+                        stopped = True
+                        break
+
+                if stopped:
+                    break
+        except BaseException:
+            process.kill()
+            raise
+
+        if stopped:
+            echo('Stopping after {} failed tests'.format(failures))
+            pyqt5_tools.readiness.terminate(process)
+            returncode = 1
+        else:
+            returncode = process.wait()
+
+    echo(slow_report(results, threshold=slow_threshold))
+
+    return returncode, results
@@ -0,0 +1,81 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+
+ready_path_env_var = 'PYQT5TOOLS_READY_PATH'
+
+
+def signal_ready():
+    """
+    Tell a launcher started with ``--exit-when-ready`` that whatever it was
+    waiting for has happened.  Does nothing when not launched that way.
+    """
+    path = os.environ.get(ready_path_env_var)
+    if path is None:
+        return False
+
+    with open(path, 'a'):
+        pass
+
+    return True
+
+
+def terminate(process, timeout=5):
+    process.terminate()
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def run_until_ready(command, env, timeout=None, interval=0.05,
+                    popen=subprocess.Popen):
+    """
+    Run the command and terminate it as soon as it signals readiness.
+    Returns 0 once ready, otherwise a non-zero code if the command exits
+    or the timeout passes first.
+    """
+    directory = tempfile.mkdtemp(prefix='pyqt5-tools-')
+    path = os.path.join(directory, 'ready')
+    env = dict(env)
+    env[ready_path_env_var] = path
+
+    try:
+        process = popen(command, env=env)
+        start = time.monotonic()
+
+        while True:
+            if os.path.exists(path):
+                terminate(process)
+                return 0
+
+            returncode = process.poll()
+            if returncode is not None:
+                # It may have signalled just before exiting
+                if os.path.exists(path):
+                    return 0
+
+                print(
+                    'Exited with {} before signalling readiness'.format(
+                        returncode,
+                    ),
+                    file=sys.stderr,
+                )
+                return returncode if returncode != 0 else 1
+
+            if timeout is not None and time.monotonic() - start > timeout:
+                terminate(process)
+                print(
+                    'Not ready after {} seconds'.format(timeout),
+                    file=sys.stderr,
+                )
+                return 1
+
+            time.sleep(interval)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,176 @@
+"""
+Sample the memory, CPU time and threads of a launched program from ``/proc``
+while it runs.
+"""
+import collections
+import json
+import os
+import subprocess
+import threading
+import time
+
+
+Sample = collections.namedtuple(
+    'Sample',
+    ('seconds', 'rss', 'cpu_seconds', 'threads'),
+)
+
+
+def available():
+    return os.path.exists('/proc/self/stat')
+
+
+def parse_stat(text, page_size, ticks_per_second):
+    """
+    The state, CPU seconds, threads and resident bytes from the contents of
+    ``/proc/<pid>/stat``.
+    """
+    # The command name is in parentheses and may contain spaces
+    fields = text[text.rindex(')') + 2:].split()
+
+    state = fields[0]
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / ticks_per_second
+    threads = int(fields[17])
+    rss = int(fields[21]) * page_size
+
+    return state, cpu_seconds, threads, rss
+
+
+def peaks(samples):
+    if len(samples) == 0:
+        return {
+            'rss': None,
+            'cpu_seconds': None,
+            'threads': None,
+        }
+
+    return {
+        'rss': max(sample.rss for sample in samples),
+        'cpu_seconds': max(sample.cpu_seconds for sample in samples),
+        'threads': max(sample.threads for sample in samples),
+    }
+
+
+class Monitor:
+    """
+    Start processes with :meth:`popen` to have them sampled every
+    ``interval`` seconds on a background thread until they exit.
+    """
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self.samples = []
+        self.command = None
+        self.started = None
+        self.finished = None
+        self.returncode = None
+        self.thread = None
+        self.stopping = threading.Event()
+        self.children_before = None
+        self.children_cpu_seconds = None
+        self.children_max_rss = None
+        self.page_size = os.sysconf('SC_PAGE_SIZE')
+        self.ticks_per_second = os.sysconf('SC_CLK_TCK')
+
+    def popen(self, command, **kwargs):
+        import resource
+
+        self.children_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        self.command = list(command)
+        self.started = time.monotonic()
+
+        process = subprocess.Popen(command, **kwargs)
+
+        self.thread = threading.Thread(
+            target=self.sample_until_exit,
+            args=(process.pid,),
+            daemon=True,
+        )
+        self.thread.start()
+
+        return process
+
+    def sample_until_exit(self, pid):
+        try:
+            fd = os.open('/proc/{}/stat'.format(pid), os.O_RDONLY)
+        except OSError:
+            return
+
+        try:
+            while True:
+                # Rereading the open file is cheaper than opening it each time
+                try:
+                    text = os.pread(fd, 4096, 0).decode('ascii', 'replace')
+                except OSError:
+                    return
+
+                state, cpu_seconds, threads, rss = parse_stat(
+                    text,
+                    page_size=self.page_size,
+                    ticks_per_second=self.ticks_per_second,
+                )
+                if state in ('Z', 'X'):
+                    return
+
+                self.samples.append(Sample(
+                    seconds=time.monotonic() - self.started,
+                    rss=rss,
+                    cpu_seconds=cpu_seconds,
+                    threads=threads,
+                ))
+
+                if self.stopping.wait(self.interval):
+                    return
+        finally:
+            os.close(fd)
+
+    def stop(self, returncode):
+        """Call once the process has been waited for."""
+        import resource
+
+        self.returncode = returncode
+        if self.thread is None:
+            return
+
+        self.finished = time.monotonic()
+        self.stopping.set()
+        self.thread.join()
+
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        self.children_cpu_seconds = (
+            children.ru_utime - self.children_before.ru_utime
+            + children.ru_stime - self.children_before.ru_stime
+        )
+        # The largest of every child waited for so far, so only known to be
+        # this program's when none were before it.  In kilobytes on Linux.
+        if self.children_before.ru_maxrss == 0:
+            self.children_max_rss = children.ru_maxrss * 1024
+
+    def report(self):
+        peak = peaks(self.samples)
+
+        # Samples can miss the end, the kernel's accounting doesn't
+        if self.children_cpu_seconds is not None:
+            peak['cpu_seconds'] = self.children_cpu_seconds
+        if self.children_max_rss is not None:
+            peak['rss'] = max(peak['rss'] or 0, self.children_max_rss)
+
+        return {
+            'command': self.command,
+            'returncode': self.returncode,
+            'interval': self.interval,
+            'seconds': (
+                None
+                if self.finished is None
+                else self.finished - self.started
+            ),
+            'peak': peak,
+            'samples': [sample._asdict() for sample in self.samples],
+        }
+
+    def write(self, path):
+        report = self.report()
+
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=4)
+
+        return report
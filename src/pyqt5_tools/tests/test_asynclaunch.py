@@ -0,0 +1,149 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+import pyqt5_tools.asynclaunch
+import pyqt5_tools.entrypoints
+
+
+def python(code):
+    return [sys.executable, '-c', code]
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_streams_lines_from_concurrent_launches():
+    async def main():
+        outputs = [[] for _ in range(3)]
+        errors = []
+        launches = [
+            await pyqt5_tools.asynclaunch.start(
+                python(
+                    'import sys\n'
+                    'print("one {0}")\n'
+                    'print("two {0}")\n'
+                    'print("oops", file=sys.stderr)\n'
+                    'raise SystemExit({0})\n'.format(i),
+                ),
+                env=os.environ,
+                stdout=output.append,
+                stderr=errors.append,
+            )
+            for i, output in enumerate(outputs)
+        ]
+
+        returncodes = await asyncio.gather(*(
+            launch.wait(timeout=30)
+            for launch in launches
+        ))
+
+        return outputs, errors, returncodes
+
+    outputs, errors, returncodes = run(main())
+
+    assert outputs == [
+        ['one {}'.format(i), 'two {}'.format(i)]
+        for i in range(3)
+    ]
+    assert errors == ['oops'] * 3
+    assert returncodes == [0, 1, 2]
+
+
+def test_timeout_terminates():
+    async def main():
+        launch = await pyqt5_tools.asynclaunch.start(
+            python('import time; time.sleep(60)'),
+            env=os.environ,
+        )
+
+        with pytest.raises(asyncio.TimeoutError):
+            await launch.wait(timeout=0.2)
+
+        return launch
+
+    start = time.monotonic()
+    launch = run(main())
+
+    assert launch.returncode is not None
+    assert time.monotonic() - start < 30
+
+
+def test_cancelling_wait_terminates():
+    async def main():
+        launch = await pyqt5_tools.asynclaunch.start(
+            python('import time; time.sleep(60)'),
+            env=os.environ,
+        )
+        task = asyncio.ensure_future(launch.wait())
+        await asyncio.sleep(0.2)
+        task.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        return launch
+
+    launch = run(main())
+
+    assert launch.returncode is not None
+
+
+def test_environment_is_memoized_and_copied():
+    env = {'PATH': 'base'}
+    first = pyqt5_tools.asynclaunch.environment(
+        'qml',
+        env=env,
+        paths=['imports'],
+        headless_platform='offscreen',
+    )
+    first['QT_QPA_PLATFORM'] = 'changed'
+
+    cache_info = pyqt5_tools.asynclaunch._cached_env.cache_info
+    hits = cache_info().hits
+    second = pyqt5_tools.asynclaunch.environment(
+        'qml',
+        env=env,
+        paths=['imports'],
+        headless_platform='offscreen',
+    )
+
+    assert cache_info().hits == hits + 1
+    assert second['QT_QPA_PLATFORM'] == 'offscreen'
+    assert second['QML2_IMPORT_PATH'].startswith('imports' + os.pathsep)
+    assert second == pyqt5_tools.entrypoints.qml_env(
+        env,
+        qml2_import_paths=['imports'],
+        headless_platform='offscreen',
+    )
+
+
+def test_environment_cache_ignores_unrelated_variables():
+    def environment(env):
+        return pyqt5_tools.asynclaunch.environment(
+            'designer',
+            env=env,
+            paths=['widgets'],
+        )
+
+    environment({'PATH': 'base', 'UNRELATED': 'one'})
+
+    cache_info = pyqt5_tools.asynclaunch._cached_env.cache_info
+    hits = cache_info().hits
+    env = {'PATH': 'base', 'UNRELATED': 'two'}
+    second = environment(env)
+
+    assert cache_info().hits == hits + 1
+    assert second['UNRELATED'] == 'two'
+    assert second == pyqt5_tools.entrypoints.designer_env(
+        env,
+        widget_paths=['widgets'],
+    )
@@ -0,0 +1,35 @@
+import pyqt5_tools.designmode
+
+
+def test_active_inside_create_widget(monkeypatch):
+    monkeypatch.delenv(pyqt5_tools.designmode.design_mode_env_var, raising=False)
+
+    assert not pyqt5_tools.designmode.active()
+
+    created = pyqt5_tools.designmode.create_widget(
+        lambda parent: (parent, pyqt5_tools.designmode.active()),
+        'parent',
+    )
+
+    assert created == ('parent', True)
+    assert not pyqt5_tools.designmode.active()
+
+
+def test_active_from_environment(monkeypatch):
+    monkeypatch.setenv(pyqt5_tools.designmode.design_mode_env_var, '1')
+
+    assert pyqt5_tools.designmode.active()
+
+
+def test_shared_is_created_once():
+    calls = []
+
+    def factory():
+        calls.append(None)
+        return object()
+
+    first = pyqt5_tools.designmode.shared('test shared', factory)
+    second = pyqt5_tools.designmode.shared('test shared', factory)
+
+    assert first is second
+    assert len(calls) == 1
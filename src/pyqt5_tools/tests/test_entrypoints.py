@@ -3,8 +3,6 @@ import pathlib
 import subprocess
 import sys
 
-import pytest
-
 import pyqt5_tools.tests.testbutton
 import pyqt5_tools.tests.testbuttonplugin
 import pyqt5_tools.examples.exampleqmlitem
@@ -22,18 +20,19 @@ def test_designer_creates_test_widget(tmp_path):
         pyqt5_tools.tests.testbuttonplugin.__file__,
     ).parent
 
-    with pytest.raises(subprocess.TimeoutExpired):
-        subprocess.run(
-            [
-                fspath(
-                    pathlib.Path(sys.executable).with_name('pyqt5designer'),
-                ),
-                '--widget-path', fspath(widget_plugin_path),
-            ],
-            check=True,
-            env=env,
-            timeout=10,
-        )
+    subprocess.run(
+        [
+            fspath(
+                pathlib.Path(sys.executable).with_name('pyqt5designer'),
+            ),
+            '--widget-path', fspath(widget_plugin_path),
+            '--exit-when-ready',
+            '--headless',
+        ],
+        check=True,
+        env=env,
+        timeout=30,
+    )
 
     assert (
         file_path.read_bytes()
@@ -46,18 +45,19 @@ def test_qmlscene_paints_test_item(tmp_path):
     file_path = tmp_path/'eeyore'
     env[pyqt5_tools.examples.exampleqmlitem.test_path_env_var] = fspath(file_path)
 
-    with pytest.raises(subprocess.TimeoutExpired):
-        subprocess.run(
-            [
-                fspath(
-                    pathlib.Path(sys.executable).with_name('pyqt5qmlscene'),
-                ),
-                '--run-qml-example',
-            ],
-            check=True,
-            env=env,
-            timeout=10,
-        )
+    subprocess.run(
+        [
+            fspath(
+                pathlib.Path(sys.executable).with_name('pyqt5qmlscene'),
+            ),
+            '--run-qml-example',
+            '--exit-when-ready',
+            '--headless',
+        ],
+        check=True,
+        env=env,
+        timeout=30,
+    )
 
     assert (
         file_path.read_bytes()
@@ -76,6 +76,7 @@ def test_qmltestrunner_paints_test_item(tmp_path):
                 pathlib.Path(sys.executable).with_name('pyqt5qmltestrunner'),
             ),
             '--test-qml-example',
+            '--headless',
         ],
         check=True,
         env=env,
@@ -86,3 +87,16 @@ def test_qmltestrunner_paints_test_item(tmp_path):
         file_path.read_bytes()
         == pyqt5_tools.examples.exampleqmlitem.test_file_contents
     )
+
+
+def test_tools_list_includes_designer():
+    output = subprocess.check_output(
+        [
+            fspath(pathlib.Path(sys.executable).with_name('pyqt5-tools')),
+            'list',
+        ],
+        timeout=10,
+    )
+
+    names = [line.split(b':', 1)[0] for line in output.splitlines()]
+    assert b'designer' in names
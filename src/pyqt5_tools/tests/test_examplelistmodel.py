@@ -0,0 +1,99 @@
+import array
+
+import pytest
+from PyQt5 import QtCore
+
+import pyqt5_tools.examples.examplelistmodel
+
+
+value_role = QtCore.Qt.UserRole
+count_role = QtCore.Qt.UserRole + 1
+
+
+@pytest.fixture
+def model():
+    model = pyqt5_tools.examples.examplelistmodel.ExampleListModel()
+    model.batch_size = 10
+
+    return model
+
+
+def test_append_fetches_in_batches(model):
+    inserted = []
+    model.rowsInserted.connect(
+        lambda parent, first, last: inserted.append((first, last)),
+    )
+
+    model.append(
+        value=array.array('d', range(25)),
+        count=list(range(25)),
+    )
+
+    assert model.stored_rows() == 25
+    assert model.rowCount() == 10
+    assert model.canFetchMore(QtCore.QModelIndex())
+
+    while model.canFetchMore(QtCore.QModelIndex()):
+        model.fetchMore(QtCore.QModelIndex())
+
+    assert inserted == [(0, 9), (10, 19), (20, 24)]
+    assert model.data(model.index(24), value_role) == 24.0
+    assert model.data(model.index(24), count_role) == 24
+
+
+def test_replace_notifies_visible_rows(model):
+    model.append(value=[0.0] * 20, count=[0] * 20)
+    changed = []
+    model.dataChanged.connect(
+        lambda first, last, roles: changed.append((first.row(), last.row())),
+    )
+
+    model.replace(8, value=[1.0] * 4, count=[1] * 4)
+
+    assert changed == [(8, 9)]
+    assert list(model.data_columns['count'][7:13]) == [0, 1, 1, 1, 1, 0]
+
+    with pytest.raises(IndexError):
+        model.replace(18, value=[1.0] * 4, count=[1] * 4)
+
+
+def test_reset_and_validation(model):
+    model.append(value=[1.0], count=[1])
+
+    with pytest.raises(ValueError):
+        model.reset(value=[1.0, 2.0], count=[1])
+    assert model.stored_rows() == 1
+
+    model.reset(value=[2.0, 3.0], count=[2, 3])
+    assert model.rowCount() == 2
+    assert model.data(model.index(0), QtCore.Qt.DisplayRole) == 2.0
+
+    model.reset()
+    assert model.rowCount() == 0
+
+
+def test_failed_conversion_leaves_rows_unchanged(model):
+    model.append(value=[1.0], count=[1])
+
+    with pytest.raises(TypeError):
+        model.append(value=[2.0], count=[2.5])
+    with pytest.raises(TypeError):
+        model.replace(0, value=[2.0], count=[2.5])
+
+    assert model.stored_rows() == 1
+    assert len(model.data_columns['count']) == 1
+    assert model.data(model.index(0), value_role) == 1.0
+    assert model.data(model.index(0), count_role) == 1
+
+
+def test_role_names_include_display(model):
+    names = {
+        bytes(name): role
+        for role, name in model.roleNames().items()
+    }
+
+    assert names == {
+        b'display': QtCore.Qt.DisplayRole,
+        b'value': value_role,
+        b'count': count_role,
+    }
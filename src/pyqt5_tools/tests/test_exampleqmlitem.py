@@ -0,0 +1,48 @@
+import pytest
+
+import pyqt5_tools.examples.exampleqmlitem
+
+
+@pytest.fixture
+def item():
+    return pyqt5_tools.examples.exampleqmlitem.ExampleQmlItem()
+
+
+def record(signal):
+    emitted = []
+    signal.connect(emitted.append)
+
+    return emitted
+
+
+def test_unchanged_value_is_not_notified(item):
+    emitted = record(item.test_value_changed)
+
+    item.test_value = 'pass the test'
+    item.test_value = 'changed'
+    item.test_value = 'changed'
+
+    assert emitted == ['changed']
+
+
+def test_queued_values_notify_once_per_flush(item):
+    test_values = record(item.test_value_changed)
+    other_values = record(item.other_value_changed)
+
+    item.queue_values(test_value='first', other_value='one')
+    item.queue_values(test_value='second')
+
+    assert test_values == []
+    assert item.flush_timer.isActive()
+
+    item.flush()
+
+    assert test_values == ['second']
+    assert other_values == ['one']
+    assert item.other_value == 'one'
+
+    item.queue_values(test_value='second', other_value='two')
+    item.flush()
+
+    assert test_values == ['second']
+    assert other_values == ['one', 'two']
@@ -0,0 +1,120 @@
+import os
+import subprocess
+import sys
+import zipfile
+
+import pytest
+
+import pyqt5_tools.pluginbundle
+
+
+fspath = getattr(os, 'fspath', str)
+
+
+@pytest.fixture
+def widgets(tmp_path):
+    widgets = tmp_path/'widgets'
+    (widgets/'package'/'sub').mkdir(parents=True)
+    (widgets/'notpackage').mkdir()
+    (widgets/'__init__.py').write_text('')
+    (widgets/'mywidgetplugin.py').write_text(
+        'import helper\n'
+        'import package.sub.deep\n'
+        'class MyWidgetPlugin:\n'
+        '    value = helper.value + package.sub.deep.value\n'
+        'def fail():\n'
+        '    raise Exception("from the plugin")\n'
+    )
+    (widgets/'helper.py').write_text('value = 1\n')
+    (widgets/'package'/'__init__.py').write_text('')
+    (widgets/'package'/'sub'/'__init__.py').write_text('')
+    (widgets/'package'/'sub'/'deep.py').write_text('value = 2\n')
+    (widgets/'notpackage'/'ignored.py').write_text('')
+
+    return widgets
+
+
+def test_archive_holds_compiled_modules(widgets, tmp_path):
+    bundle = pyqt5_tools.pluginbundle.build(
+        widget_paths=[widgets],
+        cache_directory=tmp_path/'cache',
+    )
+
+    with zipfile.ZipFile(bundle.archive) as archive:
+        names = sorted(archive.namelist())
+
+    assert names == [
+        '_bundled_mywidgetplugin.pyc',
+        'helper.pyc',
+        'package/__init__.pyc',
+        'package/sub/__init__.pyc',
+        'package/sub/deep.pyc',
+    ]
+    assert os.listdir(bundle.stubs) == ['mywidgetplugin.py']
+
+
+def test_stub_imports_from_archive(widgets, tmp_path):
+    bundle = pyqt5_tools.pluginbundle.build(
+        widget_paths=[widgets],
+        cache_directory=tmp_path/'cache',
+    )
+
+    # Imported as by Designer, with the stub directory on sys.path
+    output = subprocess.check_output(
+        [
+            sys.executable,
+            '-c',
+            'import sys, traceback\n'
+            'sys.path.insert(0, sys.argv[1])\n'
+            'import mywidgetplugin\n'
+            'print(mywidgetplugin.MyWidgetPlugin.value)\n'
+            'try:\n'
+            '    mywidgetplugin.fail()\n'
+            'except Exception:\n'
+            '    print(traceback.format_exc())\n',
+            bundle.stubs,
+        ],
+        env=dict(os.environ, PYTHONPATH=bundle.archive),
+        cwd=fspath(tmp_path),
+        universal_newlines=True,
+    )
+
+    lines = output.splitlines()
+    assert lines[0] == '3'
+    # Tracebacks point at, and show, the original source
+    assert fspath(widgets/'mywidgetplugin.py') in output
+    assert 'raise Exception("from the plugin")' in output
+
+
+def test_rebuilt_only_when_sources_change(widgets, tmp_path):
+    cache = tmp_path/'cache'
+
+    first = pyqt5_tools.pluginbundle.build([widgets], cache_directory=cache)
+    again = pyqt5_tools.pluginbundle.build([widgets], cache_directory=cache)
+
+    assert first.built
+    assert not again.built
+    assert again.archive == first.archive
+
+    helper = widgets/'helper.py'
+    helper.write_text('value = 10\n')
+    stat = helper.stat()
+    os.utime(fspath(helper), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    changed = pyqt5_tools.pluginbundle.build([widgets], cache_directory=cache)
+
+    assert changed.built
+    assert changed.archive != first.archive
+    assert not os.path.exists(first.archive)
+
+
+def test_syntax_errors_are_left_for_import(widgets, tmp_path):
+    (widgets/'brokenplugin.py').write_text('def (\n')
+
+    bundle = pyqt5_tools.pluginbundle.build(
+        widget_paths=[widgets],
+        cache_directory=tmp_path/'cache',
+    )
+
+    with zipfile.ZipFile(bundle.archive) as archive:
+        assert '_bundled_brokenplugin.py' in archive.namelist()
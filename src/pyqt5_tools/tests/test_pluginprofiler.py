@@ -0,0 +1,74 @@
+import importlib
+import sys
+import textwrap
+
+import pytest
+
+import pyqt5_tools.pluginprofiler
+
+
+class FakePluginBase:
+    def initialize(self, core):
+        pass
+
+    def createWidget(self, parent):
+        pass
+
+
+@pytest.fixture
+def profiler(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    sys.modules['fakepluginbase'] = sys.modules[__name__]
+
+    profiler = pyqt5_tools.pluginprofiler.Profiler(
+        paths=[str(tmp_path)],
+        report_path=str(tmp_path/'report.txt'),
+        plugin_base=FakePluginBase,
+    )
+    profiler.install()
+    try:
+        yield profiler
+    finally:
+        profiler.uninstall()
+        for name in ('fakepluginbase', 'piglethelper', 'pigletplugin'):
+            sys.modules.pop(name, None)
+
+
+def test_profiles_plugin_events(tmp_path, profiler):
+    (tmp_path/'piglethelper.py').write_text('data = list(range(10000))\n')
+    (tmp_path/'pigletplugin.py').write_text(textwrap.dedent('''\
+        import fakepluginbase
+        import piglethelper
+
+
+        class PigletPlugin(fakepluginbase.FakePluginBase):
+            def initialize(self, core):
+                self.core = core
+
+            def createWidget(self, parent):
+                return [parent]
+    '''))
+
+    module = importlib.import_module('pigletplugin')
+    plugin = module.PigletPlugin()
+    plugin.initialize(core='core')
+    assert plugin.createWidget(parent=1) == [1]
+    assert plugin.createWidget(parent=2) == [2]
+    assert plugin.core == 'core'
+
+    events = [(event.plugin, event.event) for event in profiler.events]
+    assert events == [
+        ('pigletplugin', 'import'),
+        ('pigletplugin.PigletPlugin', 'initialize'),
+        ('pigletplugin.PigletPlugin', 'createWidget'),
+    ]
+
+    imports = {i.name: i for i in profiler.imports}
+    assert imports['piglethelper'].depth == 1
+    assert imports['pigletplugin'].depth == 0
+    assert imports['piglethelper'].memory > 0
+
+    profiler.write()
+    report = (tmp_path/'report.txt').read_text()
+    assert 'pigletplugin.PigletPlugin' in report
+    assert 'piglethelper' in report
@@ -0,0 +1,130 @@
+import os
+import pathlib
+
+import pytest
+
+import pyqt5_tools.qmlimports
+
+
+fspath = getattr(os, 'fspath', str)
+
+
+def test_parse_imports_skips_comments_and_directories():
+    imports = pyqt5_tools.qmlimports.parse_imports('''
+        import QtQuick 2.0
+        import QtQuick.Controls 2.3 as Controls
+        // import Commented 1.0
+        /* import Block 1.0 */
+        import "relative"
+        import "script.js" as Script
+        import Unversioned
+    ''')
+
+    assert imports == [
+        ('QtQuick', 2, 0),
+        ('QtQuick.Controls', 2, 3),
+        ('Unversioned', None, None),
+    ]
+
+
+@pytest.fixture
+def tree(tmp_path):
+    paths = [tmp_path/name for name in ('empty', 'first', 'second', 'unused')]
+    for path in paths:
+        path.mkdir()
+
+    (paths[1]/'Foo'/'Bar.1').mkdir(parents=True)
+    (paths[1]/'Foo'/'Bar.1'/'qmldir').write_text(
+        'module Foo.Bar\ndepends Baz 1.0\nWidget 1.0 Widget.qml\n',
+    )
+    (paths[1]/'Foo'/'Bar.1'/'Widget.qml').write_text('import Qux 1.0\n')
+    (paths[2]/'Baz').mkdir()
+    (paths[2]/'Baz'/'qmldir').write_text('module Baz\n')
+    (paths[2]/'Qux').mkdir()
+    (paths[2]/'Qux'/'qmldir').write_text('module Qux\n')
+    (paths[3]/'Baz').mkdir()
+    (paths[3]/'Baz'/'qmldir').write_text('module Baz\n')
+
+    app = tmp_path/'app'
+    app.mkdir()
+    entry = app/'main.qml'
+    entry.write_text('import QtQuick 2.0\nimport Foo.Bar 1.0\n')
+
+    return entry, [fspath(path) for path in paths] + ['']
+
+
+def test_scan_keeps_only_resolving_paths(tree):
+    entry, paths = tree
+
+    import_map = pyqt5_tools.qmlimports.scan([fspath(entry)], paths)
+
+    assert import_map.paths == [paths[1], paths[2]]
+    assert import_map.unresolved == ['QtQuick']
+    assert import_map.modules['Foo.Bar'] == os.path.join(paths[1], 'Foo', 'Bar.1')
+    assert import_map.modules['Baz'] == os.path.join(paths[2], 'Baz')
+    assert import_map.modules['Qux'] == os.path.join(paths[2], 'Qux')
+    assert import_map.probes_after < import_map.probes_before
+
+
+def test_scan_finds_tests_in_subdirectories(tree, tmp_path):
+    entry, paths = tree
+    tests = tmp_path/'tests'
+    (tests/'nested').mkdir(parents=True)
+    (tests/'tst_top.qml').write_text('import QtQuick 2.0\n')
+    (tests/'nested'/'tst_nested.qml').write_text('import Baz 1.0\n')
+
+    import_map = pyqt5_tools.qmlimports.scan([fspath(tests)], paths)
+
+    assert import_map.paths == [paths[2]]
+    assert import_map.modules['Baz'] == os.path.join(paths[2], 'Baz')
+
+
+def test_versioned_directory_in_later_path_wins(tmp_path):
+    early = tmp_path/'early'/'Foo'
+    late = tmp_path/'late'/'Foo.1'
+    for path in (early, late):
+        path.mkdir(parents=True)
+        (path/'qmldir').write_text('module Foo\n')
+
+    index, directory, probes = pyqt5_tools.qmlimports.resolve(
+        pyqt5_tools.qmlimports.Import('Foo', 1, 0),
+        [fspath(tmp_path/'early'), fspath(tmp_path/'late')],
+    )
+
+    assert index == 1
+    assert directory == fspath(late)
+
+
+def test_load_caches_until_modified(tree, tmp_path, monkeypatch):
+    entry, paths = tree
+    cache_file = fspath(tmp_path/'cache'/'qmlimports.json')
+
+    first = pyqt5_tools.qmlimports.load([fspath(entry)], paths, cache_file)
+
+    def fail(*args, **kwargs):
+        raise AssertionError('Scanned despite the cache')
+
+    with monkeypatch.context() as m:
+        m.setattr(pyqt5_tools.qmlimports, 'scan', fail)
+        cached = pyqt5_tools.qmlimports.load([fspath(entry)], paths, cache_file)
+
+    assert cached == first
+
+    entry.write_text('import Baz 1.0\n')
+    stat = entry.stat()
+    os.utime(fspath(entry), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    rescanned = pyqt5_tools.qmlimports.load([fspath(entry)], paths, cache_file)
+
+    assert rescanned.paths == [paths[2]]
+
+
+def test_example_resolves_from_package():
+    here = pathlib.Path(pyqt5_tools.qmlimports.__file__).parent
+
+    import_map = pyqt5_tools.qmlimports.scan(
+        [fspath(here/'examples'/'qmlapp.qml')],
+        [fspath(here)],
+    )
+
+    assert import_map.modules['examples'] == fspath(here/'examples')
@@ -0,0 +1,151 @@
+import os
+import shutil
+
+import click.testing
+import pytest
+
+import pyqt5_tools.entrypoints
+import pyqt5_tools.qmlsnapshots
+
+
+numpy = pytest.importorskip('numpy')
+
+fspath = getattr(os, 'fspath', str)
+
+
+def test_plan_mirrors_layout_of_qml_files(tmp_path):
+    screens = tmp_path/'screens'
+    paths = [screens/'main.qml', screens/'settings'/'network.qml']
+
+    snapshots = pyqt5_tools.qmlsnapshots.plan(
+        qml_paths=paths,
+        output_directory=tmp_path/'out',
+        baseline_directory=tmp_path/'baseline',
+    )
+
+    assert [snapshot.image for snapshot in snapshots] == [
+        fspath(tmp_path/'out'/'main.png'),
+        fspath(tmp_path/'out'/'settings'/'network.png'),
+    ]
+    assert [snapshot.baseline for snapshot in snapshots] == [
+        fspath(tmp_path/'baseline'/'main.png'),
+        fspath(tmp_path/'baseline'/'settings'/'network.png'),
+    ]
+    assert snapshots[1].diff == fspath(
+        tmp_path/'out'/'settings'/'network.diff.png',
+    )
+
+
+def test_changed_mask_respects_tolerance():
+    baseline = numpy.zeros((2, 3, 4), dtype=numpy.uint8)
+    actual = baseline.copy()
+    actual[0, 0, 0] = 10
+    actual[1, 2, 3] = 255
+
+    mask = pyqt5_tools.qmlsnapshots.changed_mask(actual, baseline, tolerance=10)
+
+    assert mask.tolist() == [
+        [False, False, False],
+        [False, False, True],
+    ]
+
+
+def test_changed_mask_handles_darker_pixels():
+    baseline = numpy.full((1, 1, 4), 200, dtype=numpy.uint8)
+    actual = numpy.full((1, 1, 4), 100, dtype=numpy.uint8)
+
+    mask = pyqt5_tools.qmlsnapshots.changed_mask(actual, baseline, tolerance=0)
+
+    assert mask.tolist() == [[True]]
+
+
+def test_diff_image_marks_changed_pixels_red():
+    baseline = numpy.zeros((2, 2, 4), dtype=numpy.uint8)
+    mask = numpy.array([[True, False], [False, False]])
+
+    image = pyqt5_tools.qmlsnapshots.diff_image(baseline, mask)
+
+    assert image[0, 0].tolist() == [255, 0, 0, 255]
+    assert image[1, 1].tolist() == [192, 192, 192, 255]
+
+
+def rectangle(path, color):
+    path.write_text(
+        'import QtQuick 2.0\n'
+        'Rectangle {{ width: 4; height: 4; color: "{}" }}\n'.format(color),
+    )
+
+
+@pytest.fixture
+def screens(tmp_path):
+    screens = tmp_path/'screens'
+    screens.mkdir()
+    rectangle(screens/'same.qml', 'red')
+    rectangle(screens/'recoloured.qml', 'red')
+
+    return screens
+
+
+def test_check_all_compares_with_baselines(screens, tmp_path):
+    snapshots = pyqt5_tools.qmlsnapshots.plan(
+        qml_paths=[screens/'same.qml', screens/'recoloured.qml'],
+        output_directory=tmp_path/'out',
+        baseline_directory=tmp_path/'baseline',
+    )
+    env = pyqt5_tools.qmlsnapshots.render_env(os.environ)
+
+    def check():
+        return list(pyqt5_tools.qmlsnapshots.check_all(
+            snapshots,
+            env=env,
+            tolerance=0,
+            jobs=1,
+        ))
+
+    assert [result.status for result in check()] == ['new', 'new']
+
+    shutil.copytree(fspath(tmp_path/'out'), fspath(tmp_path/'baseline'))
+    rectangle(screens/'recoloured.qml', 'blue')
+
+    same, recoloured = check()
+
+    assert same.status == 'unchanged'
+    assert recoloured.status == 'changed'
+    assert recoloured.changed_pixels == 16
+    assert os.path.isfile(recoloured.snapshot.diff)
+
+
+def test_render_env_leaves_out_bundled_qt(tmp_path):
+    env = pyqt5_tools.qmlsnapshots.render_env(
+        {'QML2_IMPORT_PATH': 'user'},
+        qml2_import_paths=['given'],
+    )
+
+    assert env == {
+        'QML2_IMPORT_PATH': os.pathsep.join(['given', 'user']),
+        'QT_QPA_PLATFORM': 'offscreen',
+        'QT_QUICK_BACKEND': 'software',
+    }
+
+
+def test_command_fails_until_matching_baselines(screens, tmp_path):
+    def invoke():
+        return click.testing.CliRunner().invoke(
+            pyqt5_tools.entrypoints.pyqt5qmlscene,
+            [
+                '--snapshot-dir', fspath(tmp_path/'out'),
+                '--baseline-dir', fspath(tmp_path/'baseline'),
+                '--snapshot-jobs', '1',
+                fspath(screens/'same.qml'),
+            ],
+        )
+
+    first = invoke()
+    assert first.exit_code == 1, first.output
+    assert '0 unchanged, 0 changed, 1 new, 0 error' in first.output
+
+    shutil.copytree(fspath(tmp_path/'out'), fspath(tmp_path/'baseline'))
+
+    second = invoke()
+    assert second.exit_code == 0, second.output
+    assert '1 unchanged, 0 changed, 0 new, 0 error' in second.output
@@ -0,0 +1,205 @@
+import itertools
+import os
+import sys
+import time
+
+import click.testing
+
+import pyqt5_tools.entrypoints
+import pyqt5_tools.qmltestresults
+
+
+text_output = '''\
+********* Start testing of qmltestrunner *********
+Config: Using QtTest library 5.11.2, Qt 5.11.2
+PASS   : qmltestrunner::TextTests::initTestCase()
+PASS   : qmltestrunner::TextTests::test_piglet()
+QWARN  : qmltestrunner::TextTests::test_compare() something odd
+FAIL!  : qmltestrunner::TextTests::test_compare() Compared values are not the same
+   Actual   (): 1
+   Expected (): 2
+   Loc: [file:///tests/tst_text.qml(20)]
+SKIP   : qmltestrunner::TextTests::test_rows(second row) not yet
+PASS   : qmltestrunner::TextTests::cleanupTestCase()
+Totals: 3 passed, 1 failed, 1 skipped, 0 blacklisted, 12ms
+********* Finished testing of qmltestrunner *********
+'''
+
+xunit_output = '''\
+<?xml version="1.0" encoding="UTF-8" ?>
+<testsuite errors="0" failures="1" tests="3" name="qmltestrunner">
+  <properties>
+    <property value="5.11.2" name="QTestVersion"/>
+  </properties>
+  <testcase result="pass" name="TextTests::test_piglet" time="0.250"/>
+  <testcase result="fail" name="TextTests::test_compare" time="0.010">
+    <failure result="fail" message="Compared values are not the same"/>
+  </testcase>
+  <testcase name="test_modern" classname="TextTests" time="1.5">
+    <skipped message="not yet"/>
+  </testcase>
+  <system-err/>
+</testsuite>
+'''
+
+
+def test_text_results_with_messages():
+    parser = pyqt5_tools.qmltestresults.TextParser(
+        clock=itertools.count().__next__,
+    )
+
+    output = []
+    for line in text_output.splitlines(keepends=True):
+        output.extend(parser.feed(line))
+    output.extend(parser.close())
+
+    results = [
+        result
+        for result in output
+        if isinstance(result, pyqt5_tools.qmltestresults.TestResult)
+    ]
+
+    assert [(result.name, result.result) for result in results] == [
+        ('qmltestrunner::TextTests::initTestCase', 'pass'),
+        ('qmltestrunner::TextTests::test_piglet', 'pass'),
+        ('qmltestrunner::TextTests::test_compare', 'fail'),
+        ('qmltestrunner::TextTests::test_rows(second row)', 'skip'),
+        ('qmltestrunner::TextTests::cleanupTestCase', 'pass'),
+    ]
+    assert results[2].message == '\n'.join([
+        'Compared values are not the same',
+        'Actual   (): 1',
+        'Expected (): 2',
+        'Loc: [file:///tests/tst_text.qml(20)]',
+    ])
+    assert results[3].message == 'not yet'
+    assert [result.seconds for result in results] == [1] * 5
+    # Other lines stay in order with the results
+    assert output[4] == (
+        'QWARN  : qmltestrunner::TextTests::test_compare() something odd'
+    )
+    assert output[5] is results[2]
+
+
+def test_text_failure_complete_at_location():
+    parser = pyqt5_tools.qmltestresults.TextParser()
+
+    assert parser.feed('FAIL!  : t::f() wrong\n') == []
+    assert parser.feed('   Actual   (): 1\n') == []
+
+    result, = parser.feed('   Loc: [file:///t.qml(3)]\n')
+
+    assert result.result == 'fail'
+    assert parser.close() == []
+
+
+def test_xunit_results_from_chunks():
+    parser = pyqt5_tools.qmltestresults.XunitParser()
+
+    results = []
+    for start in range(0, len(xunit_output), 7):
+        results.extend(parser.feed(xunit_output[start:start + 7]))
+    results.extend(parser.close())
+
+    assert results == [
+        pyqt5_tools.qmltestresults.TestResult(
+            name='TextTests::test_piglet',
+            result='pass',
+            seconds=0.25,
+            message=None,
+        ),
+        pyqt5_tools.qmltestresults.TestResult(
+            name='TextTests::test_compare',
+            result='fail',
+            seconds=0.01,
+            message='Compared values are not the same',
+        ),
+        pyqt5_tools.qmltestresults.TestResult(
+            name='TextTests::test_modern',
+            result='skip',
+            seconds=1.5,
+            message='not yet',
+        ),
+    ]
+
+
+def test_output_format():
+    output_format = pyqt5_tools.qmltestresults.output_format
+
+    assert output_format(['-input', 'tests']) == 'txt'
+    assert output_format(['-xunitxml']) == 'xunitxml'
+    assert output_format(['-o', '-,xunitxml']) == 'xunitxml'
+    assert output_format(['-o', 'results.xml,xunitxml']) == 'txt'
+    assert output_format(['-xml']) is None
+
+
+def test_slow_report_orders_by_duration():
+    TestResult = pyqt5_tools.qmltestresults.TestResult
+    report = pyqt5_tools.qmltestresults.slow_report(
+        [
+            TestResult(name='quick', result='pass', seconds=0.1, message=None),
+            TestResult(name='slow', result='pass', seconds=2, message=None),
+            TestResult(name='slower', result='fail', seconds=3, message=None),
+        ],
+        threshold=1,
+    )
+
+    assert report.splitlines() == [
+        '2 tests took 1 s or more:',
+        '     3.000 s  slower',
+        '     2.000 s  slow',
+    ]
+
+
+def test_maxfail_stops_the_run():
+    runner = [
+        sys.executable,
+        '-u',
+        '-c',
+        'import time\n'
+        'print("FAIL!  : t::first() wrong")\n'
+        'print("   Loc: [file:///t.qml(1)]")\n'
+        'print("FAIL!  : t::second() wrong")\n'
+        'print("   Loc: [file:///t.qml(2)]")\n'
+        'time.sleep(60)\n'
+        'print("PASS   : t::never()")\n',
+    ]
+
+    echoed = []
+    start = time.monotonic()
+    returncode, results = pyqt5_tools.qmltestresults.run(
+        runner,
+        env=None,
+        maxfail=2,
+        echo=echoed.append,
+    )
+
+    assert time.monotonic() - start < 30
+    assert returncode == 1
+    assert [result.name for result in results] == ['t::first', 't::second']
+    assert 'Stopping after 2 failed tests' in echoed
+
+
+def test_command_exits_with_failure(tmp_path, monkeypatch):
+    runner = tmp_path/'qmltestrunner.exe'
+    runner.write_text(
+        '#!{}\n'
+        'import time\n'
+        'print("PASS   : t::first()")\n'
+        'print("FAIL!  : t::second() wrong")\n'
+        'print("   Loc: [file:///t.qml(2)]")\n'
+        'print("FAIL!  : t::third() wrong")\n'
+        'print("   Loc: [file:///t.qml(3)]")\n'
+        'time.sleep(60)\n'.format(sys.executable)
+    )
+    runner.chmod(0o755)
+    monkeypatch.setattr(pyqt5_tools.entrypoints, 'bin', tmp_path)
+    monkeypatch.chdir(str(tmp_path))
+
+    result = click.testing.CliRunner().invoke(
+        pyqt5_tools.entrypoints.pyqt5qmltestrunner,
+        ['--maxfail', '2'],
+    )
+
+    assert result.exit_code == 1, result.output
+    assert 'Stopping after 2 failed tests' in result.output
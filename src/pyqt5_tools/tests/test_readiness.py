@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+
+import pyqt5_tools.readiness
+
+
+def python(code):
+    return [sys.executable, '-c', code]
+
+
+def test_terminates_once_ready():
+    start = time.monotonic()
+    returncode = pyqt5_tools.readiness.run_until_ready(
+        python(
+            'import time, pyqt5_tools.readiness\n'
+            'pyqt5_tools.readiness.signal_ready()\n'
+            'time.sleep(60)\n'
+        ),
+        env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)),
+        timeout=30,
+    )
+
+    assert returncode == 0
+    assert time.monotonic() - start < 30
+
+
+def test_exiting_before_ready_fails():
+    returncode = pyqt5_tools.readiness.run_until_ready(
+        python('raise SystemExit(0)'),
+        env=os.environ,
+        timeout=30,
+    )
+
+    assert returncode == 1
+
+
+def test_timeout_terminates():
+    returncode = pyqt5_tools.readiness.run_until_ready(
+        python('import time; time.sleep(60)'),
+        env=os.environ,
+        timeout=0.2,
+    )
+
+    assert returncode == 1
+
+
+def test_signal_without_launcher_does_nothing(monkeypatch):
+    monkeypatch.delenv(pyqt5_tools.readiness.ready_path_env_var, raising=False)
+
+    assert not pyqt5_tools.readiness.signal_ready()
@@ -0,0 +1,85 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+import pyqt5_tools.resourcemonitor
+
+
+pytestmark = pytest.mark.skipif(
+    not pyqt5_tools.resourcemonitor.available(),
+    reason='Needs /proc',
+)
+
+
+def test_parse_stat_handles_spaces_in_the_name():
+    fields = ['0'] * 50
+    fields[0] = 'S'
+    fields[11] = '150'
+    fields[12] = '50'
+    fields[17] = '7'
+    fields[21] = '1000'
+    text = '1234 (a (weird) name) {}\n'.format(' '.join(fields))
+
+    parsed = pyqt5_tools.resourcemonitor.parse_stat(
+        text,
+        page_size=4096,
+        ticks_per_second=100,
+    )
+
+    assert parsed == ('S', 2.0, 7, 4096000)
+
+
+def test_monitor_samples_until_exit(tmp_path):
+    monitor = pyqt5_tools.resourcemonitor.Monitor(interval=0.01)
+    process = monitor.popen([
+        sys.executable,
+        '-c',
+        'import threading, time\n'
+        'data = bytearray(50 * 2**20)\n'
+        'threads = [\n'
+        '    threading.Thread(target=time.sleep, args=(0.5,))\n'
+        '    for _ in range(3)\n'
+        ']\n'
+        'for thread in threads: thread.start()\n'
+        'for thread in threads: thread.join()\n'
+        'raise SystemExit(3)\n',
+    ])
+    monitor.stop(returncode=process.wait())
+
+    path = tmp_path/'report.json'
+    monitor.write(str(path))
+    report = json.loads(path.read_text())
+
+    assert report['returncode'] == 3
+    assert len(report['samples']) > 1
+    assert report['peak']['rss'] >= 50 * 2**20
+    assert report['peak']['threads'] >= 4
+    assert report['peak']['cpu_seconds'] > 0
+    assert report['seconds'] >= 0.5
+
+
+def test_earlier_children_peak_is_not_reported():
+    subprocess.run(
+        [sys.executable, '-c', 'data = bytearray(200 * 2**20)'],
+        check=True,
+    )
+
+    monitor = pyqt5_tools.resourcemonitor.Monitor(interval=0.01)
+    process = monitor.popen([sys.executable, '-c', 'pass'])
+    monitor.stop(returncode=process.wait())
+
+    assert monitor.children_max_rss is None
+    assert monitor.report()['peak']['rss'] < 100 * 2**20
+
+
+def test_report_without_samples():
+    monitor = pyqt5_tools.resourcemonitor.Monitor()
+    monitor.stop(returncode=None)
+
+    assert monitor.report()['peak'] == {
+        'rss': None,
+        'cpu_seconds': None,
+        'threads': None,
+    }
@@ -3,6 +3,8 @@ import pathlib
 
 from PyQt5 import QtWidgets
 
+import pyqt5_tools.readiness
+
 
 test_path_env_var = 'PYQT5TOOLS_TEST_PATH'
 test_file_contents = b'heffalump'
@@ -23,3 +25,5 @@ class TestButton(QtWidgets.QPushButton):
             path = pathlib.Path(os.environ[test_path_env_var])
             with path.open('xb') as f:
                 f.write(test_file_contents)
+
+            pyqt5_tools.readiness.signal_ready()
@@ -1,5 +1,6 @@
 from PyQt5 import QtGui, QtDesigner
 
+import pyqt5_tools.designmode
 import pyqt5_tools.tests.testbutton
 
 
@@ -21,7 +22,10 @@ class TestButtonPlugin(QtDesigner.QPyDesignerCustomWidgetPlugin):
         return self.initialized
 
     def createWidget(self, parent):
-        return pyqt5_tools.tests.testbutton.TestButton(parent)
+        return pyqt5_tools.designmode.create_widget(
+            pyqt5_tools.tests.testbutton.TestButton,
+            parent,
+        )
 
     def name(self):
         return pyqt5_tools.tests.testbutton.TestButton.__name__
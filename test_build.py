@@ -0,0 +1,511 @@
+import json
+import os
+import shutil
+import sys
+import threading
+import zipfile
+
+import pytest
+
+import build
+
+
+fspath = getattr(os, 'fspath', str)
+
+
+def mapping(*pairs):
+    return '\n'.join(
+        '"{}" "{}"'.format(source, target)
+        for source, target in pairs
+    ) + '\n'
+
+
+def test_deployment_plan_copies_shared_files_once(tmp_path):
+    qt = tmp_path/'qt'
+    (qt/'platforms').mkdir(parents=True)
+    for name in ('designer.exe', 'linguist.exe', 'Qt5Core.dll', 'Qt5Designer.dll'):
+        (qt/name).write_bytes(name.encode())
+    (qt/'platforms'/'qwindows.dll').write_bytes(b'qwindows')
+
+    destination = tmp_path/'destination'
+    destination.mkdir()
+
+    core = (fspath(qt/'Qt5Core.dll'), 'Qt5Core.dll')
+    platform = (
+        fspath(qt/'platforms'/'qwindows.dll'),
+        os.path.join('platforms', 'qwindows.dll'),
+    )
+
+    listings = {
+        'designer': (
+            fspath(qt/'designer.exe'),
+            mapping(core, platform, (fspath(qt/'Qt5Designer.dll'), 'Qt5Designer.dll')),
+        ),
+        'linguist': (
+            fspath(qt/'linguist.exe'),
+            'Unrelated chatter\n' + mapping(core, platform),
+        ),
+    }
+
+    plan = build.plan_deployment(
+        listings=listings,
+        destination=fspath(destination),
+    )
+
+    assert plan.applications == ['designer', 'linguist']
+    assert plan.listed == 7
+    assert len(plan.files) == 5
+
+    manifest_path = tmp_path/'deployment.json'
+    build.deploy(
+        plan=plan,
+        destination=fspath(destination),
+        manifest_path=fspath(manifest_path),
+    )
+
+    assert (destination/'platforms'/'qwindows.dll').read_bytes() == b'qwindows'
+    assert (destination/'linguist.exe').read_bytes() == b'linguist.exe'
+
+    manifest = json.loads(manifest_path.read_text())
+    required_by = {
+        entry['target']: entry['required_by']
+        for entry in manifest['files']
+    }
+    assert required_by['Qt5Core.dll'] == ['designer', 'linguist']
+    assert required_by['Qt5Designer.dll'] == ['designer']
+
+
+def test_deployment_plan_rejects_conflicting_sources(tmp_path):
+    listings = {
+        'designer': (
+            fspath(tmp_path/'designer.exe'),
+            mapping((fspath(tmp_path/'a'/'Qt5Core.dll'), 'Qt5Core.dll')),
+        ),
+        'linguist': (
+            fspath(tmp_path/'linguist.exe'),
+            mapping((fspath(tmp_path/'b'/'Qt5Core.dll'), 'Qt5Core.dll')),
+        ),
+    }
+
+    with pytest.raises(build.DeploymentConflict):
+        build.plan_deployment(listings=listings, destination=fspath(tmp_path))
+
+
+def test_steps_run_after_their_inputs_are_produced(tmp_path):
+    order = []
+    log = tmp_path/'log'
+
+    steps = [
+        build.Step(
+            name='link',
+            function=lambda: order.append('link'),
+            inputs=['compiled'],
+        ),
+        build.Step(
+            name='compile',
+            command=[
+                sys.executable,
+                '-c',
+                'import pathlib; pathlib.Path({!r}).write_text("compiled")'.format(
+                    fspath(log),
+                ),
+            ],
+            inputs=['configured'],
+            outputs=['compiled'],
+        ),
+        build.Step(
+            name='configure',
+            function=lambda: order.append('configure'),
+            outputs=['configured'],
+        ),
+    ]
+
+    build.run_steps(steps, jobs=4)
+
+    assert order == ['configure', 'link']
+    assert log.read_text() == 'compiled'
+
+
+def test_independent_steps_run_concurrently():
+    barrier = threading.Barrier(3, timeout=5)
+
+    steps = [
+        build.Step(name=str(index), function=barrier.wait)
+        for index in range(3)
+    ]
+
+    build.run_steps(steps, jobs=3)
+
+
+def test_failed_step_stops_dependents():
+    ran = []
+
+    def fail():
+        raise RuntimeError('compile failed')
+
+    steps = [
+        build.Step(name='compile', function=fail, outputs=['compiled']),
+        build.Step(
+            name='link',
+            function=lambda: ran.append('link'),
+            inputs=['compiled'],
+        ),
+    ]
+
+    with pytest.raises(RuntimeError, match='compile failed'):
+        build.run_steps(steps, jobs=2)
+
+    assert ran == []
+
+
+def test_build_jobs_must_be_positive(monkeypatch):
+    monkeypatch.setenv('PYQT5_TOOLS_BUILD_JOBS', '3')
+    assert build.default_jobs() == 3
+
+    for value in ('0', '-2', 'many'):
+        monkeypatch.setenv('PYQT5_TOOLS_BUILD_JOBS', value)
+        with pytest.raises(ValueError, match='at least 1'):
+            build.default_jobs()
+
+
+def test_step_dependency_cycle_is_rejected():
+    steps = [
+        build.Step(name='a', function=list, inputs=['b'], outputs=['a']),
+        build.Step(name='b', function=list, inputs=['a'], outputs=['b']),
+    ]
+
+    with pytest.raises(build.StepGraphError):
+        build.run_steps(steps, jobs=2)
+
+
+def test_artifact_cache_round_trip(tmp_path):
+    cache = build.ArtifactCache(root=fspath(tmp_path/'cache'))
+    key = cache.key(pyqt5_version='5.12', sip_version='4.19.14')
+
+    assert key == cache.key(sip_version='4.19.14', pyqt5_version='5.12')
+    assert key != cache.key(pyqt5_version='5.12', sip_version='4.19.13')
+    assert not cache.contains(key)
+
+    built = tmp_path/'built'
+    (built/'designer').mkdir(parents=True)
+    (built/'designer'/'pyqt5.dll').write_bytes(b'designer plugin')
+    (built/'LICENSE').write_bytes(b'license')
+
+    cache.store(
+        key=key,
+        sources={
+            'designer': fspath(built/'designer'),
+            'LICENSE.pyqt5': fspath(built/'LICENSE'),
+        },
+    )
+    assert cache.contains(key)
+
+    restored = tmp_path/'restored'
+    cache.restore(key=key, destination=fspath(restored))
+
+    assert (restored/'designer'/'pyqt5.dll').read_bytes() == b'designer plugin'
+    assert (restored/'LICENSE.pyqt5').read_bytes() == b'license'
+    assert os.listdir(fspath(tmp_path/'cache')) == [key]
+
+
+def test_qt_version_from_qconfig(tmp_path):
+    (tmp_path/'mkspecs').mkdir()
+    (tmp_path/'mkspecs'/'qconfig.pri').write_text(
+        'QT_ARCH = x86_64\nQT_VERSION = 5.12.1\nQT_MAJOR_VERSION = 5\n',
+    )
+
+    assert build.qt_version(fspath(tmp_path)) == '5.12.1'
+    assert build.qt_version(fspath(tmp_path/'missing')) is None
+
+
+def test_metrics_cover_steps_and_child_processes(tmp_path):
+    metrics = build.BuildMetrics()
+
+    def allocate():
+        build.run_measured(
+            [sys.executable, '-c', 'x = bytearray(64 * 2**20)'],
+            metrics=metrics,
+        )
+
+    build.run_steps(
+        [
+            build.Step(name='allocate', function=allocate),
+            build.Step(name='idle', function=list),
+        ],
+        jobs=2,
+        metrics=metrics,
+    )
+
+    path = tmp_path/'metrics.json'
+    metrics.write(fspath(path))
+    recorded = json.loads(path.read_text())
+
+    assert {step['name'] for step in recorded['steps']} == {'allocate', 'idle'}
+    process, = recorded['processes']
+    assert process['step'] == 'allocate'
+    assert process['wall'] > 0
+    assert process['cpu'] >= 0
+    assert process['peak_rss'] >= 64 * 2**20
+
+    # Only the whole build's peak is known for the build process itself
+    assert all('peak_rss' not in step for step in recorded['steps'])
+    assert all(step['process_peak_rss'] > 0 for step in recorded['steps'])
+
+    summary = metrics.summary().splitlines()
+    assert summary[0].split()[0] == 'Step'
+    assert summary[2].split()[0] == 'allocate'
+    assert summary[2].split()[-1] == '{:.1f}'.format(
+        process['peak_rss'] / 2**20,
+    )
+    assert summary[3].split() == ['idle', '0.0', '0.0', '-']
+    assert summary[-1].startswith('Build process peak RSS [MiB]: ')
+
+
+def test_run_measured_checks_the_exit_code():
+    metrics = build.BuildMetrics()
+
+    with pytest.raises(build.subprocess.CalledProcessError):
+        build.run_measured(
+            [sys.executable, '-c', 'raise SystemExit(3)'],
+            metrics=metrics,
+        )
+
+    completed = build.run_measured(
+        [sys.executable, '-c', 'print("hi")'],
+        stdout=build.subprocess.PIPE,
+        metrics=metrics,
+    )
+    assert completed.stdout.strip() == b'hi'
+    assert len(metrics.processes) == 2
+
+
+def make_source_archive(path):
+    with zipfile.ZipFile(fspath(path), 'w', zipfile.ZIP_DEFLATED) as z:
+        z.writestr('sip-4.19/', '')
+        z.writestr('sip-4.19/configure.py', 'print("configure")\n')
+        z.writestr('sip-4.19/siplib/siplib.c', 'int x;\n' * 10000)
+        z.writestr('sip-4.19/siplib/sip.h', '#define SIP\n')
+        z.writestr('sip-4.19/doc/html/index.html', '<html/>')
+        z.writestr('sip-4.19/examples/', '')
+
+
+def test_extract_archive_skips_excluded_members(tmp_path):
+    archive = tmp_path/'sip.zip'
+    make_source_archive(archive)
+
+    destination = tmp_path/'src'
+    build.extract_archive(
+        path=fspath(archive),
+        destination=fspath(destination),
+        exclude=('doc', 'examples'),
+        jobs=3,
+    )
+
+    sip = destination/'sip-4.19'
+    assert (sip/'configure.py').read_text() == 'print("configure")\n'
+    assert (sip/'siplib'/'siplib.c').read_text() == 'int x;\n' * 10000
+    assert (sip/'siplib'/'sip.h').exists()
+    assert not (sip/'doc').exists()
+    assert not (sip/'examples').exists()
+
+
+def test_extract_archive_renames_the_root(tmp_path):
+    archive = tmp_path/'sip.zip'
+    make_source_archive(archive)
+
+    build.extract_archive(
+        path=fspath(archive),
+        destination=fspath(tmp_path),
+        root='sip-4.19-native',
+    )
+
+    assert (tmp_path/'sip-4.19-native'/'siplib'/'sip.h').exists()
+    assert (tmp_path/'sip-4.19-native'/'doc'/'html'/'index.html').exists()
+    assert not (tmp_path/'sip-4.19').exists()
+
+
+def test_extract_archive_rejects_unsafe_members(tmp_path):
+    archive = tmp_path/'evil.zip'
+    with zipfile.ZipFile(fspath(archive), 'w') as z:
+        z.writestr('top/../../escaped', 'gotcha')
+
+    with pytest.raises(Exception, match='Unsafe'):
+        build.extract_archive(path=fspath(archive), destination=fspath(tmp_path/'out'))
+
+
+def test_stage_skips_matching_files(tmp_path):
+    source = tmp_path/'qml'
+    (source/'QtQuick.2').mkdir(parents=True)
+    (source/'QtQuick.2'/'qtquick2plugin.dll').write_bytes(b'plugin' * 1000)
+    (source/'QtQuick.2'/'qtquick2plugind.dll').write_bytes(b'debug')
+    (source/'QtQuick.2'/'qmldir').write_bytes(b'module QtQuick')
+
+    def ignore(directory, names):
+        return {name for name in names if name.endswith('d.dll')}
+
+    target = tmp_path/'staged'
+    manifest = build.tree_manifest(
+        source=fspath(source),
+        target=fspath(target),
+        ignore=ignore,
+    )
+    assert len(manifest) == 2
+
+    first = build.stage(manifest, jobs=2)
+    assert sum(first.methods.values()) == 2
+    assert first.methods['skipped'] == 0
+    # Depending on the filesystem supporting clones
+    assert first.bytes_moved + first.bytes_cloned == (
+        6000 + len(b'module QtQuick')
+    )
+    assert (target/'QtQuick.2'/'qmldir').read_bytes() == b'module QtQuick'
+    assert not (target/'QtQuick.2'/'qtquick2plugind.dll').exists()
+
+    second = build.stage(manifest, jobs=2)
+    assert second.methods['skipped'] == 2
+    assert second.bytes_moved == 0
+
+    (source/'QtQuick.2'/'qmldir').write_bytes(b'module QtQuick\nplugin x')
+    third = build.stage(manifest, jobs=2)
+    assert third.methods['skipped'] == 1
+    assert (target/'QtQuick.2'/'qmldir').read_bytes() == b'module QtQuick\nplugin x'
+
+
+def test_staging_report_counts_clones_apart():
+    report = build.StagingReport()
+    report.add('copied', 10)
+    report.add('cloned', 1000)
+    report.add('skipped', 5)
+
+    assert report.bytes_moved == 10
+    assert report.bytes_cloned == 1000
+    assert str(report) == (
+        'Staged 3 files (1 cloned, 1 copied, 1 skipped),'
+        ' 10 bytes moved, 1000 bytes cloned'
+    )
+
+
+def test_stage_links_and_applies_modes(tmp_path):
+    source = tmp_path/'source'
+    source.mkdir()
+    (source/'plugin.dll').write_bytes(b'plugin')
+    (source/'vcruntime.dll').write_bytes(b'runtime')
+
+    target = tmp_path/'target'
+    report = build.stage(
+        [
+            build.StagedFile(
+                source=fspath(source/'plugin.dll'),
+                target=fspath(target/'plugin.dll'),
+            ),
+            build.StagedFile(
+                source=fspath(source/'vcruntime.dll'),
+                target=fspath(target/'vcruntime.dll'),
+                mode=build.stat.S_IREAD,
+            ),
+        ],
+        link=True,
+    )
+
+    assert report.methods['linked'] == 1
+    assert os.path.samefile(fspath(source/'plugin.dll'), fspath(target/'plugin.dll'))
+    assert not os.path.samefile(
+        fspath(source/'vcruntime.dll'),
+        fspath(target/'vcruntime.dll'),
+    )
+    assert os.stat(fspath(target/'vcruntime.dll')).st_mode & build.stat.S_IWRITE == 0
+    assert (target/'vcruntime.dll').read_bytes() == b'runtime'
+
+
+@pytest.mark.skipif(
+    sys.platform == 'win32' or shutil.which('bash') is None,
+    reason='POSIX shell scripts need bash',
+)
+def test_capture_environment_from_posix_script(tmp_path, monkeypatch):
+    script = tmp_path/'vcvars.sh'
+    script.write_text(
+        'echo "setting up for $1"\n'
+        'export PYQT5_TOOLS_TARGET="$1"\n'
+        'export PATH="/opt/compiler/bin:$PATH"\n'
+    )
+    initial = {'PATH': '/usr/bin:/bin', 'KEEP': 'me'}
+    cache = tmp_path/'cache'
+
+    environment = build.capture_environment(
+        script=fspath(script),
+        args=['x64'],
+        initial=initial,
+        cache_directory=fspath(cache),
+    )
+
+    assert environment['PYQT5_TOOLS_TARGET'] == 'x64'
+    assert environment['PATH'] == '/opt/compiler/bin:/usr/bin:/bin'
+    assert environment['KEEP'] == 'me'
+
+    def fail(*args, **kwargs):
+        raise AssertionError('the cached environment was not used')
+
+    with monkeypatch.context() as m:
+        m.setattr(build, 'run_measured', fail)
+        cached = build.capture_environment(
+            script=fspath(script),
+            args=['x64'],
+            initial=initial,
+            cache_directory=fspath(cache),
+        )
+    assert cached == environment
+
+    other = build.capture_environment(
+        script=fspath(script),
+        args=['x86'],
+        initial=initial,
+        cache_directory=fspath(cache),
+    )
+    assert other['PYQT5_TOOLS_TARGET'] == 'x86'
+    assert len(os.listdir(fspath(cache))) == 2
+
+
+def test_cached_results_require_matching_inputs(tmp_path, monkeypatch):
+    for name in ('build.py', 'pluginloader.patch', 'pluginloader.5.11.patch'):
+        (tmp_path/name).write_text(name)
+    (tmp_path/'src'/'pyqt5_tools'/'Qt'/'bin').mkdir(parents=True)
+    monkeypatch.setenv('PYQT5_VERSION', '5.12')
+    monkeypatch.delenv('PYQT5_TOOLS_BUILD_CACHE', raising=False)
+
+    build_path = fspath(tmp_path)
+    assert build.load_cached_results(build_path) is None
+
+    build.save_results(
+        build=build_path,
+        results=build.Results(console_scripts=['designer = x:y']),
+        key=build.results_key(build_path),
+    )
+    assert build.load_cached_results(build_path).console_scripts == [
+        'designer = x:y',
+    ]
+
+    monkeypatch.setenv('PYQT5_VERSION', '5.11.3')
+    assert build.load_cached_results(build_path) is None
+
+
+def test_build_if_needed_builds_the_checked_tree(tmp_path, monkeypatch):
+    for name in ('build.py', 'pluginloader.patch', 'pluginloader.5.11.patch'):
+        (tmp_path/name).write_text(name)
+    monkeypatch.setenv('PYQT5_VERSION', '5.12')
+    monkeypatch.delenv('PYQT5_TOOLS_BUILD_CACHE', raising=False)
+    monkeypatch.setenv('APPVEYOR_BUILD_FOLDER', fspath(tmp_path/'elsewhere'))
+
+    built = []
+
+    def main(build):
+        built.append(build)
+        (tmp_path/'src'/'pyqt5_tools'/'Qt'/'bin').mkdir(parents=True)
+        return Results(console_scripts=[])
+
+    Results = build.Results
+    monkeypatch.setattr(build, 'main', main)
+
+    build.build_if_needed(fspath(tmp_path))
+    build.build_if_needed(fspath(tmp_path))
+
+    assert built == [fspath(tmp_path)]
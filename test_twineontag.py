@@ -0,0 +1,293 @@
+import contextlib
+import hashlib
+import http.server
+import json
+import os
+import threading
+import time
+
+import twineontag
+
+
+fspath = getattr(os, 'fspath', str)
+
+
+class Index:
+    """A stand-in for the index JSON API, uploads being added directly."""
+    def __init__(self, errors=0):
+        self.lock = threading.Lock()
+        self.releases = {}
+        # Requests to fail before answering
+        self.errors = errors
+
+    def add(self, path, contents=None):
+        if contents is None:
+            with open(path, 'rb') as f:
+                contents = f.read()
+
+        project, version = twineontag.project_and_version(path)
+        with self.lock:
+            self.releases.setdefault((project, version), []).append({
+                'filename': os.path.basename(path),
+                'digests': {'sha256': hashlib.sha256(contents).hexdigest()},
+            })
+
+    def handler(self):
+        index = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = self.path.strip('/').split('/')
+                with index.lock:
+                    if index.errors > 0:
+                        index.errors -= 1
+                        self.send_error(500)
+                        return
+
+                    files = index.releases.get(tuple(parts[1:3]))
+                    body = json.dumps({'urls': files}).encode('utf-8')
+
+                if parts[0] != 'pypi' or parts[-1] != 'json' or files is None:
+                    self.send_error(404)
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+@contextlib.contextmanager
+def serve(index):
+    server = http.server.HTTPServer(('127.0.0.1', 0), index.handler())
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+
+    try:
+        yield 'http://127.0.0.1:{}'.format(server.server_address[1])
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def wheels(directory, count):
+    paths = []
+    for i in range(count):
+        path = directory/'pyqt5_tools-5.11.2.1.{}-py3-none-any.whl'.format(i)
+        path.write_bytes('wheel {}'.format(i).encode('ascii'))
+        paths.append(fspath(path))
+
+    return paths
+
+
+def test_uploads_missing_and_skips_existing(tmp_path):
+    index = Index()
+    paths = wheels(tmp_path, 3)
+    index.add(paths[1])
+
+    uploaded = []
+
+    def uploader(path):
+        uploaded.append(path)
+        index.add(path)
+
+    with serve(index) as url:
+        results = twineontag.publish(
+            paths=paths,
+            uploader=uploader,
+            index_url=url,
+            delay=0,
+        )
+
+    assert sorted(uploaded) == [paths[0], paths[2]]
+    assert [result.status for result in results] == [
+        'uploaded',
+        'skipped',
+        'uploaded',
+    ]
+
+
+def test_retries_failed_uploads(tmp_path):
+    index = Index()
+    path, = wheels(tmp_path, 1)
+
+    attempts = []
+
+    def uploader(path):
+        attempts.append(path)
+        if len(attempts) < 3:
+            raise Exception('connection reset')
+        index.add(path)
+
+    with serve(index) as url:
+        result, = twineontag.publish(
+            paths=[path],
+            uploader=uploader,
+            index_url=url,
+            attempts=3,
+            delay=0,
+        )
+
+    assert result.status == 'uploaded'
+    assert result.attempts == 3
+
+
+def test_gives_up_after_attempts(tmp_path):
+    index = Index()
+    path, = wheels(tmp_path, 1)
+
+    def uploader(path):
+        raise Exception('connection reset')
+
+    with serve(index) as url:
+        result, = twineontag.publish(
+            paths=[path],
+            uploader=uploader,
+            index_url=url,
+            attempts=2,
+            delay=0,
+        )
+
+    assert result.status == 'failed'
+    assert result.attempts == 2
+    assert str(result.error) == 'connection reset'
+
+
+def test_failed_upload_accepted_by_index_is_not_repeated(tmp_path):
+    index = Index()
+    path, = wheels(tmp_path, 1)
+
+    attempts = []
+
+    def uploader(path):
+        attempts.append(path)
+        index.add(path)
+        raise Exception('read timed out')
+
+    with serve(index) as url:
+        result, = twineontag.publish(
+            paths=[path],
+            uploader=uploader,
+            index_url=url,
+            delay=0,
+        )
+
+    assert result.status == 'uploaded'
+    assert len(attempts) == 1
+
+
+def test_different_contents_on_index_fail_without_uploading(tmp_path):
+    index = Index()
+    path, = wheels(tmp_path, 1)
+    index.add(path, contents=b'something else')
+
+    uploaded = []
+
+    with serve(index) as url:
+        result, = twineontag.publish(
+            paths=[path],
+            uploader=uploaded.append,
+            index_url=url,
+            delay=0,
+        )
+
+    assert result.status == 'failed'
+    assert isinstance(result.error, twineontag.VerificationError)
+    assert uploaded == []
+
+
+def test_upload_missing_from_index_is_unverified(tmp_path):
+    index = Index()
+    path, = wheels(tmp_path, 1)
+
+    with serve(index) as url:
+        result, = twineontag.publish(
+            paths=[path],
+            uploader=lambda path: None,
+            index_url=url,
+            delay=0,
+            verify_attempts=2,
+        )
+
+    assert result.status == 'unverified'
+
+
+def test_index_errors_are_retried(tmp_path):
+    index = Index(errors=2)
+    path, = wheels(tmp_path, 1)
+
+    with serve(index) as url:
+        result, = twineontag.publish(
+            paths=[path],
+            uploader=index.add,
+            index_url=url,
+            delay=0,
+        )
+
+    assert result.status == 'uploaded'
+    assert index.errors == 0
+
+
+def test_unreachable_index_fails_each_file(tmp_path):
+    index = Index()
+    paths = wheels(tmp_path, 2)
+
+    with serve(index) as url:
+        pass
+
+    uploaded = []
+    results = twineontag.publish(
+        paths=paths,
+        uploader=uploaded.append,
+        index_url=url,
+        delay=0,
+    )
+
+    assert [result.status for result in results] == ['failed', 'failed']
+    assert all(isinstance(result.error, OSError) for result in results)
+    assert uploaded == []
+
+
+def test_uploads_are_bounded_by_jobs(tmp_path):
+    index = Index()
+    paths = wheels(tmp_path, 8)
+
+    lock = threading.Lock()
+    active = [0]
+    peak = [0]
+
+    def uploader(path):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        index.add(path)
+
+    with serve(index) as url:
+        results = twineontag.publish(
+            paths=paths,
+            uploader=uploader,
+            index_url=url,
+            jobs=3,
+            delay=0,
+        )
+
+    assert {result.status for result in results} == {'uploaded'}
+    assert 1 < peak[0] <= 3
+
+
+def test_repository_url_matches_index():
+    assert twineontag.repository_url('https://pypi.org/') is None
+    assert (
+        twineontag.repository_url('https://test.pypi.org')
+        == 'https://test.pypi.org/legacy/'
+    )
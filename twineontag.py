@@ -1,7 +1,220 @@
 from __future__ import print_function
 
+import collections
+import concurrent.futures
+import functools
+import glob
+import hashlib
+import json
+import os
 import subprocess
 import sys
+import time
+import urllib.error
+import urllib.request
+
+
+default_index_url = 'https://pypi.org'
+
+# Errors looking up the index that are worth trying again
+lookup_errors = (OSError, ValueError)
+
+Result = collections.namedtuple('Result', ('path', 'status', 'attempts', 'error'))
+
+
+class VerificationError(Exception):
+    pass
+
+
+def sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(2**20), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def project_and_version(path):
+    name, version = os.path.basename(path).split('-')[:2]
+
+    return name.replace('_', '-'), version
+
+
+def index_digests(index_url, project, version):
+    """The sha256 of each file already on the index for this release."""
+    url = '{}/pypi/{}/{}/json'.format(index_url.rstrip('/'), project, version)
+
+    try:
+        with urllib.request.urlopen(url, timeout=30) as response:
+            release = json.loads(response.read().decode('utf-8'))
+    except urllib.error.HTTPError as e:
+        if e.code == 404:
+            return {}
+        raise
+
+    return {
+        file['filename']: file['digests']['sha256']
+        for file in release['urls']
+    }
+
+
+def repository_url(index_url):
+    """
+    The upload URL of the index whose JSON API is at ``index_url``, None to
+    leave twine uploading to PyPI.
+    """
+    if index_url.rstrip('/') == default_index_url:
+        return None
+
+    # As served by Warehouse, such as TestPyPI
+    return index_url.rstrip('/') + '/legacy/'
+
+
+def twine_upload(path, repository_url=None):
+    command = ['twine', 'upload']
+    if repository_url is not None:
+        command.extend(['--repository-url', repository_url])
+
+    subprocess.check_call([*command, path])
+
+
+def check_uploaded(path, digest, index_url):
+    """
+    True when the index has the file, raising if it has different contents.
+    """
+    project, version = project_and_version(path)
+    remote = index_digests(index_url, project, version).get(
+        os.path.basename(path),
+    )
+
+    if remote is None:
+        return False
+
+    if remote != digest:
+        raise VerificationError(
+            '{} on the index has sha256 {}, expected {}'.format(
+                os.path.basename(path),
+                remote,
+                digest,
+            ),
+        )
+
+    return True
+
+
+def lookup_uploaded(path, digest, index_url, attempts, delay):
+    """``check_uploaded()``, retrying when the index can't be reached."""
+    for attempt in range(1, attempts + 1):
+        try:
+            return check_uploaded(path, digest, index_url)
+        except lookup_errors as e:
+            if attempt == attempts:
+                raise
+
+            print('Looking up {} failed: {}'.format(os.path.basename(path), e))
+            time.sleep(delay * attempt)
+
+
+def publish_file(path, uploader, index_url, attempts=3, delay=5,
+                 verify_attempts=6, lookup_attempts=3):
+    digest = sha256(path)
+
+    try:
+        if lookup_uploaded(path, digest, index_url, lookup_attempts, delay):
+            return Result(path=path, status='skipped', attempts=0, error=None)
+    except (VerificationError, *lookup_errors) as e:
+        return Result(path=path, status='failed', attempts=0, error=e)
+
+    error = None
+    for attempt in range(1, attempts + 1):
+        try:
+            uploader(path)
+        except Exception as e:
+            error = e
+            print('Upload {} of {} failed: {}'.format(
+                attempt,
+                os.path.basename(path),
+                e,
+            ))
+            time.sleep(delay * attempt)
+
+            # A failure may have been reported after the index accepted it
+            try:
+                if check_uploaded(path, digest, index_url):
+                    break
+            except VerificationError as e:
+                return Result(path=path, status='failed', attempts=attempt, error=e)
+            except Exception:
+                pass
+
+            continue
+
+        break
+    else:
+        return Result(path=path, status='failed', attempts=attempts, error=error)
+
+    # The index can take a moment to list new files
+    for verify_attempt in range(verify_attempts):
+        try:
+            if check_uploaded(path, digest, index_url):
+                return Result(
+                    path=path,
+                    status='uploaded',
+                    attempts=attempt,
+                    error=None,
+                )
+        except VerificationError as e:
+            return Result(path=path, status='failed', attempts=attempt, error=e)
+        except lookup_errors as e:
+            error = e
+        else:
+            error = None
+
+        time.sleep(delay)
+
+    if error is not None:
+        return Result(path=path, status='failed', attempts=attempt, error=error)
+
+    return Result(
+        path=path,
+        status='unverified',
+        attempts=attempt,
+        error=VerificationError('Not listed on the index after uploading'),
+    )
+
+
+def publish(paths, uploader=twine_upload, index_url=default_index_url,
+            jobs=4, **kwargs):
+    """
+    Upload the files concurrently, skipping those the index already has and
+    retrying each on failure.  A file failing unexpectedly still leaves the
+    others' results.
+    """
+    paths = list(paths)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(
+                publish_file,
+                path=path,
+                uploader=uploader,
+                index_url=index_url,
+                **kwargs
+            )
+            for path in paths
+        ]
+
+        results = []
+        for path, future in zip(paths, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(
+                    Result(path=path, status='failed', attempts=0, error=e),
+                )
+
+        return results
 
 
 def main():
@@ -21,14 +234,32 @@ def main():
 
     print('Tag found, uploading to PyPI.')
 
-    subprocess.check_call(
-        [
-            'twine',
-            'upload',
-            '*.whl',
-        ],
+    # Uploads go to the same index the uploaded files are verified against
+    index_url = os.environ.get('TWINEONTAG_INDEX_URL', default_index_url)
+
+    results = publish(
+        paths=sorted(glob.glob('*.whl')),
+        uploader=functools.partial(
+            twine_upload,
+            repository_url=repository_url(index_url),
+        ),
+        index_url=index_url,
+        jobs=int(os.environ.get('TWINEONTAG_JOBS', '4')),
     )
 
+    for result in results:
+        print('{}: {}{}'.format(
+            os.path.basename(result.path),
+            result.status,
+            '' if result.error is None else ' ({})'.format(result.error),
+        ))
+
+    if any(
+            result.status not in ('uploaded', 'skipped')
+            for result in results
+    ):
+        return 1
+
 
 if __name__ == '__main__':
     sys.exit(main())